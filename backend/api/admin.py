@@ -1,34 +1,161 @@
+import json
+
+from django.conf import settings
 from django.contrib import admin
+from django.contrib.admin.options import IncorrectLookupParameters
+from django.contrib.admin.views.main import ChangeList, ORDER_VAR, PAGE_VAR
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+
 from .models import Trader, Trade, Follower, CopiedTrade
 
 
+CURSOR_VAR = 'cursor'
+
+
+def estimate_count(queryset):
+    """
+    Row count estimate from the planner, or None where there is none
+
+    PostgreSQL estimates any filtered queryset with EXPLAIN; MySQL only knows
+    whole-table row counts. Other databases always return None.
+    """
+    connection = connections[queryset.db]
+    if connection.vendor == 'postgresql':
+        sql, params = queryset.order_by().values('pk').query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute('EXPLAIN (FORMAT JSON) ' + sql, params)
+            plan = cursor.fetchone()[0]
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return int(plan[0]['Plan']['Plan Rows'])
+
+    if connection.vendor == 'mysql' and not queryset.query.where:
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT TABLE_ROWS FROM information_schema.TABLES '
+                'WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s',
+                [queryset.model._meta.db_table]
+            )
+            row = cursor.fetchone()
+        return int(row[0]) if row and row[0] is not None else None
+
+    return None
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator that trusts planner estimates for large results
+
+    Results estimated below ADMIN_EXACT_COUNT_THRESHOLD rows, and databases
+    without estimates, still get an exact COUNT(*).
+    """
+
+    @cached_property
+    def count(self):
+        estimate = estimate_count(self.object_list)
+        if estimate is None or estimate < getattr(settings, 'ADMIN_EXACT_COUNT_THRESHOLD', 10000):
+            return self.object_list.count()
+        return estimate
+
+
+class CursorChangeList(ChangeList):
+    """
+    Changelist that can page by primary key instead of OFFSET
+
+    ``?cursor=<pk>`` lists the rows with a smaller primary key, newest first,
+    so deep pages cost the same as the first one. The "Older" link carries
+    the cursor forward while the default (primary key) ordering is in use.
+    """
+
+    def __init__(self, request, *args, **kwargs):
+        cursor = request.GET.get(CURSOR_VAR)
+        try:
+            self.cursor = int(cursor) if cursor else None
+        except ValueError:
+            raise IncorrectLookupParameters
+        self.next_cursor_url = None
+        super().__init__(request, *args, **kwargs)
+
+    def get_filters_params(self, params=None):
+        lookup_params = super().get_filters_params(params)
+        lookup_params.pop(CURSOR_VAR, None)
+        return lookup_params
+
+    def get_ordering(self, request, queryset):
+        if self.cursor is not None:
+            return ['-pk']
+        return super().get_ordering(request, queryset)
+
+    def get_queryset(self, request):
+        queryset = super().get_queryset(request)
+        if self.cursor is not None:
+            queryset = queryset.filter(pk__lt=self.cursor)
+        return queryset
+
+    def get_results(self, request):
+        super().get_results(request)
+        if ORDER_VAR in self.params and self.cursor is None:
+            return
+        rows = list(self.result_list)
+        if len(rows) == self.list_per_page and self.multi_page:
+            self.next_cursor_url = self.get_query_string({CURSOR_VAR: rows[-1].pk}, [PAGE_VAR, ORDER_VAR])
+
+
+class LargeTableAdmin(admin.ModelAdmin):
+    """
+    Changelist settings for tables with millions of rows
+
+    Related rows are joined instead of fetched per row, the total count is
+    estimated and the unfiltered total skipped, primary key ordering keeps
+    sorting on an index, and foreign keys use raw-ID or autocomplete widgets
+    instead of rendering every related row into a select.
+    """
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    ordering = ['-id']
+    change_list_template = 'admin/api/cursor_change_list.html'
+
+    def get_changelist(self, request, **kwargs):
+        return CursorChangeList
+
+
 @admin.register(Trader)
 class TraderAdmin(admin.ModelAdmin):
     list_display = ['user', 'experience_level', 'total_followers', 'win_rate', 'rating', 'is_verified']
     list_filter = ['experience_level', 'is_verified', 'created_at']
+    list_select_related = ['user']
     search_fields = ['user__username', 'user__first_name', 'user__last_name']
     readonly_fields = ['created_at', 'updated_at', 'total_followers', 'total_trades']
+    autocomplete_fields = ['user']
 
 
 @admin.register(Trade)
-class TradeAdmin(admin.ModelAdmin):
+class TradeAdmin(LargeTableAdmin):
     list_display = ['currency_pair', 'trader', 'direction', 'status', 'entry_price', 'profit_loss', 'roi_percentage']
     list_filter = ['status', 'currency_pair', 'direction', 'opened_at']
+    list_select_related = ['trader__user']
     search_fields = ['trader__user__username', 'currency_pair']
     readonly_fields = ['opened_at', 'closed_at']
+    autocomplete_fields = ['trader']
 
 
 @admin.register(Follower)
-class FollowerAdmin(admin.ModelAdmin):
+class FollowerAdmin(LargeTableAdmin):
     list_display = ['follower_user', 'trader', 'auto_copy_trades', 'total_profit', 'current_balance']
     list_filter = ['auto_copy_trades', 'followed_at']
+    list_select_related = ['follower_user', 'trader__user']
     search_fields = ['follower_user__username', 'trader__user__username']
     readonly_fields = ['followed_at', 'updated_at']
+    autocomplete_fields = ['trader', 'follower_user']
 
 
 @admin.register(CopiedTrade)
-class CopiedTradeAdmin(admin.ModelAdmin):
+class CopiedTradeAdmin(LargeTableAdmin):
     list_display = ['follower', 'original_trade', 'status', 'profit_loss', 'roi_percentage']
     list_filter = ['status', 'copied_at']
+    list_select_related = ['follower__follower_user', 'follower__trader__user', 'original_trade__trader__user']
     search_fields = ['follower__follower_user__username']
     readonly_fields = ['copied_at']
+    raw_id_fields = ['follower', 'original_trade']
@@ -0,0 +1,162 @@
+"""
+Hot/cold archival of closed trades and copies
+
+Closed Trade and CopiedTrade rows older than ARCHIVE_AFTER_DAYS are moved
+to ArchivedTrade / ArchivedCopiedTrade in small batches, each in its own
+short transaction, so the hot tables only hold recent history and open
+positions. Readers add the archive tables only when the date range they
+ask for reaches back to the newest archived row, or is unbounded.
+"""
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Exists, Max, OuterRef, Q, Sum
+from django.utils import timezone
+
+from .models import Trade, CopiedTrade, ArchivedTrade, ArchivedCopiedTrade
+
+
+TRADE_FIELDS = [
+    'id', 'trader_id', 'currency_pair', 'direction', 'entry_price', 'exit_price',
+    'stop_loss', 'take_profit', 'lot_size', 'profit_loss', 'roi_percentage',
+    'status', 'opened_at', 'closed_at', 'description', 'risk_reward_ratio',
+]
+
+COPIED_TRADE_FIELDS = [
+    'id', 'follower_id', 'original_trade_id', 'copied_at', 'entry_price', 'exit_price',
+    'lot_size', 'profit_loss', 'roi_percentage', 'status', 'closed_at',
+]
+
+
+def history_totals(*querysets):
+    """
+    Aggregate trade history spread over hot and archive tables
+
+    Each queryset (e.g. a trader's trades and archived trades) is aggregated
+    in the database and the per-table results are added up.
+
+    Returns:
+        Dictionary with count, open, closed, winning and losing counts and
+        closed profit, loss and ROI sums
+    """
+    closed = Q(status='closed')
+    totals = dict.fromkeys(['count', 'open', 'closed', 'winning', 'losing', 'profit', 'loss', 'roi'], 0)
+    for queryset in querysets:
+        result = queryset.aggregate(
+            count=Count('id'),
+            open=Count('id', filter=Q(status='open')),
+            closed=Count('id', filter=closed),
+            winning=Count('id', filter=closed & Q(profit_loss__gt=0)),
+            losing=Count('id', filter=closed & Q(profit_loss__lt=0)),
+            profit=Sum('profit_loss', filter=closed),
+            loss=Sum('profit_loss', filter=closed & Q(profit_loss__lt=0)),
+            roi=Sum('roi_percentage', filter=closed),
+        )
+        for key, value in result.items():
+            totals[key] += value or 0
+    totals['loss'] = abs(totals['loss'])
+    return totals
+
+
+class TradeArchiveService:
+    """Service for moving closed history between the hot and archive tables"""
+
+    @staticmethod
+    def archive_horizon(now=None):
+        """Rows closed before this moment belong in the archive"""
+        days = getattr(settings, 'ARCHIVE_AFTER_DAYS', 365)
+        return (now or timezone.now()) - timedelta(days=days)
+
+    @staticmethod
+    def archive_watermark(model=ArchivedTrade):
+        """Latest closed_at in an archive table, None while it is empty"""
+        return model.objects.aggregate(latest=Max('closed_at'))['latest']
+
+    @staticmethod
+    def range_needs_archive(since, model=ArchivedTrade):
+        """
+        Whether a query over [since, now] has to read an archive table
+
+        Compares against the newest row actually archived rather than the
+        configured horizon: archive_closed_trades --days, or a changed
+        ARCHIVE_AFTER_DAYS, can archive rows closed after it. A row is
+        opened before it is closed, so an archived row can only fall in the
+        range when since is at or before the watermark.
+
+        Args:
+            since: Start of the requested range, None for all history
+            model: ArchivedTrade or ArchivedCopiedTrade
+        """
+        watermark = TradeArchiveService.archive_watermark(model)
+        if watermark is None:
+            return False
+        return since is None or since <= watermark
+
+    @staticmethod
+    def _move_batch(queryset, archive_model, fields, batch_size):
+        ids = list(queryset.values_list('id', flat=True)[:batch_size])
+        if not ids:
+            return 0
+
+        with transaction.atomic():
+            rows = queryset.model.objects.filter(id__in=ids).values(*fields)
+            archive_model.objects.bulk_create(
+                [archive_model(**row) for row in rows], ignore_conflicts=True
+            )
+            queryset.model.objects.filter(id__in=ids).delete()
+
+        return len(ids)
+
+    @staticmethod
+    def archive_closed_copies(cutoff, batch_size=1000, pause=0.0):
+        """
+        Move closed copies older than cutoff into ArchivedCopiedTrade
+
+        Returns:
+            Number of rows moved
+        """
+        queryset = CopiedTrade.objects.filter(status='closed', closed_at__lt=cutoff).order_by('id')
+        moved = 0
+        while True:
+            count = TradeArchiveService._move_batch(
+                queryset, ArchivedCopiedTrade, COPIED_TRADE_FIELDS, batch_size
+            )
+            moved += count
+            if count < batch_size:
+                return moved
+            time.sleep(pause)
+
+    @staticmethod
+    def archive_closed_trades(cutoff, batch_size=1000, pause=0.0):
+        """
+        Move closed trades older than cutoff that have no live copies left
+
+        Returns:
+            Number of rows moved
+        """
+        live_copies = CopiedTrade.objects.filter(original_trade=OuterRef('pk'))
+        queryset = Trade.objects.filter(
+            status='closed', closed_at__lt=cutoff
+        ).filter(~Exists(live_copies)).order_by('id')
+        moved = 0
+        while True:
+            count = TradeArchiveService._move_batch(queryset, ArchivedTrade, TRADE_FIELDS, batch_size)
+            moved += count
+            if count < batch_size:
+                return moved
+            time.sleep(pause)
+
+    @staticmethod
+    def archive(cutoff=None, batch_size=1000, pause=0.0):
+        """
+        Archive closed copies first, then the closed trades they pointed to
+
+        Returns:
+            Tuple of (copies moved, trades moved)
+        """
+        cutoff = cutoff or TradeArchiveService.archive_horizon()
+        copies = TradeArchiveService.archive_closed_copies(cutoff, batch_size, pause)
+        trades = TradeArchiveService.archive_closed_trades(cutoff, batch_size, pause)
+        return copies, trades
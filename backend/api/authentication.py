@@ -0,0 +1,81 @@
+"""
+Authentication classes for Win Trade API
+"""
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.settings import api_settings
+
+
+class UserCache:
+    """
+    Short-lived in-process cache of authenticated users keyed by user id
+
+    Entries are dropped on any save or delete of the user (see api.signals),
+    so profile and password changes take effect immediately in the worker
+    that made them and within ``ttl`` seconds everywhere else.
+    """
+
+    def __init__(self, ttl=30, max_entries=10000):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, user_id):
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                return None
+            expires_at, user = entry
+            if expires_at < time.monotonic():
+                del self._entries[user_id]
+                return None
+            self._entries.move_to_end(user_id)
+        # Hand out a copy so a request mutating request.user cannot leak into others
+        return copy.copy(user)
+
+    def set(self, user_id, user):
+        with self._lock:
+            self._entries[user_id] = (time.monotonic() + self.ttl, copy.copy(user))
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+user_cache = UserCache(
+    ttl=getattr(settings, 'JWT_USER_CACHE_TTL', 30),
+    max_entries=getattr(settings, 'JWT_USER_CACHE_MAX_ENTRIES', 10000),
+)
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication that resolves the token's user from ``user_cache``
+
+    Only a cache miss hits the database; inactive and missing users are
+    rejected by the parent class before anything is cached.
+    """
+
+    def get_user(self, validated_token):
+        user_id = validated_token.get(api_settings.USER_ID_CLAIM)
+        if user_id is not None:
+            user = user_cache.get(user_id)
+            if user is not None:
+                return user
+
+        user = super().get_user(validated_token)
+        user_cache.set(user_id, user)
+        return user
@@ -0,0 +1,235 @@
+"""
+Versioned per-object response cache
+
+Cached responses are keyed by an object namespace (e.g. ``trader:42``) plus
+that namespace's current version number. Writes never delete cached
+entries: model signals and the bulk service paths bump the version when
+their transaction commits, which makes every old key unreachable at once,
+and the stale entries age out of the size-bounded LRU. A burst of writes
+therefore never turns into a burst of deletes, and readers never stampede
+on a shared delete.
+"""
+import pickle
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import transaction
+from rest_framework.response import Response
+
+from .metrics import CACHE_EVICTIONS, CACHE_HITS, CACHE_MISSES
+
+
+class LocalMemoryBackend:
+    """
+    In-process LRU cache
+
+    Versions live in the process too, so invalidations only reach the
+    process that made the write. Only for a single web process without
+    background writers; check_backend() refuses it anywhere else.
+    """
+    name = 'locmem'
+    shared = False
+
+    def __init__(self, max_entries=10000, timeout=300, **kwargs):
+        self.max_entries = max_entries
+        self.timeout = timeout
+        self._entries = OrderedDict()
+        self._versions = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        evicted = 0
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.timeout, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                evicted += 1
+        if evicted:
+            CACHE_EVICTIONS.labels(backend=self.name).inc(evicted)
+
+    def get_version(self, namespace):
+        return self._versions.get(namespace, 0)
+
+    def incr_version(self, namespace):
+        with self._lock:
+            self._versions[namespace] = self._versions.get(namespace, 0) + 1
+            return self._versions[namespace]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._versions.clear()
+
+
+class RedisBackend:
+    """
+    Redis-backed LRU cache shared by all workers
+
+    Recency is tracked in a sorted set so the cache stays within
+    ``max_entries`` independently of the server's maxmemory policy.
+    """
+    name = 'redis'
+    shared = True
+
+    def __init__(self, location='redis://localhost:6379/1', max_entries=10000, timeout=300,
+                 prefix='wt:rc', **kwargs):
+        import redis
+
+        self.client = redis.Redis.from_url(location)
+        self.max_entries = max_entries
+        self.timeout = timeout
+        self.prefix = prefix
+        self.lru_key = f'{prefix}:lru'
+
+    def _key(self, key):
+        return f'{self.prefix}:e:{key}'
+
+    def get(self, key):
+        pipe = self.client.pipeline()
+        pipe.get(self._key(key))
+        pipe.zadd(self.lru_key, {key: time.time()}, xx=True)
+        value, _ = pipe.execute()
+        return None if value is None else pickle.loads(value)
+
+    def set(self, key, value):
+        pipe = self.client.pipeline()
+        pipe.set(self._key(key), pickle.dumps(value, pickle.HIGHEST_PROTOCOL), ex=self.timeout)
+        pipe.zadd(self.lru_key, {key: time.time()})
+        pipe.zcard(self.lru_key)
+        size = pipe.execute()[-1]
+
+        overflow = size - self.max_entries
+        if overflow > 0:
+            evicted = [member.decode() for member, _ in self.client.zpopmin(self.lru_key, overflow)]
+            if evicted:
+                self.client.delete(*[self._key(member) for member in evicted])
+                CACHE_EVICTIONS.labels(backend=self.name).inc(len(evicted))
+
+    def get_version(self, namespace):
+        version = self.client.get(f'{self.prefix}:v:{namespace}')
+        return int(version) if version is not None else 0
+
+    def incr_version(self, namespace):
+        return self.client.incr(f'{self.prefix}:v:{namespace}')
+
+    def clear(self):
+        keys = list(self.client.scan_iter(f'{self.prefix}:*'))
+        if keys:
+            self.client.delete(*keys)
+
+
+BACKENDS = {
+    'locmem': LocalMemoryBackend,
+    'redis': RedisBackend,
+}
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def get_backend():
+    """Return the process-wide backend configured by settings.RESPONSE_CACHE"""
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                config = dict(getattr(settings, 'RESPONSE_CACHE', {}))
+                backend_class = BACKENDS[config.pop('BACKEND', 'redis')]
+                _backend = backend_class(**{key.lower(): value for key, value in config.items()})
+    return _backend
+
+
+def check_backend(background_worker=False):
+    """
+    Refuse a per-process backend where its versions cannot be shared
+
+    Called when a web worker or Celery worker starts. Versions bumped in one
+    process are invisible to the others, so with several web workers
+    (WEB_CONCURRENCY) or in a Celery worker, whose bumps never reach a web
+    worker, the locmem backend would serve stale responses until they
+    expire.
+
+    Raises:
+        ImproperlyConfigured: The cache is enabled with a backend that is
+            not shared in a multi-process deployment
+    """
+    if not getattr(settings, 'RESPONSE_CACHE_ENABLED', True):
+        return
+    name = getattr(settings, 'RESPONSE_CACHE', {}).get('BACKEND', 'redis')
+    if BACKENDS[name].shared:
+        return
+    if background_worker or getattr(settings, 'WEB_CONCURRENCY', 1) > 1:
+        raise ImproperlyConfigured(
+            f"RESPONSE_CACHE_BACKEND={name!r} keeps versions per process; use 'redis' with more than one "
+            "web worker or with Celery, or set RESPONSE_CACHE_ENABLED=False"
+        )
+
+
+def trader_namespace(trader_id):
+    return f'trader:{trader_id}'
+
+
+def bump_trader_version(trader_id):
+    """
+    Invalidate every cached response of a trader once the write commits
+
+    Bumping while the writing transaction is still open would let a
+    concurrent GET cache the old committed rows under the new version,
+    where they would stay until the next write. Outside a transaction the
+    version is bumped right away; a rolled-back write changes nothing and
+    does not bump.
+    """
+    if trader_id is not None:
+        transaction.on_commit(lambda: get_backend().incr_version(trader_namespace(trader_id)))
+
+
+def cache_trader_response(view_name):
+    """
+    Cache a trader viewset action's successful GET responses
+
+    The cached value is the response data, so content negotiation still
+    happens per request. The key includes the host (for absolute URLs) and
+    the query string.
+    """
+    def decorator(func):
+        @wraps(func)
+        def wrapper(self, request, *args, **kwargs):
+            if request.method != 'GET' or not getattr(settings, 'RESPONSE_CACHE_ENABLED', True):
+                return func(self, request, *args, **kwargs)
+
+            backend = get_backend()
+            namespace = trader_namespace(kwargs.get('pk'))
+            key = '%s:v%s:%s:%s:%s' % (
+                namespace, backend.get_version(namespace), view_name,
+                request.get_host(), request.META.get('QUERY_STRING', ''),
+            )
+
+            data = backend.get(key)
+            if data is not None:
+                CACHE_HITS.labels(backend=backend.name, view=view_name).inc()
+                return Response(data, headers={'X-Cache': 'HIT'})
+
+            CACHE_MISSES.labels(backend=backend.name, view=view_name).inc()
+            response = func(self, request, *args, **kwargs)
+            if response.status_code == 200 and isinstance(response, Response):
+                backend.set(key, response.data)
+            return response
+        return wrapper
+    return decorator
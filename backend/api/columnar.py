@@ -0,0 +1,365 @@
+"""
+Columnar export of closed trade history for offline analytics
+
+Closed trades and copied trades (live and archived) are written as one
+NumPy ``.npy`` file per column per month of ``closed_at``::
+
+    <ANALYTICS_EXPORT_DIR>/<dataset>/<YYYY-MM>/<column>.npy
+    <ANALYTICS_EXPORT_DIR>/<dataset>/<YYYY-MM>/part-<run>-<seq>/<column>.npy
+    <ANALYTICS_EXPORT_DIR>/<dataset>/_watermark.json
+
+Exports are incremental: the watermark records the last exported
+(closed_at, id) and the number of the last completed run, and each run
+only exports rows closed after it. New rows never rewrite existing files:
+each run adds them to their month as a part directory, staged under a
+hidden name and renamed into place so readers only see whole parts.
+Parts left by a run that did not reach its watermark are discarded by the
+next run, which exports those rows again.
+
+Once the watermark has moved past a month no more rows can arrive for it,
+and its parts are compacted into the month's top-level column files. Each
+month is a symlink to a hidden versioned directory; compaction writes the
+merged columns to a fresh directory and swaps the link with a single
+os.replace(), so readers see either the parts or the compacted month.
+
+Files are uncompressed so readers can memory-map them and pull years of
+history without touching the database or loading whole columns into RAM.
+"""
+import json
+import os
+import shutil
+import uuid
+from datetime import datetime, timezone as dt_timezone
+
+import numpy as np
+from django.conf import settings
+from django.db.models import Q
+
+from .models import Trade, CopiedTrade, ArchivedTrade, ArchivedCopiedTrade
+
+
+# Column name -> numpy dtype; datetimes are stored as naive UTC microseconds
+DATASETS = {
+    'trades': {
+        'models': (Trade, ArchivedTrade),
+        'columns': {
+            'id': 'int64',
+            'trader_id': 'int64',
+            'currency_pair': 'U10',
+            'direction': 'U10',
+            'entry_price': 'float64',
+            'exit_price': 'float64',
+            'lot_size': 'float64',
+            'profit_loss': 'float64',
+            'roi_percentage': 'float64',
+            'opened_at': 'datetime64[us]',
+            'closed_at': 'datetime64[us]',
+        },
+    },
+    'copies': {
+        'models': (CopiedTrade, ArchivedCopiedTrade),
+        'columns': {
+            'id': 'int64',
+            'follower_id': 'int64',
+            'original_trade_id': 'int64',
+            'entry_price': 'float64',
+            'exit_price': 'float64',
+            'lot_size': 'float64',
+            'profit_loss': 'float64',
+            'roi_percentage': 'float64',
+            'copied_at': 'datetime64[us]',
+            'closed_at': 'datetime64[us]',
+        },
+    },
+}
+
+WATERMARK_FILE = '_watermark.json'
+PART_PREFIX = 'part-'
+
+
+def get_root(root=None):
+    return str(root or getattr(settings, 'ANALYTICS_EXPORT_DIR', os.path.join(settings.BASE_DIR, 'analytics')))
+
+
+def _utc_naive(value):
+    if value is None:
+        return None
+    if value.tzinfo is not None:
+        value = value.astimezone(dt_timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def _write_columns(path, columns):
+    os.makedirs(path)
+    for name, values in columns.items():
+        with open(os.path.join(path, name + '.npy'), 'wb') as handle:
+            np.save(handle, values)
+
+
+def _swap_month(month_path, columns):
+    """Write a month's columns to a new directory and point the month at it"""
+    dataset_path, month = os.path.split(month_path)
+    version = f'.{month}.{uuid.uuid4().hex[:12]}'
+    _write_columns(os.path.join(dataset_path, version), columns)
+
+    previous = os.path.realpath(month_path) if os.path.islink(month_path) else None
+    if os.path.isdir(month_path) and previous is None:
+        # A month written before months were versioned: move it aside first
+        previous = os.path.join(dataset_path, f'.{month}.legacy')
+        os.replace(month_path, previous)
+
+    link = month_path + '.tmp'
+    if os.path.lexists(link):
+        os.remove(link)
+    os.symlink(version, link)
+    os.replace(link, month_path)
+    if previous is not None:
+        # Readers that already mapped the old files keep them until closed
+        shutil.rmtree(previous, ignore_errors=True)
+
+
+def _part_run(name):
+    return int(name[len(PART_PREFIX):].split('-')[0])
+
+
+def _month_pieces(month_path, first_column):
+    """
+    Directories holding a month's rows, in export order
+
+    The month's own compacted columns (if any) come first, then each part.
+    """
+    names = os.listdir(month_path)
+    pieces = [month_path] if first_column + '.npy' in names else []
+    pieces += [os.path.join(month_path, name) for name in sorted(names) if name.startswith(PART_PREFIX)]
+    return pieces
+
+
+def _remove_month(month_path):
+    if os.path.islink(month_path):
+        target = os.path.realpath(month_path)
+        os.remove(month_path)
+        shutil.rmtree(target, ignore_errors=True)
+    else:
+        shutil.rmtree(month_path, ignore_errors=True)
+
+
+class ColumnarExporter:
+    """Append closed rows of one dataset to its monthly column files"""
+
+    def __init__(self, dataset, root=None, chunk_size=10000, flush_rows=500000):
+        self.dataset = dataset
+        self.spec = DATASETS[dataset]
+        self.path = os.path.join(get_root(root), dataset)
+        self.chunk_size = chunk_size
+        self.flush_rows = flush_rows
+        self._buffers = {}
+
+    def _read_state(self):
+        try:
+            with open(os.path.join(self.path, WATERMARK_FILE)) as handle:
+                return json.load(handle)
+        except FileNotFoundError:
+            return None
+
+    def read_watermark(self):
+        data = self._read_state()
+        if data is None:
+            return None
+        return datetime.fromisoformat(data['closed_at']), data['id']
+
+    def read_run(self):
+        """Number of the last run whose watermark was written"""
+        data = self._read_state()
+        return data.get('run', 0) if data else 0
+
+    def write_watermark(self, closed_at, row_id, run=0):
+        with open(os.path.join(self.path, WATERMARK_FILE + '.tmp'), 'w') as handle:
+            json.dump({'closed_at': closed_at.isoformat(), 'id': row_id, 'run': run}, handle)
+        os.replace(os.path.join(self.path, WATERMARK_FILE + '.tmp'), os.path.join(self.path, WATERMARK_FILE))
+
+    def pending_rows(self, model, watermark):
+        queryset = model.objects.filter(status='closed', closed_at__isnull=False)
+        if watermark is not None:
+            closed_at, row_id = watermark
+            closed_at = closed_at.replace(tzinfo=dt_timezone.utc)
+            queryset = queryset.filter(
+                Q(closed_at__gt=closed_at) | Q(closed_at=closed_at, id__gt=row_id)
+            )
+        return queryset.order_by('closed_at', 'id').values_list(*self.spec['columns']).iterator(
+            chunk_size=self.chunk_size
+        )
+
+    def export(self, full=False):
+        """
+        Export rows closed since the last run
+
+        Args:
+            full: Ignore the watermark and rewrite the dataset from scratch
+
+        Returns:
+            Number of rows appended
+        """
+        os.makedirs(self.path, exist_ok=True)
+        if full:
+            self._clear()
+        watermark = None if full else self.read_watermark()
+        committed = self.read_run()
+        self._discard_parts(after_run=committed)
+        self._run, self._part = committed + 1, 0
+
+        names = list(self.spec['columns'])
+        closed_index = names.index('closed_at')
+        newest = watermark
+        exported = 0
+
+        for model in self.spec['models']:
+            for row in self.pending_rows(model, watermark):
+                row = [_utc_naive(value) if isinstance(value, datetime) else value for value in row]
+                closed_at = row[closed_index]
+                self._buffers.setdefault(closed_at.strftime('%Y-%m'), []).append(row)
+                exported += 1
+
+                if newest is None or (closed_at, row[0]) > newest:
+                    newest = (closed_at, row[0])
+                if exported % self.chunk_size == 0:
+                    self._flush(min_rows=self.flush_rows)
+
+        self._flush()
+        if newest is not None and newest != watermark:
+            self.write_watermark(*newest, run=self._run)
+        if newest is not None:
+            self._compact_before(newest[0].strftime('%Y-%m'))
+        return exported
+
+    def _clear(self):
+        for month in list_months(self.dataset, root=os.path.dirname(self.path)):
+            _remove_month(os.path.join(self.path, month))
+        # Versions left behind by an interrupted swap
+        for name in os.listdir(self.path):
+            if name.startswith('.'):
+                shutil.rmtree(os.path.join(self.path, name), ignore_errors=True)
+        if os.path.exists(os.path.join(self.path, WATERMARK_FILE)):
+            os.remove(os.path.join(self.path, WATERMARK_FILE))
+
+    def _flush(self, min_rows=0):
+        for month, rows in list(self._buffers.items()):
+            if len(rows) >= min_rows:
+                self._write_part(month, rows)
+                del self._buffers[month]
+
+    def _write_part(self, month, rows):
+        """Add rows to a month as a new part, leaving its existing files alone"""
+        month_path = os.path.join(self.path, month)
+        if not os.path.lexists(month_path):
+            _swap_month(month_path, {})
+
+        columns = {}
+        for position, (name, dtype) in enumerate(self.spec['columns'].items()):
+            values = [row[position] for row in rows]
+            if dtype == 'float64':
+                values = [np.nan if value is None else value for value in values]
+            columns[name] = np.array(values, dtype=dtype)
+
+        part = f'{PART_PREFIX}{self._run:08d}-{self._part:06d}'
+        self._part += 1
+        staging = os.path.join(month_path, '.' + part)
+        _write_columns(staging, columns)
+        os.replace(staging, os.path.join(month_path, part))
+
+    def _discard_parts(self, after_run):
+        """Remove parts written by runs that never reached their watermark"""
+        for month in list_months(self.dataset, root=os.path.dirname(self.path)):
+            month_path = os.path.join(self.path, month)
+            for name in os.listdir(month_path):
+                staged = name.startswith('.' + PART_PREFIX)
+                if staged or (name.startswith(PART_PREFIX) and _part_run(name) > after_run):
+                    shutil.rmtree(os.path.join(month_path, name), ignore_errors=True)
+
+    def _compact_before(self, open_month):
+        """Merge the parts of every month before ``open_month`` into one set of columns"""
+        names = list(self.spec['columns'])
+        for month in list_months(self.dataset, root=os.path.dirname(self.path)):
+            if month >= open_month:
+                break
+            month_path = os.path.join(self.path, month)
+            pieces = _month_pieces(month_path, names[0])
+            if len(pieces) < 2:
+                continue
+            _swap_month(month_path, {
+                name: np.concatenate([np.load(os.path.join(piece, name + '.npy')) for piece in pieces])
+                for name in names
+            })
+
+
+def list_months(dataset, root=None):
+    """Return the exported months of a dataset, oldest first"""
+    path = os.path.join(get_root(root), dataset)
+    if not os.path.isdir(path):
+        return []
+    return sorted(
+        name for name in os.listdir(path)
+        if not name.startswith('.') and not name.endswith('.tmp') and os.path.isdir(os.path.join(path, name))
+    )
+
+
+def _month_key(value):
+    if value is None or isinstance(value, str):
+        return value
+    return value.strftime('%Y-%m')
+
+
+def iter_months(dataset, columns=None, start=None, end=None, root=None):
+    """
+    Yield (month, {column: array}) for each exported month in range
+
+    Compacted months are read-only memory maps, so nothing is loaded until
+    it is used; a month still made of several parts is concatenated.
+
+    Args:
+        dataset: 'trades' or 'copies'
+        columns: Column names to map, default all
+        start: First month as 'YYYY-MM', date or datetime (inclusive)
+        end: Last month as 'YYYY-MM', date or datetime (inclusive)
+    """
+    columns = columns or list(DATASETS[dataset]['columns'])
+    path = os.path.join(get_root(root), dataset)
+    start, end = _month_key(start), _month_key(end)
+    for month in list_months(dataset, root):
+        if (start and month < start) or (end and month > end):
+            continue
+        # Resolve the link once so every column comes from the same version
+        month_path = os.path.realpath(os.path.join(path, month))
+        pieces = []
+        for piece in _month_pieces(month_path, columns[0]):
+            arrays = {name: np.load(os.path.join(piece, name + '.npy'), mmap_mode='r') for name in columns}
+            if len({len(array) for array in arrays.values()}) > 1:
+                raise ValueError(f'{dataset}/{month}: columns have different lengths; run export_closed_history --full')
+            pieces.append(arrays)
+        if not pieces:
+            continue
+        if len(pieces) == 1:
+            yield month, pieces[0]
+        else:
+            yield month, {name: np.concatenate([arrays[name] for arrays in pieces]) for name in columns}
+
+
+def load_columns(dataset, columns=None, start=None, end=None, root=None):
+    """
+    Load columns of a dataset across months
+
+    A single month is returned as memory maps; several months are
+    concatenated into in-memory arrays. Use iter_months() to stream very
+    long ranges month by month instead.
+
+    Returns:
+        Dictionary of column name to numpy array
+    """
+    columns = columns or list(DATASETS[dataset]['columns'])
+    months = [arrays for _, arrays in iter_months(dataset, columns, start, end, root)]
+    if len(months) == 1:
+        return months[0]
+    return {
+        name: np.concatenate([arrays[name] for arrays in months]) if months
+        else np.empty(0, dtype=DATASETS[dataset]['columns'][name])
+        for name in columns
+    }
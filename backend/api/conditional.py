@@ -0,0 +1,73 @@
+"""
+Validators for conditional GET (ETag / Last-Modified) on trader endpoints
+
+Each validator runs a few cheap queries (a primary-key lookup or
+aggregates over the trader's trades) so a matching If-None-Match or
+If-Modified-Since can be answered with 304 before the full query and
+serializer run.
+"""
+import hashlib
+
+from django.db.models import Count, Max, Q
+
+from .models import ArchivedTrade, Trader, Trade
+
+
+def _etag(*parts):
+    return '"%s"' % hashlib.md5('|'.join(str(part) for part in parts).encode()).hexdigest()
+
+
+def trader_last_modified(request, pk=None, **kwargs):
+    """Trader.updated_at, bumped on every profile and stats save"""
+    try:
+        return Trader.objects.filter(pk=pk).values_list('updated_at', flat=True).first()
+    except (TypeError, ValueError):
+        return None
+
+
+def trader_etag(request, pk=None, **kwargs):
+    updated_at = trader_last_modified(request, pk)
+    if updated_at is None:
+        return None
+    return _etag('trader', pk, updated_at.isoformat(), request.META.get('QUERY_STRING', ''))
+
+
+def trader_stats_etag(request, pk=None, **kwargs):
+    updated_at = trader_last_modified(request, pk)
+    if updated_at is None:
+        return None
+    return _etag('trader-stats', pk, updated_at.isoformat())
+
+
+def trader_trades_etag(request, pk=None, **kwargs):
+    """
+    Changes whenever a trade of the trader is added, edited, closed, archived
+    or removed
+
+    The trader's updated_at is included because trade payloads carry the
+    trader's name. Trade.updated_at catches edits to existing trades; the
+    archive state covers archived rows, which the list includes when its
+    range reaches back to them.
+    """
+    updated_at = trader_last_modified(request, pk)
+    if updated_at is None:
+        return None
+
+    state = Trade.objects.filter(trader_id=pk).aggregate(
+        count=Count('id'),
+        last_opened=Max('opened_at'),
+        last_closed=Max('closed_at'),
+        last_updated=Max('updated_at'),
+        closed=Count('closed_at'),
+        open=Count('id', filter=Q(status='open')),
+    )
+    archived = ArchivedTrade.objects.filter(trader_id=pk).aggregate(
+        count=Count('id'),
+        last_archived=Max('archived_at'),
+    )
+    return _etag(
+        'trader-trades', pk, updated_at.isoformat(),
+        state['count'], state['last_opened'], state['last_closed'], state['last_updated'],
+        state['closed'], state['open'], archived['count'], archived['last_archived'],
+        request.META.get('QUERY_STRING', ''),
+    )
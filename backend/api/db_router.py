@@ -0,0 +1,143 @@
+"""
+Primary/replica database routing
+
+Reads issued while serving a safe (GET/HEAD/OPTIONS) request go to a
+healthy replica; everything else - writes, reads during unsafe requests,
+management commands and background jobs - uses the primary. After a user's
+successful write, their reads stay on the primary for
+REPLICA_STICKY_SECONDS so they always see their own changes despite
+replication lag.
+
+Replicas are the DATABASES aliases listed in settings.DATABASE_REPLICAS.
+"""
+import random
+import threading
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.utils.functional import SimpleLazyObject
+
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+_state = threading.local()
+
+
+def _sticky_key(user_id):
+    return f'db-router:sticky:{user_id}'
+
+
+def _sticky_cache():
+    return caches[getattr(settings, 'REPLICA_STICKY_CACHE', 'default')]
+
+
+@contextmanager
+def pin_primary():
+    """Route every read inside the block to the primary"""
+    previous = getattr(_state, 'pinned', False)
+    _state.pinned = True
+    try:
+        yield
+    finally:
+        _state.pinned = previous
+
+
+class ReplicaHealth:
+    """Remember whether each replica accepted a connection recently"""
+
+    def __init__(self):
+        self._checked = {}
+        self._lock = threading.Lock()
+
+    def is_healthy(self, alias):
+        interval = getattr(settings, 'REPLICA_HEALTH_CHECK_INTERVAL', 30)
+        now = time.monotonic()
+        checked_at, healthy = self._checked.get(alias, (None, True))
+        if checked_at is not None and now - checked_at < interval:
+            return healthy
+
+        healthy = self.check(alias)
+        with self._lock:
+            self._checked[alias] = (now, healthy)
+        return healthy
+
+    @staticmethod
+    def check(alias):
+        try:
+            connection = connections[alias]
+            connection.ensure_connection()
+            return connection.is_usable()
+        except Exception:
+            return False
+
+
+replica_health = ReplicaHealth()
+
+
+class PrimaryReplicaRouter:
+    """Send reads of safe requests to replicas and everything else to the primary"""
+
+    def db_for_read(self, model, **hints):
+        replicas = getattr(settings, 'DATABASE_REPLICAS', [])
+        if not replicas or not getattr(_state, 'use_replica', False):
+            return DEFAULT_DB_ALIAS
+        if getattr(_state, 'pinned', False) or self._is_sticky():
+            return DEFAULT_DB_ALIAS
+
+        healthy = [alias for alias in replicas if replica_health.is_healthy(alias)]
+        return random.choice(healthy) if healthy else DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same data as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == DEFAULT_DB_ALIAS
+
+    @staticmethod
+    def _is_sticky():
+        sticky = getattr(_state, 'sticky', None)
+        if sticky is not None:
+            return sticky
+
+        # DRF stores the authenticated user on the underlying HttpRequest;
+        # until then (or for anonymous users) there is nothing to stick to.
+        request = getattr(_state, 'request', None)
+        user = request.__dict__.get('user') if request is not None else None
+        if user is None or isinstance(user, SimpleLazyObject) or not user.is_authenticated:
+            return False
+
+        _state.sticky = bool(_sticky_cache().get(_sticky_key(user.pk)))
+        return _state.sticky
+
+
+class ReplicaRoutingMiddleware:
+    """Scope replica reads to safe requests and record writes for stickiness"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        _state.request = request
+        _state.use_replica = request.method in SAFE_METHODS
+        _state.sticky = None
+        try:
+            response = self.get_response(request)
+
+            if not _state.use_replica and response.status_code < 400:
+                user = getattr(request, 'user', None)
+                if user is not None and user.is_authenticated:
+                    _sticky_cache().set(
+                        _sticky_key(user.pk), True, getattr(settings, 'REPLICA_STICKY_SECONDS', 5)
+                    )
+            return response
+        finally:
+            _state.request = None
+            _state.use_replica = False
+            _state.sticky = None
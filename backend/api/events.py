@@ -0,0 +1,113 @@
+"""
+Append-only trade event journal
+
+Every state change of the copy engine appends a TradeEvent in the same
+transaction as the change itself, so the journal never disagrees with the
+tables. Consumers read it in offset order (see projections.py) to keep
+derived data up to date and can rebuild that data by replaying from zero.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from .models import TradeEvent
+
+
+class EventJournal:
+    """Write and read TradeEvent rows"""
+
+    @staticmethod
+    def record(event_type, trader_id=None, trade_id=None, follower_id=None, copied_trade_id=None, **payload):
+        """
+        Append an event; call inside the transaction that makes the change
+
+        Returns:
+            Created TradeEvent instance
+        """
+        return TradeEvent.objects.create(
+            event_type=event_type,
+            trader_id=trader_id,
+            trade_id=trade_id,
+            follower_id=follower_id,
+            copied_trade_id=copied_trade_id,
+            payload=payload,
+        )
+
+    @staticmethod
+    def trade_opened(trade):
+        return EventJournal.record(
+            'trade_opened', trader_id=trade.trader_id, trade_id=trade.pk,
+            currency_pair=trade.currency_pair, direction=trade.direction,
+            entry_price=trade.entry_price, lot_size=trade.lot_size, opened_at=trade.opened_at,
+        )
+
+    @staticmethod
+    def trade_closed(trade):
+        return EventJournal.record(
+            'trade_closed', trader_id=trade.trader_id, trade_id=trade.pk,
+            exit_price=trade.exit_price, profit_loss=trade.profit_loss,
+            roi_percentage=trade.roi_percentage, closed_at=trade.closed_at,
+        )
+
+    @staticmethod
+    def trade_deleted(trade):
+        return EventJournal.record(
+            'trade_deleted', trader_id=trade.trader_id, trade_id=trade.pk,
+            status=trade.status, profit_loss=trade.profit_loss, roi_percentage=trade.roi_percentage,
+        )
+
+    @staticmethod
+    def copy_created(copied_trade, follower):
+        return EventJournal.record(
+            'copy_created', trader_id=follower.trader_id, trade_id=copied_trade.original_trade_id,
+            follower_id=follower.pk, copied_trade_id=copied_trade.pk,
+            entry_price=copied_trade.entry_price, lot_size=copied_trade.lot_size,
+        )
+
+    @staticmethod
+    def copy_closed(copied_trade, follower, commission=0.0):
+        return EventJournal.record(
+            'copy_closed', trader_id=follower.trader_id, trade_id=copied_trade.original_trade_id,
+            follower_id=follower.pk, copied_trade_id=copied_trade.pk,
+            exit_price=copied_trade.exit_price, profit_loss=copied_trade.profit_loss,
+            roi_percentage=copied_trade.roi_percentage, commission=commission,
+            closed_at=copied_trade.closed_at,
+        )
+
+    @staticmethod
+    def followed(follower):
+        return EventJournal.record(
+            'follow', trader_id=follower.trader_id, follower_id=follower.pk,
+            user_id=follower.follower_user_id, auto_copy_trades=follower.auto_copy_trades,
+            copy_percentage=follower.copy_percentage, initial_investment=follower.initial_investment,
+        )
+
+    @staticmethod
+    def unfollowed(follower):
+        return EventJournal.record(
+            'unfollow', trader_id=follower.trader_id, follower_id=follower.pk,
+            user_id=follower.follower_user_id, **follower.live_balances(),
+        )
+
+    @staticmethod
+    def read(after=0, limit=1000):
+        """
+        Return up to ``limit`` events with an offset greater than ``after``
+
+        Ids are allocated before commit, so a concurrent transaction can
+        commit a lower offset after a higher one is visible. The batch stops
+        at a gap until it fills or is older than EVENT_GAP_GRACE_SECONDS
+        (rolled-back inserts leave permanent gaps), so a consumer advancing
+        its checkpoint never skips an event.
+        """
+        events = list(TradeEvent.objects.filter(id__gt=after).order_by('id')[:limit])
+        grace = getattr(settings, 'EVENT_GAP_GRACE_SECONDS', 5)
+        settled_before = timezone.now() - timedelta(seconds=grace)
+
+        expected = after + 1
+        for position, event in enumerate(events):
+            if event.id != expected and event.created_at > settled_before:
+                return events[:position]
+            expected = event.id + 1
+        return events
@@ -0,0 +1,274 @@
+"""
+Incrementally maintained open-position exposure per follower and trader
+
+Write paths pass the (before, after) states of the copies they open or
+close to ExposureIndex.record_copies(), and of the trades they change to
+record_trades(), in the same transaction, the way MarketStats.record() is
+fed. Buy and sell lots and notional per (follower, pair) and (trader, pair)
+are then a single indexed row, so fan-out risk limits, the portfolio and
+margin warnings never sum open CopiedTrade rows. reconcile() recomputes
+the rows from the open positions and repairs any drift.
+"""
+import copy
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .fixedpoint import (
+    LOT_SCALE, MONEY_SCALE, PRICE_LOT_TO_MONEY, PRICE_SCALE, div_round, from_units, to_units
+)
+from .models import CopiedTrade, FollowerExposure, Trade, TraderExposure
+
+
+COUNTERS = ('open_positions', 'buy_lots', 'sell_lots', 'notional')
+
+
+def _contribution(position, direction):
+    """What one trade or copy adds to its exposure row, in units"""
+    if position.status != 'open':
+        return dict.fromkeys(COUNTERS, 0)
+    lots = to_units(position.lot_size, LOT_SCALE)
+    return {
+        'open_positions': 1,
+        'buy_lots': lots if direction == 'buy' else 0,
+        'sell_lots': lots if direction == 'sell' else 0,
+        'notional': div_round(lots * to_units(position.entry_price, PRICE_SCALE), PRICE_LOT_TO_MONEY),
+    }
+
+
+def _fields(counters):
+    """Counter units as model field values"""
+    return {
+        'open_positions': counters['open_positions'],
+        'buy_lots': from_units(counters['buy_lots'], LOT_SCALE),
+        'sell_lots': from_units(counters['sell_lots'], LOT_SCALE),
+        'notional': from_units(counters['notional'], MONEY_SCALE),
+    }
+
+
+def _trade_key(trade):
+    return trade.trader_id, trade.currency_pair, trade.direction
+
+
+def _copy_key(copied_trade):
+    # Pair and direction belong to the original trade
+    trade = copied_trade.original_trade
+    return copied_trade.follower_id, trade.currency_pair, trade.direction
+
+
+class ExposureIndex:
+    """Maintain and read the per-pair exposure rows"""
+
+    @staticmethod
+    def record_copies(changes):
+        """
+        Apply copy changes to FollowerExposure; call inside the writing transaction
+
+        Args:
+            changes: Iterable of (before, after) CopiedTrade states, None for
+                a missing side. Each state's original_trade must hold the
+                trade as it was for that state.
+        """
+        ExposureIndex._record(FollowerExposure, 'follower_id', changes, _copy_key)
+
+    @staticmethod
+    def record_trades(changes):
+        """
+        Apply trade changes to TraderExposure; call inside the writing transaction
+
+        Open copies follow their trade: when a trade moves to another pair or
+        direction, or is deleted, its copies' exposure is moved or removed too.
+
+        Args:
+            changes: Iterable of (before, after) Trade states as for
+                MarketStats.record()
+        """
+        changes = list(changes)
+        ExposureIndex._record(TraderExposure, 'trader_id', changes, _trade_key)
+
+        copy_changes = []
+        for before, after in changes:
+            if before is None:
+                continue
+            if after is not None and _trade_key(before) == _trade_key(after):
+                continue
+            for copied_trade in CopiedTrade.objects.filter(original_trade_id=before.pk, status='open'):
+                previous = copy.copy(copied_trade)
+                previous.original_trade = before
+                if after is not None:
+                    copied_trade.original_trade = after
+                copy_changes.append((previous, copied_trade if after is not None else None))
+        if copy_changes:
+            ExposureIndex.record_copies(copy_changes)
+
+    @staticmethod
+    def _record(model, owner, changes, key):
+        deltas = defaultdict(lambda: dict.fromkeys(COUNTERS, 0))
+        for before, after in changes:
+            for position, sign in ((before, -1), (after, 1)):
+                if position is None:
+                    continue
+                owner_id, pair, direction = key(position)
+                for name, value in _contribution(position, direction).items():
+                    deltas[(owner_id, pair)][name] += sign * value
+
+        now = timezone.now()
+        for (owner_id, pair), delta in deltas.items():
+            changed = {name: F(name) + value for name, value in delta.items() if value}
+            if not changed:
+                continue
+            lookup = {owner: owner_id, 'currency_pair': pair}
+            # The row usually exists, so try the single UPDATE first
+            rows = model.objects.filter(**lookup)
+            if not rows.update(updated_at=now, **changed):
+                model.objects.get_or_create(**lookup)
+                rows.update(updated_at=now, **changed)
+
+    @staticmethod
+    def as_dict(row):
+        """
+        One exposure row as API output
+
+        Args:
+            row: FollowerExposure or TraderExposure instance, or a values()
+                row with the same fields
+
+        Returns:
+            Dictionary with currency_pair, open_positions, buy_lots,
+            sell_lots, net_lots, gross_lots and notional
+        """
+        get = row.get if isinstance(row, dict) else lambda name: getattr(row, name)
+        buy = to_units(get('buy_lots'), LOT_SCALE)
+        sell = to_units(get('sell_lots'), LOT_SCALE)
+        return {
+            'currency_pair': get('currency_pair'),
+            'open_positions': get('open_positions'),
+            'buy_lots': from_units(buy, LOT_SCALE),
+            'sell_lots': from_units(sell, LOT_SCALE),
+            'net_lots': from_units(buy - sell, LOT_SCALE),
+            'gross_lots': from_units(buy + sell, LOT_SCALE),
+            'notional': get('notional'),
+        }
+
+    @staticmethod
+    def combine(rows):
+        """Add up as_dict() rows per currency pair, ordered by pair"""
+        totals = {}
+        for row in rows:
+            pair = totals.setdefault(row['currency_pair'], dict.fromkeys(COUNTERS, 0))
+            pair['open_positions'] += row['open_positions']
+            for name, scale in (('buy_lots', LOT_SCALE), ('sell_lots', LOT_SCALE), ('notional', MONEY_SCALE)):
+                pair[name] += to_units(row[name], scale)
+        return [
+            ExposureIndex.as_dict({'currency_pair': currency_pair, **_fields(totals[currency_pair])})
+            for currency_pair in sorted(totals)
+        ]
+
+    @staticmethod
+    def margin(balance, notional):
+        """
+        Margin used by open positions and the resulting margin level
+
+        The margin requirement is notional / ACCOUNT_LEVERAGE; a margin level
+        (balance over that requirement, in percent) below
+        MARGIN_WARNING_LEVEL raises a warning.
+
+        Returns:
+            Dictionary with margin_used, margin_level (None without open
+            positions) and margin_warning
+        """
+        used = notional / getattr(settings, 'ACCOUNT_LEVERAGE', 100)
+        level = balance / used * 100 if used else None
+        return {
+            'margin_used': round(used, 6),
+            'margin_level': level,
+            'margin_warning': level is not None and level < getattr(settings, 'MARGIN_WARNING_LEVEL', 150),
+        }
+
+    @staticmethod
+    def _expected(positions, key):
+        expected = defaultdict(lambda: dict.fromkeys(COUNTERS, 0))
+        for position in positions:
+            owner_id, pair, direction = key(position)
+            for name, value in _contribution(position, direction).items():
+                expected[(owner_id, pair)][name] += value
+        return expected
+
+    @staticmethod
+    def reconcile(fix=True):
+        """
+        Recompute every exposure row from the open positions
+
+        Each trader and follower is reconciled in its own short transaction
+        that locks only that owner's rows, so writers for everyone else
+        carry on while it runs. Copies of inactive followers are not
+        counted; their rows go with the follower's teardown.
+
+        Args:
+            fix: Write the recomputed values over rows that drifted
+
+        Returns:
+            List of (table, owner id, currency pair) keys that had drifted
+        """
+        trades = Trade.objects.filter(status='open').only(
+            'id', 'trader_id', 'currency_pair', 'direction', 'lot_size', 'entry_price', 'status'
+        )
+        copies = CopiedTrade.objects.filter(status='open', follower__is_active=True).select_related(
+            'original_trade'
+        ).only(
+            'id', 'follower_id', 'lot_size', 'entry_price', 'status',
+            'original_trade__currency_pair', 'original_trade__direction'
+        )
+
+        drifted = []
+        for model, owner, positions, key in (
+            (TraderExposure, 'trader_id', trades, _trade_key),
+            (FollowerExposure, 'follower_id', copies, _copy_key),
+        ):
+            owner_ids = set(model.objects.values_list(owner, flat=True).distinct())
+            owner_ids.update(positions.order_by().values_list(owner, flat=True).distinct())
+            for owner_id in sorted(owner_ids):
+                drifted.extend(ExposureIndex._reconcile_owner(model, owner, owner_id, positions, key, fix))
+        return drifted
+
+    @staticmethod
+    @transaction.atomic
+    def _reconcile_owner(model, owner, owner_id, positions, key, fix):
+        """Reconcile one trader's or follower's rows"""
+        positions = positions.filter(**{owner: owner_id})
+        if fix:
+            # Rows must exist before they are locked: creating one while
+            # a writer is mid-way would race with the writer's own insert
+            for _, pair in ExposureIndex._expected(positions, key):
+                model.objects.get_or_create(**{owner: owner_id}, currency_pair=pair)
+        # Writers for this owner wait here until its repaired rows are
+        # committed, then apply their own delta on top
+        rows = list(model.objects.select_for_update().filter(**{owner: owner_id}).order_by('pk'))
+        expected = ExposureIndex._expected(positions, key)
+
+        drifted = []
+        for row in rows:
+            row_key = (owner_id, row.currency_pair)
+            want = expected.pop(row_key, dict.fromkeys(COUNTERS, 0))
+            have = {
+                'open_positions': row.open_positions,
+                'buy_lots': to_units(row.buy_lots, LOT_SCALE),
+                'sell_lots': to_units(row.sell_lots, LOT_SCALE),
+                'notional': to_units(row.notional, MONEY_SCALE),
+            }
+            if have == want:
+                continue
+            drifted.append((model._meta.db_table, *row_key))
+            if fix:
+                model.objects.filter(pk=row.pk).update(updated_at=timezone.now(), **_fields(want))
+
+        if not fix:
+            drifted.extend(
+                (model._meta.db_table, *row_key) for row_key, want in expected.items() if any(want.values())
+            )
+        # With fix, anything left opened after the rows were locked and
+        # its writer created the row itself
+        return drifted
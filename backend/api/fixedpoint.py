@@ -0,0 +1,206 @@
+"""
+Fixed-point representation of prices, lot sizes and money
+
+Prices, lot sizes, P&L and balances are stored as BigInteger counts of
+micro-units (``value * SCALE``). FixedPointField converts at the ORM
+boundary, so model attributes, values() rows, aggregates and the API keep
+returning floats, while the database only ever adds integers and a balance
+never accumulates float error.
+
+The arithmetic helpers work on unit counts: plain ints for one trade and
+int64 NumPy arrays for a whole batch.
+"""
+import math
+
+from django import forms
+from django.core.exceptions import ValidationError
+from django.db import models
+from django.db.models.lookups import GreaterThanOrEqual, LessThan
+from rest_framework import serializers
+
+
+PRICE_SCALE = 10 ** 6
+LOT_SCALE = 10 ** 6
+MONEY_SCALE = 10 ** 6
+PERCENT_SCALE = 10 ** 4
+
+# Dividing price units * lot units by this gives money units
+PRICE_LOT_TO_MONEY = PRICE_SCALE * LOT_SCALE // MONEY_SCALE
+
+COMMISSION_RATE_PERCENT = 10
+
+
+def to_units(value, scale):
+    """Convert a float (or int, str, Decimal) amount to integer units"""
+    return None if value is None else int(round(float(value) * scale))
+
+
+def from_units(units, scale):
+    return None if units is None else units / scale
+
+
+def div_round(numerator, denominator):
+    """Integer division rounding half away from zero"""
+    quotient, remainder = divmod(abs(numerator), denominator)
+    if remainder * 2 >= denominator:
+        quotient += 1
+    return quotient if numerator >= 0 else -quotient
+
+
+def profit_loss_units(entry_units, exit_units, lot_units, direction):
+    """
+    P&L in money units and ROI percentage of one position
+
+    Args:
+        entry_units: Entry price in PRICE_SCALE units
+        exit_units: Exit price in PRICE_SCALE units
+        lot_units: Lot size in LOT_SCALE units
+        direction: 'buy' or 'sell'
+
+    Returns:
+        Tuple of (profit_loss units, roi_percentage)
+    """
+    move = exit_units - entry_units if direction == 'buy' else entry_units - exit_units
+    profit_loss = div_round(move * lot_units, PRICE_LOT_TO_MONEY)
+    if entry_units == 0 or lot_units == 0:
+        return profit_loss, 0.0
+    return profit_loss, move * 100 / entry_units
+
+
+def copy_lot_units(investment_units, percent, entry_units):
+    """
+    Lot size in LOT_SCALE units for copying ``percent`` of an investment
+
+    Args:
+        investment_units: Follower investment in MONEY_SCALE units
+        percent: Copy percentage, 0-100
+        entry_units: Entry price in PRICE_SCALE units
+    """
+    if entry_units == 0:
+        return 0
+    numerator = investment_units * to_units(percent, PERCENT_SCALE) * PRICE_SCALE * LOT_SCALE
+    return div_round(numerator, MONEY_SCALE * PERCENT_SCALE * 100 * entry_units)
+
+
+def commission_units(profit_loss):
+    """Commission charged on a profitable close, in money units"""
+    return div_round(profit_loss * COMMISSION_RATE_PERCENT, 100) if profit_loss > 0 else 0
+
+
+def profit_loss_units_batch(entry_units, exit_units, lot_units, sell):
+    """
+    Vectorized profit_loss_units for many positions
+
+    Args:
+        entry_units, exit_units, lot_units: int64 arrays (or scalars)
+        sell: Boolean array, True for sell positions
+
+    Returns:
+        Tuple of (int64 profit_loss units array, float64 ROI percentage array)
+    """
+    # NumPy adds ~0.2s to every cold start; only batch closes need it
+    import numpy as np
+
+    entry_units = np.asarray(entry_units, dtype=np.int64)
+    move = np.asarray(exit_units, dtype=np.int64) - entry_units
+    move = np.where(sell, -move, move)
+
+    product = move * np.asarray(lot_units, dtype=np.int64)
+    # Round half away from zero, matching div_round
+    magnitude = (np.abs(product) * 2 + PRICE_LOT_TO_MONEY) // (2 * PRICE_LOT_TO_MONEY)
+    profit_loss = np.sign(product) * magnitude
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        roi = np.where(entry_units != 0, move * 100 / entry_units, 0.0)
+    roi = np.where(np.asarray(lot_units) != 0, roi, 0.0)
+    return profit_loss, roi
+
+
+def copy_lot_units_batch(investment_units, percent, entry_units):
+    """
+    Vectorized copy_lot_units for one trade and many followers
+
+    Args:
+        investment_units: Follower investments in MONEY_SCALE units
+        percent: Copy percentages, 0-100
+        entry_units: Entry price of the trade in PRICE_SCALE units
+
+    Returns:
+        Array of lot sizes in LOT_SCALE units, int64 unless the products
+        would overflow it
+    """
+    import numpy as np
+
+    investment_units = np.asarray(investment_units, dtype=np.int64)
+    if entry_units == 0:
+        return np.zeros(len(investment_units), dtype=np.int64)
+
+    # Same rounding as to_units (round half to even)
+    percent_units = np.rint(np.asarray(percent, dtype=np.float64) * PERCENT_SCALE).astype(np.int64)
+    # The scales mostly cancel; dividing out their common factor keeps
+    # realistic products well inside int64
+    common = math.gcd(PRICE_SCALE * LOT_SCALE, MONEY_SCALE * PERCENT_SCALE * 100)
+    numerator_scale = PRICE_SCALE * LOT_SCALE // common
+    denominator = MONEY_SCALE * PERCENT_SCALE * 100 // common * entry_units
+
+    # Fall back to Python integers when a product could leave int64
+    largest = (
+        int(np.abs(investment_units).max(initial=0)) * int(np.abs(percent_units).max(initial=0))
+        * numerator_scale * 2 + denominator
+    )
+    if largest >= 2 ** 63:
+        investment_units = investment_units.astype(object)
+        percent_units = percent_units.astype(object)
+
+    numerator = investment_units * percent_units * numerator_scale
+    # Round half away from zero, matching div_round
+    magnitude = (abs(numerator) * 2 + denominator) // (2 * denominator)
+    return np.where(numerator < 0, -magnitude, magnitude)
+
+
+class FixedPointField(models.BigIntegerField):
+    """
+    BigInteger column holding ``value * scale``, exposed as a float
+
+    Lookups, saves and expression values are converted to units on the way
+    in; loaded values and aggregates (Sum, Max, ...) are converted back.
+    """
+
+    def __init__(self, *args, scale=MONEY_SCALE, **kwargs):
+        self.scale = scale
+        super().__init__(*args, **kwargs)
+
+    def deconstruct(self):
+        name, path, args, kwargs = super().deconstruct()
+        kwargs['scale'] = self.scale
+        return name, path, args, kwargs
+
+    def from_db_value(self, value, expression, connection):
+        return None if value is None else float(value) / self.scale
+
+    def to_python(self, value):
+        if value is None or isinstance(value, float):
+            return value
+        try:
+            return float(value)
+        except (TypeError, ValueError):
+            raise ValidationError(
+                self.error_messages['invalid'], code='invalid', params={'value': value}
+            )
+
+    def get_prep_value(self, value):
+        if value is None or hasattr(value, 'resolve_expression'):
+            return value
+        return to_units(value, self.scale)
+
+    def formfield(self, **kwargs):
+        return models.Field.formfield(self, **{'form_class': forms.FloatField, **kwargs})
+
+
+# IntegerField rounds float bounds of gte/lt up to whole numbers; unit
+# conversion already handles fractions, so use the plain lookups
+FixedPointField.register_lookup(GreaterThanOrEqual)
+FixedPointField.register_lookup(LessThan)
+
+# ModelSerializer would otherwise map the BigIntegerField base to IntegerField
+serializers.ModelSerializer.serializer_field_mapping[FixedPointField] = serializers.FloatField
@@ -0,0 +1,91 @@
+"""
+Follower balance ledger
+
+Writers append FollowerLedgerEntry rows and never touch the Follower row.
+compact() periodically folds pending entries into Follower.current_balance,
+total_profit and commission_paid with F() updates; each follower is
+compacted in its own short transaction that claims its entries with
+SELECT ... FOR UPDATE SKIP LOCKED, so concurrent compactors never fold an
+entry twice and writers are never blocked.
+"""
+from django.db import transaction
+from django.db.models import F, Subquery, Sum
+
+from .models import Follower, FollowerLedgerEntry
+
+
+class FollowerLedger:
+    """Append to and compact the follower balance ledger"""
+
+    @staticmethod
+    def append(follower, copied_trade=None, balance=0.0, profit=0.0, commission=0.0):
+        """
+        Record a change to a follower's balances
+
+        Returns:
+            Created FollowerLedgerEntry instance
+        """
+        return FollowerLedgerEntry.objects.create(
+            follower_id=follower.pk,
+            copied_trade_id=copied_trade.pk if copied_trade is not None else None,
+            balance_delta=balance,
+            profit_delta=profit,
+            commission_delta=commission,
+        )
+
+    @staticmethod
+    @transaction.atomic
+    def compact_follower(follower_id):
+        """
+        Fold one follower's pending entries into its balance columns
+
+        Returns:
+            Number of entries folded
+        """
+        ids = list(
+            FollowerLedgerEntry.objects.select_for_update(skip_locked=True)
+            .filter(follower_id=follower_id, compacted=False)
+            .values_list('id', flat=True)
+        )
+        if not ids:
+            return 0
+
+        # Sum the claimed entries in the database, in integer units
+        claimed = FollowerLedgerEntry.objects.filter(id__in=ids).order_by().values('follower')
+
+        def claimed_sum(field):
+            return Subquery(claimed.annotate(total=Sum(field)).values('total'))
+
+        Follower.objects.filter(pk=follower_id).update(
+            current_balance=F('current_balance') + claimed_sum('balance_delta'),
+            total_profit=F('total_profit') + claimed_sum('profit_delta'),
+            commission_paid=F('commission_paid') + claimed_sum('commission_delta'),
+        )
+        FollowerLedgerEntry.objects.filter(id__in=ids).update(compacted=True)
+        return len(ids)
+
+    @staticmethod
+    def compact(batch_size=500):
+        """
+        Compact every follower with pending entries
+
+        Returns:
+            Tuple of (followers compacted, entries folded)
+        """
+        followers = entries = 0
+        done = set()
+        while True:
+            follower_ids = list(
+                FollowerLedgerEntry.objects.filter(compacted=False)
+                .exclude(follower_id__in=done)
+                .order_by().values_list('follower_id', flat=True).distinct()[:batch_size]
+            )
+            if not follower_ids:
+                return followers, entries
+
+            for follower_id in follower_ids:
+                folded = FollowerLedger.compact_follower(follower_id)
+                if folded:
+                    followers += 1
+                    entries += folded
+                done.add(follower_id)
@@ -0,0 +1,38 @@
+"""
+Move closed trades and copies past the archive horizon into archive tables
+
+Usage: python manage.py archive_closed_trades [--days 365] [--batch-size 1000]
+
+Each batch is moved in its own short transaction; --pause adds a sleep
+between batches to limit load on a busy primary.
+"""
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from api.archive import TradeArchiveService
+
+
+class Command(BaseCommand):
+    help = 'Archive closed Trade and CopiedTrade rows older than the archive horizon'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=None,
+                            help='Override ARCHIVE_AFTER_DAYS')
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--pause', type=float, default=0.0,
+                            help='Seconds to sleep between batches')
+
+    def handle(self, *args, **options):
+        if options['days'] is not None:
+            cutoff = timezone.now() - timedelta(days=options['days'])
+        else:
+            cutoff = TradeArchiveService.archive_horizon()
+
+        copies, trades = TradeArchiveService.archive(
+            cutoff=cutoff, batch_size=options['batch_size'], pause=options['pause']
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'Archived {copies} copied trades and {trades} trades closed before {cutoff:%Y-%m-%d %H:%M}'
+        ))
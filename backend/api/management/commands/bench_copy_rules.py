@@ -0,0 +1,132 @@
+"""
+Benchmark trade fan-out with and without per-follower copy rules
+
+Usage: python manage.py bench_copy_rules [--followers 2000] [--rounds 3] [--max-factor 1.5]
+
+Creates a synthetic trader with ``--followers`` auto-copy followers, then
+alternates fan-outs of a fresh trade with every copy rule cleared and with
+rules set on every follower (pair allow-lists, lot caps, open-copy and pair
+exposure limits). Reports the median time of the candidate query plus rule
+masks and of the whole fan-out for both, and fails when the rules make
+fan-out more than ``--max-factor`` times slower. Lot sizes from the
+vectorized path are checked against the scalar calculation first. The
+synthetic rows are deleted afterwards. It writes to the configured
+database, so point it at a staging database.
+"""
+import random
+import statistics
+import time
+import uuid
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from api.models import Follower, Trade, Trader, TradeEvent
+from api.services import TradeCopyingService
+
+
+class Command(BaseCommand):
+    help = 'Compare fan-out time with copy rules enabled and disabled'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--followers', type=int, default=2000)
+        parser.add_argument('--rounds', type=int, default=3)
+        parser.add_argument('--max-factor', type=float, default=1.5,
+                            help='Fail when fan-out with rules is slower than this multiple')
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        prefix = f'copy-rules-bench-{uuid.uuid4().hex[:8]}-'
+        trader = self._setup(prefix, options['followers'], rng)
+        try:
+            self._check_lots(trader)
+            timings = {False: ([], []), True: ([], [])}
+            for _ in range(options['rounds']):
+                for rules in (False, True):
+                    self._set_rules(trader, rules)
+                    select, fanout = self._fan_out(trader, rng)
+                    timings[rules][0].append(select)
+                    timings[rules][1].append(fanout)
+            self._report(timings, options['max_factor'])
+        finally:
+            TradeEvent.objects.filter(trader_id=trader.pk).delete()
+            User.objects.filter(username__startswith=prefix).delete()
+
+    def _setup(self, prefix, count, rng):
+        trader_user = User.objects.create(username=prefix + 'trader')
+        trader = Trader.objects.create(user=trader_user)
+        users = User.objects.bulk_create([User(username=f'{prefix}{index}') for index in range(count)])
+        if users[0].pk is None:
+            users = list(User.objects.filter(username__startswith=prefix).exclude(pk=trader_user.pk))
+        Follower.objects.bulk_create([
+            Follower(
+                trader=trader, follower_user=user,
+                copy_percentage=round(rng.uniform(1, 100), 2),
+                initial_investment=round(rng.uniform(100, 50000), 2),
+            )
+            for user in users
+        ])
+        return trader
+
+    @staticmethod
+    def _set_rules(trader, enabled):
+        followers = Follower.objects.filter(trader=trader)
+        if not enabled:
+            followers.update(allowed_pairs='', max_lot_size=None, max_open_copies=None, max_pair_exposure=None)
+            return
+        # Generous limits on most followers, binding ones on every seventh
+        followers.update(allowed_pairs='EURUSD,GBPUSD,USDJPY', max_lot_size=500.0,
+                         max_open_copies=1000, max_pair_exposure=100000.0)
+        followers.filter(pk__in=list(followers.values_list('pk', flat=True)[::7])).update(
+            allowed_pairs='GBPUSD', max_lot_size=0.5, max_open_copies=2, max_pair_exposure=1.0
+        )
+
+    @staticmethod
+    def _new_trade(trader, rng):
+        return Trade.objects.create(
+            trader=trader, currency_pair='EURUSD', direction=rng.choice(('buy', 'sell')),
+            entry_price=round(rng.uniform(1.0, 1.2), 5), stop_loss=0.9, take_profit=1.4,
+            lot_size=1.0, status='open',
+        )
+
+    def _check_lots(self, trader):
+        self._set_rules(trader, False)
+        trade = self._new_trade(trader, random.Random(0))
+        followers = list(Follower.objects.filter(trader=trader).copy_candidates(trade))
+        for follower, lot_size in TradeCopyingService.copy_lot_sizes(trade, followers):
+            expected = TradeCopyingService.calculate_copy_lot_size(
+                trade.lot_size, follower.copy_percentage, follower.initial_investment, trade.entry_price
+            )
+            if lot_size != expected:
+                raise CommandError(f'Follower {follower.pk}: vectorized lot {lot_size} != scalar {expected}')
+        trade.delete()
+
+    def _fan_out(self, trader, rng):
+        trade = self._new_trade(trader, rng)
+        start = time.perf_counter()
+        followers = list(
+            Follower.objects.filter(trader=trader, auto_copy_trades=True, is_active=True).copy_candidates(trade)
+        )
+        TradeCopyingService.copy_lot_sizes(trade, followers)
+        select = time.perf_counter() - start
+
+        start = time.perf_counter()
+        TradeCopyingService.auto_copy_trade_for_followers(trade)
+        return select, time.perf_counter() - start
+
+    def _report(self, timings, max_factor):
+        medians = {
+            rules: (statistics.median(select), statistics.median(fanout))
+            for rules, (select, fanout) in timings.items()
+        }
+        for rules, (select, fanout) in medians.items():
+            self.stdout.write(
+                f'{"rules" if rules else "no rules":<9} select+masks {select * 1000:8.1f}ms  '
+                f'fan-out {fanout * 1000:9.1f}ms'
+            )
+        factor = medians[True][1] / medians[False][1]
+        self.stdout.write(f'fan-out with rules: {factor:.2f}x')
+        if factor > max_factor:
+            raise CommandError(f'Copy rules slow fan-out down {factor:.2f}x (limit {max_factor}x)')
+        self.stdout.write(self.style.SUCCESS('Within budget'))
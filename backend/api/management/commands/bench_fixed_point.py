@@ -0,0 +1,79 @@
+"""
+Benchmark fixed-point P&L math against the previous Decimal round-trips
+
+Usage: python manage.py bench_fixed_point [--positions 100000]
+
+Runs entirely in memory: random positions are closed with the old
+float -> Decimal -> float calculation, the integer scalar path and the
+vectorized NumPy path. The results must agree to the micro-unit before
+positions/s are reported.
+"""
+import random
+import time
+from decimal import Decimal
+
+import numpy as np
+from django.core.management.base import BaseCommand, CommandError
+
+from api.fixedpoint import (
+    LOT_SCALE, MONEY_SCALE, PRICE_SCALE, from_units, profit_loss_units, profit_loss_units_batch, to_units
+)
+
+
+def decimal_profit_loss(entry_price, exit_price, lot_size, direction):
+    """The calculation services.py used before fixed-point storage"""
+    if direction == 'buy':
+        profit_loss = (Decimal(exit_price) - Decimal(entry_price)) * Decimal(lot_size)
+    else:
+        profit_loss = (Decimal(entry_price) - Decimal(exit_price)) * Decimal(lot_size)
+    initial_investment = Decimal(entry_price) * Decimal(lot_size)
+    roi_percentage = 0 if initial_investment == 0 else (profit_loss / initial_investment) * Decimal(100)
+    return float(profit_loss), float(roi_percentage)
+
+
+class Command(BaseCommand):
+    help = 'Compare Decimal, integer and vectorized integer P&L throughput'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--positions', type=int, default=100000)
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        count = options['positions']
+        entries = [round(rng.uniform(0.5, 2.0), 5) for _ in range(count)]
+        exits = [round(price * rng.uniform(0.95, 1.05), 5) for price in entries]
+        lots = [round(rng.uniform(0.01, 1000), 6) for _ in range(count)]
+        directions = [rng.choice(('buy', 'sell')) for _ in range(count)]
+
+        start = time.perf_counter()
+        legacy = [decimal_profit_loss(*position) for position in zip(entries, exits, lots, directions)]
+        decimal_time = time.perf_counter() - start
+
+        entry_units = [to_units(price, PRICE_SCALE) for price in entries]
+        exit_units = [to_units(price, PRICE_SCALE) for price in exits]
+        lot_units = [to_units(lot, LOT_SCALE) for lot in lots]
+
+        start = time.perf_counter()
+        scalar = [profit_loss_units(*position) for position in zip(entry_units, exit_units, lot_units, directions)]
+        scalar_time = time.perf_counter() - start
+
+        entry_array = np.array(entry_units, dtype=np.int64)
+        exit_array = np.array(exit_units, dtype=np.int64)
+        lot_array = np.array(lot_units, dtype=np.int64)
+        sell = np.array([direction == 'sell' for direction in directions])
+
+        start = time.perf_counter()
+        batch_profit_loss, batch_roi = profit_loss_units_batch(entry_array, exit_array, lot_array, sell)
+        batch_time = time.perf_counter() - start
+
+        for index, ((old_pl, old_roi), (pl, roi)) in enumerate(zip(legacy, scalar)):
+            if abs(from_units(pl, MONEY_SCALE) - old_pl) > 1e-6 or abs(roi - old_roi) > 1e-9:
+                raise CommandError(f'Position {index}: integer {pl}/{roi} != decimal {old_pl}/{old_roi}')
+            if batch_profit_loss[index] != pl or abs(batch_roi[index] - roi) > 1e-9:
+                raise CommandError(f'Position {index}: vectorized result differs from scalar')
+
+        for name, elapsed in (('decimal', decimal_time), ('integer', scalar_time), ('vectorized', batch_time)):
+            self.stdout.write(
+                f'{name:<11} {count / elapsed:>14,.0f} positions/s  speedup: {decimal_time / elapsed:6.1f}x'
+            )
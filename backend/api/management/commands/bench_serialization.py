@@ -0,0 +1,93 @@
+"""
+Benchmark the values()-based serializers against the ModelSerializers
+
+Usage: python manage.py bench_serialization --rows 1000 --repeat 20
+
+Synthetic rows are created inside a transaction that is rolled back at the
+end, so the command is safe to run against a development database.
+"""
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from rest_framework.renderers import JSONRenderer
+
+from api.models import Trader, Trade, Follower
+from api.renderers import FastJSONRenderer
+from api.serializers import TraderSerializer, TradeSerializer, FollowerSerializer
+from api.serializers_fast import FastTraderSerializer, FastTradeSerializer, FastFollowerSerializer
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = 'Compare ModelSerializer and values()-based serialization throughput'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=1000)
+        parser.add_argument('--repeat', type=int, default=20)
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                self.run(options['rows'], options['repeat'])
+                raise _Rollback
+        except _Rollback:
+            pass
+
+    def run(self, rows, repeat):
+        users = User.objects.bulk_create([
+            User(username=f'bench_{i}', first_name='Bench', last_name=str(i)) for i in range(rows)
+        ])
+        traders = Trader.objects.bulk_create([
+            Trader(user=user, bio='Benchmark trader', broker='Bench', rating=i / 7)
+            for i, user in enumerate(users)
+        ])
+        Trade.objects.bulk_create([
+            Trade(
+                trader=traders[i % len(traders)], currency_pair='EURUSD', direction='buy',
+                entry_price=1.1 + i / 1e5, stop_loss=1.0, take_profit=1.2, lot_size=0.5,
+                status='open', description='Benchmark trade',
+            )
+            for i in range(rows)
+        ])
+        Follower.objects.bulk_create([
+            Follower(trader=traders[0], follower_user=user, initial_investment=1000.0)
+            for user in users[1:]
+        ])
+
+        cases = [
+            ('traders', Trader.objects.order_by('id')[:rows], TraderSerializer, FastTraderSerializer),
+            ('trades', Trade.objects.order_by('id')[:rows], TradeSerializer, FastTradeSerializer),
+            ('followers', Follower.objects.with_ledger().order_by('id')[:rows], FollowerSerializer, FastFollowerSerializer),
+        ]
+
+        for name, queryset, serializer_class, fast_class in cases:
+            def regular():
+                return JSONRenderer().render(serializer_class(list(queryset), many=True).data)
+
+            def fast():
+                return FastJSONRenderer().render(fast_class(list(fast_class.rows(queryset)), many=True).data)
+
+            # The fast path must not change the document clients receive
+            expected = regular()
+            actual = JSONRenderer().render(fast_class(list(fast_class.rows(queryset)), many=True).data)
+            if actual != expected:
+                raise CommandError(f'{name}: values() output differs from {serializer_class.__name__}')
+
+            regular_time = self.time(regular, repeat)
+            fast_time = self.time(fast, repeat)
+            self.stdout.write(
+                f'{name:<10} {rows} rows  model: {rows / regular_time:>9.0f} rows/s  '
+                f'fast: {rows / fast_time:>9.0f} rows/s  speedup: {regular_time / fast_time:.1f}x'
+            )
+
+    @staticmethod
+    def time(func, repeat):
+        start = time.perf_counter()
+        for _ in range(repeat):
+            func()
+        return (time.perf_counter() - start) / repeat
@@ -0,0 +1,78 @@
+"""
+Check that admin changelists stay within their query budgets
+
+Usage: python manage.py check_admin_queries [--username admin] [--budget 8]
+
+Renders the changelist of every registered model, and for LargeTableAdmin
+models also the page after the first "Older" cursor, as a superuser and
+counts the queries. A changelist whose query count grows with the rows on
+the page (an N+1 from __str__ or a missing list_select_related) goes over
+budget; the command exits non-zero so it can gate CI and deploys. Run it
+against a database with enough rows to fill a page.
+"""
+from django.contrib import admin
+from django.contrib.auth.models import User
+from django.contrib.messages.storage.cookie import CookieStorage
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+
+from api.admin import LargeTableAdmin
+
+
+class Command(BaseCommand):
+    help = 'Render admin changelists and fail if any exceeds its query budget'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--username', default=None,
+                            help='Superuser to render as, default the first active one')
+        parser.add_argument('--budget', type=int, default=8,
+                            help='Maximum queries per changelist page')
+
+    def handle(self, *args, **options):
+        users = User.objects.filter(is_superuser=True, is_active=True).order_by('id')
+        if options['username']:
+            users = users.filter(username=options['username'])
+        user = users.first()
+        if user is None:
+            raise CommandError('No active superuser to render the admin as')
+
+        failures = []
+        for model, model_admin in admin.site._registry.items():
+            if model._meta.app_label != 'api':
+                continue
+            label = f'{model._meta.app_label}.{model._meta.model_name}'
+
+            queries, changelist = self.render(model_admin, user, {})
+            failures += self.report(label, queries, options['budget'])
+
+            if isinstance(model_admin, LargeTableAdmin) and changelist.next_cursor_url:
+                queries, _ = self.render(model_admin, user, changelist.next_cursor_url)
+                failures += self.report(f'{label} (cursor)', queries, options['budget'])
+
+        if failures:
+            raise CommandError(f'Over query budget: {", ".join(failures)}')
+        self.stdout.write(self.style.SUCCESS('All changelists within budget'))
+
+    @staticmethod
+    def render(model_admin, user, query):
+        if isinstance(query, str):
+            request = RequestFactory().get('/admin/' + query)
+        else:
+            request = RequestFactory().get('/admin/', query)
+        request.user = user
+        request._messages = CookieStorage(request)
+
+        with CaptureQueriesContext(connection) as captured:
+            response = model_admin.changelist_view(request)
+            response.render()
+        return len(captured.captured_queries), response.context_data['cl']
+
+    def report(self, label, queries, budget):
+        line = f'{label}: {queries} queries (budget {budget})'
+        if queries > budget:
+            self.stdout.write(self.style.ERROR(line))
+            return [label]
+        self.stdout.write(line)
+        return []
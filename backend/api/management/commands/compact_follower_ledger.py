@@ -0,0 +1,28 @@
+"""
+Fold pending follower ledger entries into the Follower balance columns
+
+Usage: python manage.py compact_follower_ledger [--loop --interval 10]
+"""
+import time
+
+from django.core.management.base import BaseCommand
+
+from api.ledger import FollowerLedger
+
+
+class Command(BaseCommand):
+    help = 'Compact the follower balance ledger'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--loop', action='store_true', help='Keep compacting every --interval seconds')
+        parser.add_argument('--interval', type=float, default=10.0)
+
+    def handle(self, *args, **options):
+        while True:
+            followers, entries = FollowerLedger.compact(batch_size=options['batch_size'])
+            if entries or not options['loop']:
+                self.stdout.write(f'Folded {entries} entries into {followers} followers')
+            if not options['loop']:
+                return
+            time.sleep(options['interval'])
@@ -0,0 +1,190 @@
+"""
+Convert float money/price columns to fixed-point integer units
+
+Usage: python manage.py convert_to_fixed_point [--dry-run] [--batch-size 5000] [--pause 0]
+                                               [--backfill-only]
+
+For every FixedPointField whose database column is still a float column,
+without rewriting the table under one long lock:
+
+1. expand: a nullable BIGINT shadow column (``<column>_fixed``) is added
+2. backfill: the shadow column is filled with the scaled, rounded value in
+   primary-key ranges of --batch-size rows, each in its own transaction,
+   with --pause seconds between batches
+3. swap: in one short transaction, with writes to the table blocked, rows
+   changed since their batch are caught up, the float column is dropped and
+   the shadow column takes its name and constraints
+
+Every step can be resumed: an interrupted run leaves the float column in
+place and the next run reuses the shadow column and backfills again, only
+writing rows whose value changed. Columns that already hold integers are
+skipped, so the command is safe to run repeatedly.
+
+Run it while the float-era code is still serving, and cut over with the
+deploy: --backfill-only does steps 1 and 2 ahead of time (repeat it to
+catch up), then a final run swaps just before the fixed-point code starts.
+"""
+import time
+
+from django.apps import apps
+from django.core.management.base import BaseCommand
+from django.db import connection, models, transaction
+
+from api.fixedpoint import FixedPointField
+
+
+SHADOW_SUFFIX = '_fixed'
+
+
+class Command(BaseCommand):
+    help = 'Rewrite float money and price columns as scaled BIGINT columns in batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Only list the columns to convert')
+        parser.add_argument('--batch-size', type=int, default=5000,
+                            help='Primary keys per backfill transaction')
+        parser.add_argument('--pause', type=float, default=0.0,
+                            help='Seconds to sleep between batches')
+        parser.add_argument('--backfill-only', action='store_true',
+                            help='Add and fill the shadow columns but do not swap them in')
+
+    def handle(self, *args, **options):
+        for model in apps.get_app_config('api').get_models():
+            fields = self.float_columns(model)
+            if not fields:
+                continue
+            table = model._meta.db_table
+            names = ', '.join(field.name for field in fields)
+            if options['dry_run']:
+                self.stdout.write(f'{table}: would convert {names}')
+                continue
+
+            shadows = self.expand(model, fields)
+            written = self.backfill(model, shadows, options['batch_size'], options['pause'])
+            self.stdout.write(f'{table}: backfilled {written} rows of {names}')
+            if options['backfill_only']:
+                continue
+
+            caught_up = self.swap(model, shadows, options['batch_size'])
+            self.stdout.write(self.style.SUCCESS(
+                f'{table}: converted {names} ({caught_up} rows caught up during the swap)'
+            ))
+
+    @staticmethod
+    def column_types(table):
+        with connection.cursor() as cursor:
+            if table not in connection.introspection.table_names(cursor):
+                return {}
+            return {
+                column.name: connection.introspection.get_field_type(column.type_code, column)
+                for column in connection.introspection.get_table_description(cursor, table)
+            }
+
+    @classmethod
+    def float_columns(cls, model):
+        description = cls.column_types(model._meta.db_table)
+        return [
+            field for field in model._meta.concrete_fields
+            if isinstance(field, FixedPointField) and description.get(field.column) == 'FloatField'
+        ]
+
+    @staticmethod
+    def detached_field(model, field_class, name, column, **kwargs):
+        """A field of ``model`` for the schema editor that is not on the model class"""
+        field = field_class(**kwargs)
+        field.set_attributes_from_name(name)
+        field.column = column
+        field.model = model
+        return field
+
+    @classmethod
+    def expand(cls, model, fields):
+        """Add the missing shadow columns; returns (field, shadow column) pairs"""
+        existing = cls.column_types(model._meta.db_table)
+        shadows = []
+        for field in fields:
+            column = field.column + SHADOW_SUFFIX
+            if column not in existing:
+                shadow = cls.detached_field(model, models.BigIntegerField, field.name + SHADOW_SUFFIX, column, null=True)
+                # Nullable without a default: no table rewrite
+                with connection.schema_editor() as editor:
+                    editor.add_field(model, shadow)
+            shadows.append((field, column))
+        return shadows
+
+    @staticmethod
+    def sync_sql(model, shadows):
+        """UPDATE filling stale shadow columns in a primary-key range"""
+        quote = connection.ops.quote_name
+        assignments, stale = [], []
+        for field, column in shadows:
+            source, target = quote(field.column), quote(column)
+            value = f'ROUND({source} * {field.scale})'
+            assignments.append(f'{target} = {value}')
+            stale.append(
+                f'({target} IS NULL AND {source} IS NOT NULL) OR ({target} IS NOT NULL AND {source} IS NULL) '
+                f'OR {target} <> {value}'
+            )
+        pk = quote(model._meta.pk.column)
+        return (
+            f'UPDATE {quote(model._meta.db_table)} SET {", ".join(assignments)} '
+            f'WHERE {pk} >= %s AND {pk} < %s AND ({" OR ".join(stale)})'
+        )
+
+    @classmethod
+    def sync_ranges(cls, model, shadows, batch_size, cursor, pause=0.0):
+        """Run sync_sql() over the whole table, one primary-key range at a time"""
+        quote = connection.ops.quote_name
+        pk = quote(model._meta.pk.column)
+        cursor.execute(f'SELECT MIN({pk}), MAX({pk}) FROM {quote(model._meta.db_table)}')
+        low, high = cursor.fetchone()
+        if low is None:
+            return 0
+        sql = cls.sync_sql(model, shadows)
+        written = 0
+        for start in range(low, high + 1, batch_size):
+            with transaction.atomic():
+                cursor.execute(sql, [start, start + batch_size])
+                written += cursor.rowcount
+            if pause:
+                time.sleep(pause)
+        return written
+
+    @classmethod
+    def backfill(cls, model, shadows, batch_size, pause):
+        """Fill the shadow columns, committing after every batch"""
+        with connection.cursor() as cursor:
+            return cls.sync_ranges(model, shadows, batch_size, cursor, pause)
+
+    @classmethod
+    def swap(cls, model, shadows, batch_size):
+        """
+        Catch up and replace the float columns, in one transaction
+
+        The schema editor's transaction (with SQLite's foreign key checks
+        suspended) holds the whole swap. On PostgreSQL the table is locked
+        against writes first, so the catch-up pass is final; reads go on
+        until the column changes.
+        """
+        table = model._meta.db_table
+        with connection.schema_editor() as editor:
+            with connection.cursor() as cursor:
+                if connection.vendor == 'postgresql':
+                    cursor.execute(f'LOCK TABLE {connection.ops.quote_name(table)} IN SHARE ROW EXCLUSIVE MODE')
+                caught_up = cls.sync_ranges(model, shadows, batch_size, cursor)
+
+            renamed = []
+            for field, column in shadows:
+                old = cls.detached_field(
+                    model, models.FloatField, field.name, field.column, null=field.null, blank=field.blank
+                )
+                shadow = cls.detached_field(model, models.BigIntegerField, field.name, column, null=True)
+                new = cls.detached_field(model, models.BigIntegerField, field.name, field.column, null=True)
+                editor.remove_field(model, old)
+                editor.alter_field(model, shadow, new)
+                renamed.append((new, field))
+            # Only once every shadow column is renamed: SQLite remakes the
+            # table from the model here, dropping columns it does not know
+            for new, field in renamed:
+                editor.alter_field(model, new, field)
+        return caught_up
@@ -0,0 +1,31 @@
+"""
+Export closed trade history to monthly NumPy column files
+
+Usage: python manage.py export_closed_history [--dataset trades|copies] [--full]
+
+Runs incrementally from the last watermark; schedule it (e.g. hourly) to
+keep the analytics files current.
+"""
+from django.core.management.base import BaseCommand
+
+from api.columnar import DATASETS, ColumnarExporter, get_root
+
+
+class Command(BaseCommand):
+    help = 'Append closed Trade and CopiedTrade history to columnar files'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dataset', choices=list(DATASETS), action='append',
+                            help='Dataset to export (repeatable, default all)')
+        parser.add_argument('--root', help='Override ANALYTICS_EXPORT_DIR')
+        parser.add_argument('--chunk-size', type=int, default=10000)
+        parser.add_argument('--full', action='store_true',
+                            help='Discard existing files and export everything again')
+
+    def handle(self, *args, **options):
+        for dataset in options['dataset'] or list(DATASETS):
+            exporter = ColumnarExporter(dataset, root=options['root'], chunk_size=options['chunk_size'])
+            count = exporter.export(full=options['full'])
+            self.stdout.write(self.style.SUCCESS(
+                f'{dataset}: appended {count} rows to {get_root(options["root"])}/{dataset}'
+            ))
@@ -0,0 +1,113 @@
+"""
+Import CSV tick data into the per-pair tick store
+
+Usage: python manage.py load_ticks FILE --pair EURUSD [--time-unit iso|s|ms|us|ns]
+                                   [--columns 0,1,2] [--delimiter ,] [--chunk-size 1000000]
+
+Each row holds a timestamp, a bid and an ask; --columns gives their
+positions. Timestamps are ISO 8601 in UTC by default ('2024-01-02 09:30:00.125'
+or with a 'T'), or epoch numbers in the --time-unit given. --time-format
+takes a strptime format for anything else, at a much slower per-row parse.
+A header row is skipped automatically. The file is read --chunk-size rows
+at a time and must be in time order. Ticks at or before the last stored
+tick are skipped, so re-running an import, or importing overlapping
+files in order, does not duplicate history.
+"""
+import time
+from datetime import datetime
+from itertools import islice
+
+import numpy as np
+from django.core.management.base import BaseCommand, CommandError
+
+from api.tickstore import TickStore, get_root
+
+
+EPOCH_UNITS = {'s': 1_000_000, 'ms': 1_000, 'us': 1, 'ns': None}
+
+
+class Command(BaseCommand):
+    help = 'Append CSV tick data (timestamp, bid, ask) to a pair\'s tick store'
+
+    def add_arguments(self, parser):
+        parser.add_argument('file')
+        parser.add_argument('--pair', required=True)
+        parser.add_argument('--root', help='Override TICK_STORE_DIR')
+        parser.add_argument('--time-unit', choices=['iso', *EPOCH_UNITS], default='iso')
+        parser.add_argument('--time-format', help='strptime format for non-ISO timestamps')
+        parser.add_argument('--columns', default='0,1,2',
+                            help='Positions of the timestamp, bid and ask columns')
+        parser.add_argument('--delimiter', default=',')
+        parser.add_argument('--chunk-size', type=int, default=1_000_000)
+
+    def handle(self, *args, **options):
+        try:
+            store = TickStore(options['pair'].upper(), root=options['root'])
+        except ValueError as exc:
+            raise CommandError(str(exc))
+        try:
+            columns = [int(position) for position in options['columns'].split(',')]
+        except ValueError:
+            columns = []
+        if len(columns) != 3:
+            raise CommandError('--columns takes three comma-separated positions')
+
+        last = store.last()
+        cutoff = None if last is None else last['ts']
+        loaded = skipped = 0
+        started = time.perf_counter()
+
+        with open(options['file'], newline='') as handle:
+            line_number = 0
+            while True:
+                lines = list(islice(handle, options['chunk_size']))
+                if not lines:
+                    break
+                first_line = line_number + 1
+                line_number += len(lines)
+                if first_line == 1 and not lines[0].lstrip()[:1].isdigit():
+                    lines = lines[1:]
+                    first_line += 1
+                lines = [line for line in lines if line.strip()]
+                if not lines:
+                    continue
+
+                try:
+                    ts, bid, ask = self._parse(lines, columns, options)
+                except ValueError as exc:
+                    raise CommandError(f'Lines {first_line}-{line_number}: {exc}')
+
+                if cutoff is not None:
+                    keep = ts > cutoff
+                    skipped += len(ts) - int(keep.sum())
+                    ts, bid, ask = ts[keep], bid[keep], ask[keep]
+                try:
+                    loaded += store.append(ts, bid, ask)
+                except ValueError as exc:
+                    raise CommandError(f'Lines {first_line}-{line_number}: {exc}')
+                self.stdout.write(f'{line_number} lines read, {loaded} ticks appended')
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'{store.pair}: appended {loaded} ticks ({skipped} already stored) in {elapsed:.1f}s; '
+            f'{len(store)} ticks in {get_root(options["root"])}/{store.pair}.ticks'
+        ))
+
+    @staticmethod
+    def _parse(lines, columns, options):
+        """Timestamp, bid and ask arrays of one chunk of CSV lines"""
+        fields = np.loadtxt(lines, delimiter=options['delimiter'], dtype=str, usecols=columns, ndmin=2)
+        times, bid, ask = fields[:, 0], fields[:, 1].astype(np.float64), fields[:, 2].astype(np.float64)
+
+        if options['time_format']:
+            ts = np.array([datetime.strptime(value, options['time_format']) for value in times], dtype='M8[us]')
+        elif options['time_unit'] == 'iso':
+            ts = np.char.strip(times).astype('M8[us]')
+        elif options['time_unit'] == 'ns':
+            ts = (times.astype(np.int64) // 1_000).astype('M8[us]')
+        elif options['time_unit'] == 'us':
+            ts = times.astype(np.int64).astype('M8[us]')
+        else:
+            scale = EPOCH_UNITS[options['time_unit']]
+            ts = np.rint(times.astype(np.float64) * scale).astype(np.int64).astype('M8[us]')
+        return ts, bid, ask
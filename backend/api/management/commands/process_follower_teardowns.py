@@ -0,0 +1,34 @@
+"""
+Run unfinished follower teardowns inline
+
+Usage: python manage.py process_follower_teardowns [--id 42] [--chunk-size 1000]
+
+Unfollow normally queues a Celery task; this picks up teardowns whose task
+was never queued (broker down) or failed, and is handy without a worker.
+"""
+from django.core.management.base import BaseCommand
+
+from api.models import FollowerTeardown
+from api.teardown import FollowerTeardownService
+
+
+class Command(BaseCommand):
+    help = 'Finish pending, running or failed follower teardowns'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--id', type=int, default=None, help='Only this teardown')
+        parser.add_argument('--chunk-size', type=int, default=None)
+
+    def handle(self, *args, **options):
+        teardowns = FollowerTeardown.objects.exclude(status='done').order_by('id')
+        if options['id'] is not None:
+            teardowns = teardowns.filter(id=options['id'])
+
+        for teardown_id in teardowns.values_list('id', flat=True):
+            FollowerTeardownService.run(teardown_id, chunk_size=options['chunk_size'])
+            teardown = FollowerTeardown.objects.get(pk=teardown_id)
+            self.stdout.write(
+                f'Teardown {teardown.pk} (follower {teardown.follower_id}): '
+                f'deleted {teardown.deleted_rows} rows'
+            )
+        self.stdout.write(self.style.SUCCESS('Done'))
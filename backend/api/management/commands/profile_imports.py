@@ -0,0 +1,101 @@
+"""
+Report the slowest imports of a cold application start
+
+Usage: python manage.py profile_imports [--limit 20] [--sort self] [--warmup] [--budget 1500]
+
+Starts a fresh interpreter with ``-X importtime``, loads the WSGI
+application (and runs api.warmup with --warmup) and lists the imports that
+took longest. With --budget the command fails when the cold start took
+longer than that many milliseconds, so deploy pipelines can catch startup
+regressions.
+"""
+import os
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+
+STARTUP_SCRIPT = """
+import sys, time
+start = time.perf_counter()
+from django.core.wsgi import get_wsgi_application
+application = get_wsgi_application()
+if {warmup}:
+    from api.warmup import warm_up
+    warm_up()
+sys.stderr.write('startup-ms: %f\\n' % ((time.perf_counter() - start) * 1000))
+"""
+
+
+def parse_importtime(output):
+    """
+    Parse ``-X importtime`` lines
+
+    Returns:
+        List of (module, self microseconds, cumulative microseconds)
+    """
+    imports = []
+    for line in output.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, module = line[len('import time:'):].split('|', 2)
+        imports.append((module.strip(), int(self_us), int(cumulative_us)))
+    return imports
+
+
+def measure_cold_start(warmup=False):
+    """
+    Load the WSGI application in a fresh interpreter
+
+    Returns:
+        Tuple of (start-up milliseconds, parse_importtime() rows)
+
+    Raises:
+        RuntimeError: The application failed to start
+    """
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', STARTUP_SCRIPT.format(warmup=warmup)],
+        cwd=str(settings.BASE_DIR),
+        env={**os.environ, 'DJANGO_SETTINGS_MODULE': os.environ.get('DJANGO_SETTINGS_MODULE', 'win_trade.settings')},
+        capture_output=True,
+        text=True,
+    )
+    startup_lines = [line for line in result.stderr.splitlines() if line.startswith('startup-ms:')]
+    if result.returncode != 0 or not startup_lines:
+        raise RuntimeError(f'Application failed to start:\n{result.stderr[-2000:]}')
+    return float(startup_lines[-1].split(':', 1)[1]), parse_importtime(result.stderr)
+
+
+class Command(BaseCommand):
+    help = 'Profile imports during a cold start of the application'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--limit', type=int, default=20)
+        parser.add_argument('--sort', choices=['self', 'cumulative'], default='cumulative')
+        parser.add_argument('--warmup', action='store_true',
+                            help='Include api.warmup in the measured start')
+        parser.add_argument('--budget', type=float, default=None,
+                            help='Fail if the cold start takes longer than this many milliseconds '
+                                 '(COLD_START_BUDGET_MS is what the test suite enforces)')
+
+    def handle(self, *args, **options):
+        try:
+            startup_ms, imports = measure_cold_start(warmup=options['warmup'])
+        except RuntimeError as exc:
+            raise CommandError(str(exc))
+
+        column = 1 if options['sort'] == 'self' else 2
+        imports.sort(key=lambda row: row[column], reverse=True)
+
+        self.stdout.write(f'{"self ms":>9} {"cumul ms":>9}  module')
+        for module, self_us, cumulative_us in imports[:options['limit']]:
+            self.stdout.write(f'{self_us / 1000:9.1f} {cumulative_us / 1000:9.1f}  {module}')
+        self.stdout.write(f'\n{len(imports)} modules imported, cold start {startup_ms:.0f}ms')
+
+        budget = options['budget']
+        if budget is not None:
+            if startup_ms > budget:
+                raise CommandError(f'Cold start took {startup_ms:.0f}ms, over the {budget:.0f}ms budget')
+            self.stdout.write(self.style.SUCCESS(f'Within the {budget:.0f}ms budget'))
@@ -0,0 +1,33 @@
+"""
+Recompute the per-pair market counters from the trade tables
+
+Usage: python manage.py rebuild_market_stats [--keep-hours 48] [--prune]
+
+The counters are kept up to date as trades change; run this after
+deploying, after bulk data fixes or if cascade deletes left them stale.
+--prune only drops hourly buckets older than --keep-hours.
+"""
+from django.core.management.base import BaseCommand
+
+from api.markets import MarketStats
+
+
+class Command(BaseCommand):
+    help = 'Rebuild MarketStat counters and recent hourly buckets'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--keep-hours', type=int, default=48,
+                            help='Hourly buckets to rebuild or keep')
+        parser.add_argument('--prune', action='store_true',
+                            help='Only delete buckets older than --keep-hours')
+
+    def handle(self, *args, **options):
+        if options['prune']:
+            deleted = MarketStats.prune(keep_hours=options['keep_hours'])
+            self.stdout.write(self.style.SUCCESS(f'Deleted {deleted} hourly buckets'))
+            return
+
+        pairs, buckets = MarketStats.rebuild(keep_hours=options['keep_hours'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Rebuilt market stats for {pairs} pairs and {buckets} hourly buckets'
+        ))
@@ -0,0 +1,38 @@
+"""
+Rebuild the trader search index from the User and Trader tables
+
+Usage: python manage.py rebuild_search_index
+"""
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from api.models import Trader, TraderSearchTerm
+from api.search import terms_for
+
+
+class Command(BaseCommand):
+    help = 'Rebuild TraderSearchTerm rows for every trader'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        rows = Trader.objects.values_list('id', 'user__username', 'user__first_name', 'user__last_name')
+
+        with transaction.atomic():
+            TraderSearchTerm.objects.all().delete()
+
+            batch, indexed = [], 0
+            for trader_id, username, first_name, last_name in rows.iterator(chunk_size=batch_size):
+                batch.extend(
+                    TraderSearchTerm(trader_id=trader_id, term=term, weight=weight)
+                    for term, weight in terms_for(username, first_name, last_name)
+                )
+                indexed += 1
+                if len(batch) >= batch_size:
+                    TraderSearchTerm.objects.bulk_create(batch)
+                    batch = []
+            TraderSearchTerm.objects.bulk_create(batch)
+
+        self.stdout.write(self.style.SUCCESS(f'Indexed {indexed} traders'))
@@ -0,0 +1,28 @@
+"""
+Check the exposure index against the open positions and repair drift
+
+Usage: python manage.py reconcile_exposure [--dry-run]
+
+The FollowerExposure and TraderExposure rows are kept up to date as copies
+and trades change; run this periodically (or the reconcile_exposure Celery
+task), after deploying and after bulk data fixes. Every drifted row is
+listed; --dry-run only lists them.
+"""
+from django.core.management.base import BaseCommand
+
+from api.exposure import ExposureIndex
+
+
+class Command(BaseCommand):
+    help = 'Recompute FollowerExposure and TraderExposure rows and fix any that drifted'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Report drifted rows without fixing them')
+
+    def handle(self, *args, **options):
+        drifted = ExposureIndex.reconcile(fix=not options['dry_run'])
+        for table, owner_id, currency_pair in drifted:
+            self.stdout.write(f'{table}: {owner_id} {currency_pair}')
+        verb = 'Found' if options['dry_run'] else 'Repaired'
+        self.stdout.write(self.style.SUCCESS(f'{verb} {len(drifted)} drifted exposure rows'))
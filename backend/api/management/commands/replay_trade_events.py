@@ -0,0 +1,22 @@
+"""
+Rebuild journal projections from offset zero
+
+Usage: python manage.py replay_trade_events [--projection trader_stats] [--batch-size 500]
+"""
+from django.core.management.base import BaseCommand
+
+from api.projections import PROJECTIONS, get_projections, replay
+
+
+class Command(BaseCommand):
+    help = 'Reset projections and replay the whole trade event journal'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--projection', choices=list(PROJECTIONS), action='append',
+                            help='Projection to rebuild (repeatable, default all)')
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        for projection in get_projections(options['projection']):
+            applied = replay(projection, batch_size=options['batch_size'])
+            self.stdout.write(self.style.SUCCESS(f'{projection.name}: replayed {applied} events'))
@@ -0,0 +1,87 @@
+"""
+Summarize the slow-query log by query fingerprint
+
+Usage: python manage.py slow_query_report [--top 20] [--since 2024-01-01T00:00]
+                                          [--view TraderViewSet.trades] [--plans]
+                                          [--fail-on-seq-scan]
+
+Groups the entries written by api.slowqueries (including rotated files) by
+fingerprint and lists the top offenders by total time, with their count,
+mean and max duration, the views and functions that issued them and the
+hot tables they scanned sequentially. --plans prints the latest EXPLAIN
+plan of each. --fail-on-seq-scan exits non-zero when any logged query
+scanned a hot table, to gate CI after a load test.
+"""
+from collections import Counter
+from datetime import datetime, timezone as dt_timezone
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.slowqueries import read_log
+
+
+class Command(BaseCommand):
+    help = 'Report the slowest queries in the slow-query log by total time'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--file', help='Override SLOW_QUERY_LOG_FILE')
+        parser.add_argument('--top', type=int, default=20)
+        parser.add_argument('--since', help='Only entries at or after this ISO timestamp (UTC)')
+        parser.add_argument('--view', help='Only entries issued by this view')
+        parser.add_argument('--plans', action='store_true', help='Print the latest plan of each query')
+        parser.add_argument('--fail-on-seq-scan', action='store_true',
+                            help='Exit non-zero if a logged query scanned a hot table')
+
+    def handle(self, *args, **options):
+        since = None
+        if options['since']:
+            try:
+                since = datetime.fromisoformat(options['since'])
+            except ValueError:
+                raise CommandError(f'Invalid --since timestamp {options["since"]!r}')
+            if since.tzinfo is None:
+                since = since.replace(tzinfo=dt_timezone.utc)
+
+        groups = {}
+        for entry in read_log(options['file']):
+            if since is not None and datetime.fromisoformat(entry['time']) < since:
+                continue
+            if options['view'] and entry.get('view') != options['view']:
+                continue
+            group = groups.setdefault(entry['fingerprint'], {
+                'sql': entry['sql'], 'count': 0, 'total': 0.0, 'max': 0.0,
+                'origins': Counter(), 'seq_scans': set(), 'plan': None,
+            })
+            group['count'] += 1
+            group['total'] += entry['duration_ms']
+            group['max'] = max(group['max'], entry['duration_ms'])
+            group['origins'][(entry.get('view') or '-', entry.get('function') or '-')] += 1
+            group['seq_scans'].update(entry.get('seq_scans') or ())
+            if entry.get('plan'):
+                group['plan'] = entry['plan']
+
+        if not groups:
+            self.stdout.write('No slow queries logged')
+            return
+
+        ranked = sorted(groups.items(), key=lambda item: item[1]['total'], reverse=True)
+        for digest, group in ranked[:options['top']]:
+            self.stdout.write(self.style.MIGRATE_HEADING(
+                f'{digest}  total {group["total"]:10.1f}ms  count {group["count"]:6}  '
+                f'mean {group["total"] / group["count"]:8.1f}ms  max {group["max"]:8.1f}ms'
+            ))
+            self.stdout.write(f'  {group["sql"][:500]}')
+            for (view, function), count in group['origins'].most_common(3):
+                self.stdout.write(f'  {count:6} x {view}  {function}')
+            if group['seq_scans']:
+                self.stdout.write(self.style.WARNING(f'  seq scan: {", ".join(sorted(group["seq_scans"]))}'))
+            if options['plans'] and group['plan']:
+                self.stdout.write('  ' + group['plan'].replace('\n', '\n  '))
+
+        self.stdout.write(
+            f'{len(groups)} fingerprints, {sum(group["count"] for group in groups.values())} slow queries, '
+            f'{sum(group["total"] for group in groups.values()):.1f}ms in total'
+        )
+        scanned = [digest for digest, group in ranked if group['seq_scans']]
+        if options['fail_on_seq_scan'] and scanned:
+            raise CommandError(f'Sequential scans on hot tables in {len(scanned)} queries: {", ".join(scanned)}')
@@ -0,0 +1,141 @@
+"""
+Concurrency stress test for the follower balance ledger
+
+Usage: python manage.py stress_follower_ledger [--threads 8] [--closes 400]
+
+Creates a synthetic trader, one follower and ``--closes`` open copies,
+closes them from ``--threads`` threads while a compactor runs alongside,
+then checks that the follower's live and compacted balances equal the
+starting balance plus every copy's P&L (no lost updates) and reports
+close throughput. The synthetic rows are deleted afterwards. It writes to
+the configured database, so point it at a staging database.
+"""
+import math
+import threading
+import time
+import uuid
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connection
+
+from api.ledger import FollowerLedger
+from api.models import CopiedTrade, Follower, Trade, Trader, TradeEvent
+from api.services import TradeCopyingService
+
+
+class Command(BaseCommand):
+    help = 'Close many copies of one follower concurrently and check for lost balance updates'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=8)
+        parser.add_argument('--closes', type=int, default=400)
+        parser.add_argument('--compact-interval', type=float, default=0.05,
+                            help='Seconds between compaction passes while closing')
+
+    def handle(self, *args, **options):
+        trader_user, follower, copies = self._setup(options['closes'])
+        try:
+            elapsed, failures = self._run(follower, copies, options['threads'], options['compact_interval'])
+            self._check(follower, copies, elapsed, failures)
+        finally:
+            self._cleanup(trader_user, follower, copies)
+
+    def _setup(self, closes):
+        suffix = uuid.uuid4().hex[:8]
+        trader_user = User.objects.create(username=f'ledger-stress-trader-{suffix}')
+        follower_user = User.objects.create(username=f'ledger-stress-follower-{suffix}')
+        trader = Trader.objects.create(user=trader_user)
+        follower = Follower.objects.create(
+            trader=trader, follower_user=follower_user,
+            initial_investment=10000.0, current_balance=10000.0,
+        )
+        trade = Trade.objects.create(
+            trader=trader, currency_pair='EURUSD', direction='buy', entry_price=1.1,
+            stop_loss=1.0, take_profit=1.3, lot_size=1.0, status='open',
+        )
+        copies = CopiedTrade.objects.bulk_create([
+            CopiedTrade(follower=follower, original_trade=trade, entry_price=1.1,
+                        lot_size=1.0 + (index % 7) * 0.5, status='open')
+            for index in range(closes)
+        ])
+        if copies[0].pk is None:
+            copies = list(CopiedTrade.objects.filter(follower=follower).order_by('id'))
+        return trader_user, follower, copies
+
+    def _run(self, follower, copies, threads, compact_interval):
+        failures = []
+        done = threading.Event()
+
+        def close(chunk):
+            try:
+                for copied_trade in chunk:
+                    # Alternate winners and losers so commission is exercised
+                    exit_price = 1.2 if copied_trade.pk % 2 else 1.05
+                    if TradeCopyingService.close_copied_trade(copied_trade, exit_price) is None:
+                        failures.append(copied_trade.pk)
+            finally:
+                connection.close()
+
+        def compact():
+            try:
+                while not done.is_set():
+                    try:
+                        FollowerLedger.compact_follower(follower.pk)
+                    except OperationalError:
+                        # SQLite allows one writer at a time; retry next pass
+                        pass
+                    time.sleep(compact_interval)
+            finally:
+                connection.close()
+
+        workers = [
+            threading.Thread(target=close, args=(copies[index::threads],)) for index in range(threads)
+        ]
+        compactor = threading.Thread(target=compact)
+
+        start = time.perf_counter()
+        compactor.start()
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        elapsed = time.perf_counter() - start
+        done.set()
+        compactor.join()
+        return elapsed, failures
+
+    def _check(self, follower, copies, elapsed, failures):
+        closed = CopiedTrade.objects.filter(follower=follower, status='closed')
+        profits = list(closed.values_list('profit_loss', flat=True))
+        expected_balance = follower.initial_investment + math.fsum(profits)
+        expected_commission = math.fsum(p * 0.1 for p in profits if p > 0)
+
+        follower = Follower.objects.with_ledger().get(pk=follower.pk)
+        live = follower.live_balances()
+        FollowerLedger.compact_follower(follower.pk)
+        follower.refresh_from_db()
+
+        self.stdout.write(
+            f'{len(profits)} closes from {len(copies)} copies in {elapsed:.2f}s '
+            f'({len(profits) / elapsed:.0f} closes/s), {len(failures)} failed'
+        )
+        self.stdout.write(
+            f'expected balance {expected_balance:.6f}, live {live["current_balance"]:.6f}, '
+            f'compacted {follower.current_balance:.6f}'
+        )
+
+        tolerance = 1e-6 * max(1.0, abs(expected_balance))
+        if (
+            abs(live['current_balance'] - expected_balance) > tolerance
+            or abs(follower.current_balance - expected_balance) > tolerance
+            or abs(follower.commission_paid - expected_commission) > tolerance
+        ):
+            raise CommandError('Lost balance updates detected')
+        self.stdout.write(self.style.SUCCESS('No lost updates'))
+
+    @staticmethod
+    def _cleanup(trader_user, follower, copies):
+        TradeEvent.objects.filter(follower_id=follower.pk).delete()
+        TradeEvent.objects.filter(trader_id=follower.trader_id).delete()
+        User.objects.filter(pk__in=[trader_user.pk, follower.follower_user_id]).delete()
@@ -0,0 +1,36 @@
+"""
+Keep journal projections up to date
+
+Usage: python manage.py tail_trade_events [--projection trader_stats] [--follow]
+
+Without --follow the command applies everything pending and exits, so it
+can also run from cron.
+"""
+import time
+
+from django.core.management.base import BaseCommand
+
+from api.projections import PROJECTIONS, get_projections, run
+
+
+class Command(BaseCommand):
+    help = 'Apply new trade events to projections from their checkpoints'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--projection', choices=list(PROJECTIONS), action='append',
+                            help='Projection to run (repeatable, default all)')
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--follow', action='store_true', help='Keep polling for new events')
+        parser.add_argument('--interval', type=float, default=1.0,
+                            help='Seconds between polls with --follow')
+
+    def handle(self, *args, **options):
+        projections = get_projections(options['projection'])
+        while True:
+            for projection in projections:
+                applied = run(projection, batch_size=options['batch_size'])
+                if applied:
+                    self.stdout.write(f'{projection.name}: applied {applied} events')
+            if not options['follow']:
+                return
+            time.sleep(options['interval'])
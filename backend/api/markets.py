@@ -0,0 +1,238 @@
+"""
+Incrementally maintained market statistics per currency pair
+
+Every write path that opens, closes, edits or deletes trades passes the
+(before, after) states of the rows it changed to MarketStats.record() in
+the same transaction. The difference between the two states is applied to
+the pair's MarketStat row and hourly MarketStatBucket with F() updates, so
+the counters never need a scan of the Trade table and concurrent writers
+never overwrite each other. rebuild() recomputes everything from the trade
+tables for when the counters drift (e.g. cascade deletes of a trader).
+"""
+from collections import defaultdict
+from datetime import timedelta, timezone as dt_timezone
+
+from django.db import transaction
+from django.db.models import Count, F, Q, Sum, Value
+from django.db.models.functions import Coalesce, TruncHour
+from django.utils import timezone
+
+from .fixedpoint import FixedPointField, LOT_SCALE, from_units, to_units
+from .models import ArchivedTrade, MarketStat, MarketStatBucket, Trade
+
+
+COUNTERS = ('open_trades', 'open_buy_lots', 'open_sell_lots', 'closed_trades', 'closed_roi_sum')
+
+WINDOW_HOURS = 24
+
+
+def floor_hour(value):
+    """Truncate a datetime to the start of its UTC hour"""
+    if timezone.is_aware(value):
+        value = value.astimezone(dt_timezone.utc)
+    return value.replace(minute=0, second=0, microsecond=0)
+
+
+def _contribution(trade):
+    """What one trade row adds to its pair's MarketStat counters"""
+    is_open = trade.status == 'open'
+    is_closed = trade.status == 'closed'
+    lots = to_units(trade.lot_size, LOT_SCALE) if is_open else 0
+    return {
+        'open_trades': int(is_open),
+        'open_buy_lots': lots if trade.direction == 'buy' else 0,
+        'open_sell_lots': lots if trade.direction == 'sell' else 0,
+        'closed_trades': int(is_closed),
+        'closed_roi_sum': (trade.roi_percentage or 0.0) if is_closed else 0.0,
+    }
+
+
+class MarketStats:
+    """Maintain and read the per-pair market counters"""
+
+    @staticmethod
+    def record(changes):
+        """
+        Apply trade changes to the counters; call inside the writing transaction
+
+        Args:
+            changes: Iterable of (before, after) Trade states. Use None for
+                ``before`` when a trade is created and for ``after`` when it
+                is deleted; ``before`` must be a copy taken before the
+                instance was modified.
+        """
+        deltas = defaultdict(lambda: dict.fromkeys(COUNTERS, 0))
+        buckets = defaultdict(lambda: {'opened': 0, 'closed': 0})
+
+        for before, after in changes:
+            for trade, sign in ((before, -1), (after, 1)):
+                if trade is None:
+                    continue
+                for name, value in _contribution(trade).items():
+                    deltas[trade.currency_pair][name] += sign * value
+
+            if after is None:
+                continue
+            was = before.status if before is not None else None
+            if after.status == 'open' and was != 'open':
+                buckets[(after.currency_pair, floor_hour(after.opened_at))]['opened'] += 1
+            if after.status == 'closed' and was != 'closed':
+                closed_at = after.closed_at or timezone.now()
+                buckets[(after.currency_pair, floor_hour(closed_at))]['closed'] += 1
+
+        now = timezone.now()
+        for pair, delta in deltas.items():
+            changed = {name: F(name) + value for name, value in delta.items() if value}
+            if changed:
+                MarketStats._update_or_create(
+                    MarketStat.objects.filter(currency_pair=pair),
+                    {'currency_pair': pair},
+                    updated_at=now, **changed
+                )
+
+        for (pair, hour), delta in buckets.items():
+            MarketStats._update_or_create(
+                MarketStatBucket.objects.filter(currency_pair=pair, hour=hour),
+                {'currency_pair': pair, 'hour': hour},
+                **{name: F(name) + value for name, value in delta.items() if value}
+            )
+
+    @staticmethod
+    def _update_or_create(queryset, lookup, **updates):
+        # The row usually exists, so try the single UPDATE first
+        if not queryset.update(**updates):
+            queryset.model.objects.get_or_create(**lookup)
+            queryset.update(**updates)
+
+    @staticmethod
+    def overview(currency_pair=None):
+        """
+        Market statistics per pair in two small queries
+
+        Opened and closed counts cover the current hour and the 23 before it.
+
+        Args:
+            currency_pair: Only return this pair
+
+        Returns:
+            List of per-pair dictionaries ordered by pair
+        """
+        stats = MarketStat.objects.all()
+        buckets = MarketStatBucket.objects.filter(
+            hour__gte=floor_hour(timezone.now()) - timedelta(hours=WINDOW_HOURS - 1)
+        )
+        if currency_pair is not None:
+            stats = stats.filter(currency_pair=currency_pair)
+            buckets = buckets.filter(currency_pair=currency_pair)
+
+        recent = {
+            row['currency_pair']: row
+            for row in buckets.order_by().values('currency_pair').annotate(
+                opened=Sum('opened'), closed=Sum('closed')
+            )
+        }
+
+        markets = []
+        for stat in stats:
+            buy = to_units(stat.open_buy_lots, LOT_SCALE)
+            sell = to_units(stat.open_sell_lots, LOT_SCALE)
+            window = recent.get(stat.currency_pair, {})
+            markets.append({
+                'currency_pair': stat.currency_pair,
+                'open_trades': stat.open_trades,
+                'open_interest': from_units(buy + sell, LOT_SCALE),
+                'buy_lots': stat.open_buy_lots,
+                'sell_lots': stat.open_sell_lots,
+                'buy_sell_ratio': buy / sell if sell else None,
+                'opened_24h': window.get('opened', 0),
+                'closed_24h': window.get('closed', 0),
+                'closed_trades': stat.closed_trades,
+                'avg_roi': stat.closed_roi_sum / stat.closed_trades if stat.closed_trades else 0.0,
+                'updated_at': stat.updated_at,
+            })
+        return markets
+
+    @staticmethod
+    def prune(keep_hours=48):
+        """
+        Delete hourly buckets older than keep_hours
+
+        Returns:
+            Number of buckets deleted
+        """
+        cutoff = floor_hour(timezone.now()) - timedelta(hours=keep_hours)
+        deleted, _ = MarketStatBucket.objects.filter(hour__lt=cutoff).delete()
+        return deleted
+
+    @staticmethod
+    def rebuild(keep_hours=48):
+        """
+        Recompute every counter and recent bucket from the trade tables
+
+        Each pair is rebuilt in its own short transaction that locks only
+        that pair's MarketStat row, so writes to other pairs carry on.
+        Closed counts and ROI include archived trades. Buckets can only
+        count trades that still exist, so opens later deleted drop out.
+
+        Returns:
+            Tuple of (pairs, buckets) written
+        """
+        pairs = {pair for pair, _ in Trade.CURRENCY_PAIRS}
+        pairs.update(MarketStat.objects.values_list('currency_pair', flat=True))
+        written = bucket_count = 0
+        for pair in sorted(pairs):
+            has_stats, buckets = MarketStats._rebuild_pair(pair, keep_hours)
+            written += has_stats
+            bucket_count += buckets
+        return written, bucket_count
+
+    @staticmethod
+    @transaction.atomic
+    def _rebuild_pair(pair, keep_hours):
+        """Rebuild one pair's counters and buckets; returns (row kept, buckets written)"""
+        # The row must exist before it is locked: creating it while a writer
+        # is mid-way would race with the writer's own insert. Writers of
+        # this pair then wait on the lock until the rebuilt rows are
+        # committed and apply their own delta on top.
+        MarketStat.objects.get_or_create(currency_pair=pair)
+        stat = MarketStat.objects.select_for_update().get(currency_pair=pair)
+
+        lots = FixedPointField(scale=LOT_SCALE)
+        totals = Trade.objects.filter(status='open', currency_pair=pair).aggregate(
+            count=Count('id'),
+            buy=Coalesce(Sum('lot_size', filter=Q(direction='buy')), Value(0), output_field=lots),
+            sell=Coalesce(Sum('lot_size', filter=Q(direction='sell')), Value(0), output_field=lots),
+        )
+        stat.open_trades, stat.open_buy_lots, stat.open_sell_lots = totals['count'], totals['buy'], totals['sell']
+        stat.closed_trades, stat.closed_roi_sum = 0, 0.0
+
+        since = floor_hour(timezone.now()) - timedelta(hours=keep_hours)
+        buckets = {}
+        for model in (Trade, ArchivedTrade):
+            trades = model.objects.filter(currency_pair=pair)
+            closed = trades.filter(status='closed').aggregate(count=Count('id'), roi=Sum('roi_percentage'))
+            stat.closed_trades += closed['count']
+            stat.closed_roi_sum += closed['roi'] or 0.0
+
+            for field, counter in (('opened_at', 'opened'), ('closed_at', 'closed')):
+                filters = {f'{field}__gte': since}
+                if counter == 'closed':
+                    filters['status'] = 'closed'
+                else:
+                    filters['status__in'] = ['open', 'closed']
+                rows = trades.filter(**filters).order_by().annotate(
+                    bucket=TruncHour(field, tzinfo=dt_timezone.utc)
+                ).values('bucket').annotate(count=Count('id'))
+                for row in rows:
+                    bucket = buckets.setdefault(row['bucket'], MarketStatBucket(currency_pair=pair, hour=row['bucket']))
+                    setattr(bucket, counter, getattr(bucket, counter) + row['count'])
+
+        MarketStatBucket.objects.filter(currency_pair=pair).delete()
+        MarketStatBucket.objects.bulk_create(buckets.values())
+        if not (stat.open_trades or stat.closed_trades):
+            # Nothing to show for this pair
+            stat.delete()
+            return False, len(buckets)
+        stat.updated_at = timezone.now()
+        stat.save()
+        return True, len(buckets)
@@ -0,0 +1,111 @@
+"""
+Prometheus metrics for the copy engine and API views
+
+When PROMETHEUS_MULTIPROC_DIR is set (see gunicorn.conf.py), every gunicorn
+worker writes its samples to mmap-backed files in that directory and the
+/metrics endpoint aggregates them, so scrapes see totals across all workers.
+"""
+import os
+import time
+
+from django.http import HttpResponse
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Histogram, generate_latest
+)
+from prometheus_client import multiprocess
+
+
+FANOUT_SIZE_BUCKETS = (0, 1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+COPY_FANOUT_SIZE = Histogram(
+    'wintrade_copy_fanout_size',
+    'Number of followers a trade was copied to',
+    buckets=FANOUT_SIZE_BUCKETS,
+)
+
+COPY_FANOUT_DURATION = Histogram(
+    'wintrade_copy_fanout_duration_seconds',
+    'Time spent copying a trade to all auto-copy followers',
+)
+
+COPY_FAILURES = Counter(
+    'wintrade_copy_failures_total',
+    'Copy engine operations that failed',
+    ['operation'],
+)
+
+CLOSE_CASCADE_DURATION = Histogram(
+    'wintrade_close_cascade_duration_seconds',
+    'Time spent closing all copies of a closed trade',
+)
+
+CLOSE_CASCADE_SIZE = Histogram(
+    'wintrade_close_cascade_size',
+    'Number of copied trades closed by a single trade close',
+    buckets=FANOUT_SIZE_BUCKETS,
+)
+
+REQUEST_LATENCY = Histogram(
+    'wintrade_http_request_duration_seconds',
+    'API request latency by view',
+    ['view', 'method', 'status'],
+)
+
+CACHE_HITS = Counter(
+    'wintrade_response_cache_hits_total',
+    'Versioned response cache hits',
+    ['backend', 'view'],
+)
+
+CACHE_MISSES = Counter(
+    'wintrade_response_cache_misses_total',
+    'Versioned response cache misses',
+    ['backend', 'view'],
+)
+
+CACHE_EVICTIONS = Counter(
+    'wintrade_response_cache_evictions_total',
+    'Entries evicted from the versioned response cache to stay within its size bound',
+    ['backend'],
+)
+
+
+def get_registry():
+    """
+    Return the registry to expose on /metrics
+
+    In multiprocess mode a fresh registry collects the samples written by
+    every worker; otherwise the in-process default registry is used.
+    """
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return registry
+    return REGISTRY
+
+
+def metrics_view(request):
+    """Expose all metrics in the Prometheus text format"""
+    return HttpResponse(generate_latest(get_registry()), content_type=CONTENT_TYPE_LATEST)
+
+
+class RequestLatencyMiddleware:
+    """Record a latency histogram sample for every request, labelled by view"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        start = time.perf_counter()
+        response = self.get_response(request)
+        duration = time.perf_counter() - start
+
+        match = getattr(request, 'resolver_match', None)
+        view = match.view_name if match else 'unresolved'
+
+        if view != 'metrics':
+            REQUEST_LATENCY.labels(
+                view=view, method=request.method, status=response.status_code
+            ).observe(duration)
+
+        return response
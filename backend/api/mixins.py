@@ -0,0 +1,270 @@
+"""
+Reusable viewset mixins for Win Trade API
+"""
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist
+from django.http import StreamingHttpResponse
+from django.utils.decorators import method_decorator
+from django.views.decorators.gzip import gzip_page
+from rest_framework import serializers
+from rest_framework.exceptions import ValidationError
+from rest_framework.generics import get_object_or_404
+from rest_framework.permissions import SAFE_METHODS, BasePermission
+from rest_framework.relations import ManyRelatedField
+from rest_framework.response import Response
+
+from .renderers import FastJSONRenderer
+
+
+class ListResponseMixin:
+    """
+    Paginated or streamed list responses for list and custom list actions
+
+    ``list_response()`` sends a queryset through the viewset's paginator.
+    With ``?stream=1`` the whole result is streamed instead as one JSON
+    array, serialized STREAM_CHUNK_SIZE rows at a time from a server-side
+    iterator, so memory per request stays bounded however long the history.
+
+    Views returning these large lists are wrapped in ``gzip_page``. Nothing
+    else is compressed: auth and token responses must not be (BREACH).
+    """
+    stream_param = 'stream'
+
+    def wants_stream(self):
+        return self.request.query_params.get(self.stream_param, '').lower() in ('1', 'true', 'yes')
+
+    def list_response(self, queryset, serializer_class=None):
+        """
+        Args:
+            queryset: Filtered and ordered model queryset or values() rows
+            serializer_class: Serializer (or factory taking many= and
+                context=) for the items; defaults to get_serializer
+        """
+        make_serializer = serializer_class or self.get_serializer
+        context = self.get_serializer_context()
+
+        if self.wants_stream():
+            return self.stream_response(queryset, make_serializer, context)
+
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            serializer = make_serializer(page, many=True, context=context)
+            return self.get_paginated_response(serializer.data)
+
+        serializer = make_serializer(queryset, many=True, context=context)
+        return Response(serializer.data)
+
+    def stream_response(self, queryset, make_serializer, context):
+        chunk_size = getattr(settings, 'STREAM_CHUNK_SIZE', 2000)
+        renderer = FastJSONRenderer()
+        # Choose the database now; the body is produced after the routing
+        # middleware has finished with this request
+        queryset = queryset.using(queryset.db)
+
+        def render(batch, first):
+            body = renderer.render(make_serializer(batch, many=True, context=context).data)[1:-1]
+            return body if first else b',' + body
+
+        def chunks():
+            yield b'['
+            batch, first = [], True
+            for item in queryset.iterator(chunk_size=chunk_size):
+                batch.append(item)
+                if len(batch) == chunk_size:
+                    yield render(batch, first)
+                    batch, first = [], False
+            if batch:
+                yield render(batch, first)
+            yield b']'
+
+        return StreamingHttpResponse(chunks(), content_type='application/json')
+
+
+class FastReadMixin(ListResponseMixin):
+    """
+    Serve list and retrieve from values() rows through ``fast_serializer_class``
+
+    Filtering, ordering and pagination work exactly as for the regular path;
+    only the serializer is swapped. Views whose permissions check individual
+    objects keep using the regular serializer for retrieve.
+    """
+    fast_serializer_class = None
+
+    def use_fast_serializer(self):
+        return (
+            self.fast_serializer_class is not None
+            and getattr(settings, 'FAST_READ_SERIALIZATION', True)
+        )
+
+    def get_fast_serializer(self, *args, **kwargs):
+        kwargs.setdefault('context', self.get_serializer_context())
+        return self.fast_serializer_class(*args, **kwargs)
+
+    def get_fast_rows(self, queryset):
+        return self.fast_serializer_class.rows(queryset)
+
+    @method_decorator(gzip_page)
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        if not self.use_fast_serializer():
+            return self.list_response(queryset)
+        return self.list_response(self.get_fast_rows(queryset), self.get_fast_serializer)
+
+    def retrieve(self, request, *args, **kwargs):
+        if not self.use_fast_serializer() or self._has_object_permissions():
+            return super().retrieve(request, *args, **kwargs)
+
+        queryset = self.filter_queryset(self.get_queryset())
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        row = get_object_or_404(
+            self.get_fast_rows(queryset),
+            **{self.lookup_field: self.kwargs[lookup_url_kwarg]}
+        )
+
+        serializer = self.get_fast_serializer(row)
+        return Response(serializer.data)
+
+    def _has_object_permissions(self):
+        return any(
+            type(permission).has_object_permission is not BasePermission.has_object_permission
+            for permission in self.get_permissions()
+        )
+
+
+def model_lookups(field, model, prefix=''):
+    """
+    Return the model lookups a bound serializer field reads
+
+    Nested serializers expand to their children's lookups under the
+    relation. Returns None when the source cannot be traced to concrete
+    columns (methods, properties, to-many relations, ``source='*'``).
+    """
+    if field.source == '*' or isinstance(field, (serializers.ListSerializer, ManyRelatedField)):
+        return None
+
+    path = []
+    model_field = None
+    for position, attr in enumerate(field.source_attrs):
+        if model_field is not None:
+            if not model_field.is_relation:
+                return None
+            model = model_field.related_model
+        try:
+            model_field = model._meta.get_field(attr)
+        except FieldDoesNotExist:
+            return None
+        if not model_field.concrete or model_field.many_to_many:
+            return None
+        path.append(attr)
+
+    lookup = prefix + '__'.join(path)
+    if not isinstance(field, serializers.BaseSerializer):
+        return [lookup]
+
+    if not model_field.is_relation:
+        return None
+    lookups = []
+    for child in field.fields.values():
+        child_lookups = model_lookups(child, model_field.related_model, lookup + '__')
+        if child_lookups is None:
+            return None
+        lookups.extend(child_lookups)
+    return lookups
+
+
+class SparseFieldsetMixin:
+    """
+    ``?fields=a,b`` and ``?omit=c`` sparse fieldsets
+
+    The response keeps only the selected serializer fields and, on safe
+    requests, the queryset loads only the columns and related rows those
+    fields read (``only()`` plus ``select_related()``), in the fast values()
+    path too. ``sparse_fields`` is the allow-list of selectable names
+    (default: every serializer field). Fields whose source cannot be traced
+    to columns need an entry in ``sparse_field_lookups``; otherwise the
+    request still gets the pruned output but an unrestricted query.
+    """
+    sparse_fields = None
+    sparse_field_lookups = {}
+    sparse_actions = ('list', 'retrieve')
+
+    def get_sparse_fields(self):
+        """Selected field names, or None when the request did not ask for a subset"""
+        if not hasattr(self, '_sparse_fields'):
+            self._sparse_fields = self._parse_sparse_fields()
+        return self._sparse_fields
+
+    def _parse_sparse_fields(self):
+        if self.action not in self.sparse_actions or self.request.method not in SAFE_METHODS:
+            return None
+        requested = self.request.query_params.get('fields')
+        omitted = self.request.query_params.get('omit')
+        if requested is None and omitted is None:
+            return None
+
+        available = list(self.get_serializer_class()(context=self.get_serializer_context()).fields)
+        allowed = [name for name in available if self.sparse_fields is None or name in self.sparse_fields]
+
+        errors = {}
+        selected = available
+        if requested is not None:
+            selected = [name for name in requested.split(',') if name]
+            unknown = [name for name in selected if name not in allowed]
+            if unknown:
+                errors['fields'] = ['Unknown or unavailable fields: %s' % ', '.join(unknown)]
+        if omitted is not None:
+            omit = [name for name in omitted.split(',') if name]
+            unknown = [name for name in omit if name not in allowed]
+            if unknown:
+                errors['omit'] = ['Unknown or unavailable fields: %s' % ', '.join(unknown)]
+            selected = [name for name in selected if name not in omit]
+        if errors:
+            raise ValidationError(errors)
+        return [name for name in available if name in selected]
+
+    def get_sparse_lookups(self, fields, model):
+        """Model lookups for the selected fields, or None if any is untraceable"""
+        serializer = self.get_serializer_class()(context=self.get_serializer_context())
+        lookups = []
+        for name in fields:
+            if name in self.sparse_field_lookups:
+                field_lookups = list(self.sparse_field_lookups[name])
+            else:
+                field_lookups = model_lookups(serializer.fields[name], model)
+            if field_lookups is None:
+                return None
+            lookups.extend(field_lookups)
+        return lookups
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        fields = self.get_sparse_fields()
+        if fields is None:
+            return queryset
+
+        lookups = self.get_sparse_lookups(fields, queryset.model)
+        if lookups is None:
+            return queryset
+        # Joins the selected fields do not read are dropped as well
+        related = {lookup.rsplit('__', 1)[0] for lookup in lookups if '__' in lookup}
+        queryset = queryset.select_related(None)
+        if related:
+            queryset = queryset.select_related(*related)
+        return queryset.only(*(lookups or ['pk']))
+
+    def get_serializer(self, *args, **kwargs):
+        serializer = super().get_serializer(*args, **kwargs)
+        fields = self.get_sparse_fields()
+        if fields is not None:
+            target = getattr(serializer, 'child', serializer)
+            for name in list(target.fields):
+                if name not in fields:
+                    target.fields.pop(name)
+        return serializer
+
+    def get_fast_rows(self, queryset):
+        return self.fast_serializer_class.rows(queryset, fields=self.get_sparse_fields())
+
+    def get_fast_serializer(self, *args, **kwargs):
+        kwargs.setdefault('fields', self.get_sparse_fields())
+        return super().get_fast_serializer(*args, **kwargs)
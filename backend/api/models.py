@@ -1,5 +1,10 @@
 from django.db import models
 from django.contrib.auth.models import User
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Case, CharField, ExpressionWrapper, F, OuterRef, Q, Subquery, Sum, Value, When
+from django.db.models.functions import Coalesce, Concat
+
+from .fixedpoint import FixedPointField, LOT_SCALE, MONEY_SCALE, PRICE_SCALE, from_units, to_units
 from django.utils import timezone
 
 class Trader(models.Model):
@@ -59,18 +64,20 @@ class Trade(models.Model):
     trader = models.ForeignKey(Trader, on_delete=models.CASCADE, related_name='trades')
     currency_pair = models.CharField(max_length=10, choices=CURRENCY_PAIRS)
     direction = models.CharField(max_length=10, choices=DIRECTION_CHOICES)
-    entry_price = models.FloatField()
-    exit_price = models.FloatField(null=True, blank=True)
-    stop_loss = models.FloatField()
-    take_profit = models.FloatField()
-    lot_size = models.FloatField()
-    profit_loss = models.FloatField(default=0.0)
+    entry_price = FixedPointField(scale=PRICE_SCALE)
+    exit_price = FixedPointField(null=True, blank=True, scale=PRICE_SCALE)
+    stop_loss = FixedPointField(scale=PRICE_SCALE)
+    take_profit = FixedPointField(scale=PRICE_SCALE)
+    lot_size = FixedPointField(scale=LOT_SCALE)
+    profit_loss = FixedPointField(default=0.0, scale=MONEY_SCALE)
     roi_percentage = models.FloatField(default=0.0)
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
     opened_at = models.DateTimeField(default=timezone.now)
     closed_at = models.DateTimeField(null=True, blank=True)
     description = models.TextField(blank=True)
     risk_reward_ratio = models.FloatField(default=0.0)
+    # Moves on every save, so edits change the trades list's ETag
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return f"{self.currency_pair} - {self.direction} by {self.trader.user.get_full_name()}"
@@ -79,24 +86,115 @@ class Trade(models.Model):
         ordering = ['-opened_at']
 
 
+class FollowerQuerySet(models.QuerySet):
+    def with_ledger(self):
+        """Annotate each follower with the sums of its uncompacted ledger entries"""
+        pending = FollowerLedgerEntry.objects.filter(
+            follower=OuterRef('pk'), compacted=False
+        ).order_by().values('follower')
+
+        def pending_sum(field):
+            return Coalesce(
+                Subquery(pending.annotate(total=Sum(field)).values('total')),
+                Value(0), output_field=FixedPointField(scale=MONEY_SCALE)
+            )
+
+        return self.annotate(
+            pending_balance=pending_sum('balance_delta'),
+            pending_profit=pending_sum('profit_delta'),
+            pending_commission=pending_sum('commission_delta'),
+        )
+
+    def copy_candidates(self, trade):
+        """
+        Followers whose copy rules admit ``trade``
+
+        The allowed-pairs and max-open-copies rules are filtered here in SQL.
+        Each row is annotated with ``pair_exposure``, its open lots in the
+        trade's pair, so TradeCopyingService.copy_lot_sizes can apply the lot
+        size and exposure rules to the whole cohort at once. Both limits read
+        the FollowerExposure index, and only for followers that set them.
+        """
+        exposures = FollowerExposure.objects.filter(follower=OuterRef('pk')).order_by().values('follower')
+        pair_exposure = exposures.filter(currency_pair=trade.currency_pair)
+        lots = FixedPointField(scale=LOT_SCALE)
+
+        return self.annotate(
+            padded_pairs=Concat(Value(','), 'allowed_pairs', Value(','), output_field=CharField()),
+            open_copy_count=Case(
+                When(max_open_copies__isnull=True, then=Value(0)),
+                default=Coalesce(Subquery(exposures.annotate(count=Sum('open_positions')).values('count')), Value(0)),
+            ),
+            pair_exposure=Case(
+                When(max_pair_exposure__isnull=True, then=Value(0, output_field=lots)),
+                default=Coalesce(
+                    Subquery(pair_exposure.annotate(
+                        gross=ExpressionWrapper(F('buy_lots') + F('sell_lots'), output_field=lots)
+                    ).values('gross')),
+                    Value(0), output_field=lots
+                ),
+                output_field=lots,
+            ),
+        ).filter(
+            Q(allowed_pairs='') | Q(padded_pairs__contains=f',{trade.currency_pair},'),
+            Q(max_open_copies__isnull=True) | Q(open_copy_count__lt=F('max_open_copies')),
+        )
+
+
 class Follower(models.Model):
     trader = models.ForeignKey(Trader, on_delete=models.CASCADE, related_name='followers')
     follower_user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='following')
     auto_copy_trades = models.BooleanField(default=True)
     copy_percentage = models.FloatField(default=100.0)
-    initial_investment = models.FloatField(default=0.0)
-    current_balance = models.FloatField(default=0.0)
-    total_profit = models.FloatField(default=0.0)
-    commission_paid = models.FloatField(default=0.0)
+    initial_investment = FixedPointField(default=0.0, scale=MONEY_SCALE)
+    current_balance = FixedPointField(default=0.0, scale=MONEY_SCALE)
+    total_profit = FixedPointField(default=0.0, scale=MONEY_SCALE)
+    commission_paid = FixedPointField(default=0.0, scale=MONEY_SCALE)
+    # Unfollowing deactivates the row; a background teardown then removes
+    # its copy history and finally the row itself
+    is_active = models.BooleanField(default=True)
+    unfollowed_at = models.DateTimeField(null=True, blank=True)
+    # Copy rules, applied during fan-out; blank or null means no limit.
+    # allowed_pairs is a comma-separated list such as "EURUSD,GBPUSD"
+    allowed_pairs = models.CharField(max_length=255, blank=True, default='')
+    max_lot_size = FixedPointField(null=True, blank=True, scale=LOT_SCALE)
+    max_open_copies = models.PositiveIntegerField(null=True, blank=True)
+    max_pair_exposure = FixedPointField(null=True, blank=True, scale=LOT_SCALE)
     followed_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = FollowerQuerySet.as_manager()
+
     def __str__(self):
         return f"{self.follower_user.get_full_name()} following {self.trader.user.get_full_name()}"
 
+    def live_balances(self):
+        """
+        Balance columns plus the ledger entries not yet compacted into them
+
+        Uses the with_ledger() annotations when present, otherwise one
+        aggregate query.
+        """
+        if hasattr(self, 'pending_balance'):
+            pending = (self.pending_balance, self.pending_profit, self.pending_commission)
+        else:
+            totals = self.ledger_entries.filter(compacted=False).aggregate(
+                balance=Sum('balance_delta'), profit=Sum('profit_delta'), commission=Sum('commission_delta')
+            )
+            pending = (totals['balance'] or 0.0, totals['profit'] or 0.0, totals['commission'] or 0.0)
+
+        # Add in integer units so the sums are exact
+        snapshot = (self.current_balance, self.total_profit, self.commission_paid)
+        names = ('current_balance', 'total_profit', 'commission_paid')
+        return {
+            name: from_units(to_units(value, MONEY_SCALE) + to_units(extra, MONEY_SCALE), MONEY_SCALE)
+            for name, value, extra in zip(names, snapshot, pending)
+        }
+
     class Meta:
         unique_together = ('trader', 'follower_user')
         ordering = ['-followed_at']
+        indexes = [models.Index(fields=['trader', 'is_active'])]
 
 
 class CopiedTrade(models.Model):
@@ -108,10 +206,10 @@ class CopiedTrade(models.Model):
     follower = models.ForeignKey(Follower, on_delete=models.CASCADE, related_name='copied_trades')
     original_trade = models.ForeignKey(Trade, on_delete=models.CASCADE, related_name='copies')
     copied_at = models.DateTimeField(auto_now_add=True)
-    entry_price = models.FloatField()
-    exit_price = models.FloatField(null=True, blank=True)
-    lot_size = models.FloatField()
-    profit_loss = models.FloatField(default=0.0)
+    entry_price = FixedPointField(scale=PRICE_SCALE)
+    exit_price = FixedPointField(null=True, blank=True, scale=PRICE_SCALE)
+    lot_size = FixedPointField(scale=LOT_SCALE)
+    profit_loss = FixedPointField(default=0.0, scale=MONEY_SCALE)
     roi_percentage = models.FloatField(default=0.0)
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='open')
     closed_at = models.DateTimeField(null=True, blank=True)
@@ -121,3 +219,295 @@ class CopiedTrade(models.Model):
 
     class Meta:
         ordering = ['-copied_at']
+        indexes = [models.Index(fields=['follower', 'status'])]
+
+
+class TraderSearchTerm(models.Model):
+    """
+    Denormalized search index of trader names
+
+    One lowercased row per name token, so prefix searches are index range
+    scans on ``term`` instead of LIKE scans across the user join.
+    """
+    trader = models.ForeignKey(Trader, on_delete=models.CASCADE, related_name='search_terms')
+    term = models.CharField(max_length=150, db_index=True)
+    weight = models.PositiveSmallIntegerField(default=1)
+
+    def __str__(self):
+        return f"{self.term} -> {self.trader_id}"
+
+
+class ArchivedTrade(models.Model):
+    """Closed Trade moved out of the hot table; keeps the original id"""
+    id = models.BigIntegerField(primary_key=True)
+    trader = models.ForeignKey(Trader, on_delete=models.CASCADE, related_name='archived_trades')
+    currency_pair = models.CharField(max_length=10, choices=Trade.CURRENCY_PAIRS)
+    direction = models.CharField(max_length=10, choices=Trade.DIRECTION_CHOICES)
+    entry_price = FixedPointField(scale=PRICE_SCALE)
+    exit_price = FixedPointField(null=True, blank=True, scale=PRICE_SCALE)
+    stop_loss = FixedPointField(scale=PRICE_SCALE)
+    take_profit = FixedPointField(scale=PRICE_SCALE)
+    lot_size = FixedPointField(scale=LOT_SCALE)
+    profit_loss = FixedPointField(default=0.0, scale=MONEY_SCALE)
+    roi_percentage = models.FloatField(default=0.0)
+    status = models.CharField(max_length=20, choices=Trade.STATUS_CHOICES, default='closed')
+    opened_at = models.DateTimeField()
+    closed_at = models.DateTimeField(null=True, blank=True, db_index=True)
+    description = models.TextField(blank=True)
+    risk_reward_ratio = models.FloatField(default=0.0)
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.currency_pair} - {self.direction} (archived)"
+
+    class Meta:
+        ordering = ['-opened_at']
+
+
+class ArchivedCopiedTrade(models.Model):
+    """Closed CopiedTrade moved out of the hot table; keeps the original id"""
+    id = models.BigIntegerField(primary_key=True)
+    follower = models.ForeignKey(Follower, on_delete=models.CASCADE, related_name='archived_copied_trades')
+    # The original trade may still be live or already archived
+    original_trade_id = models.BigIntegerField(db_index=True)
+    copied_at = models.DateTimeField()
+    entry_price = FixedPointField(scale=PRICE_SCALE)
+    exit_price = FixedPointField(null=True, blank=True, scale=PRICE_SCALE)
+    lot_size = FixedPointField(scale=LOT_SCALE)
+    profit_loss = FixedPointField(default=0.0, scale=MONEY_SCALE)
+    roi_percentage = models.FloatField(default=0.0)
+    status = models.CharField(max_length=20, choices=CopiedTrade.STATUS_CHOICES, default='closed')
+    closed_at = models.DateTimeField(null=True, blank=True, db_index=True)
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"Copy of trade {self.original_trade_id} (archived)"
+
+    class Meta:
+        ordering = ['-copied_at']
+
+
+class TradeEvent(models.Model):
+    """
+    Append-only journal of trading state changes
+
+    Rows are written in the same transaction as the change they describe and
+    never updated; the auto-increment id is the event's offset. Ids are kept
+    as plain integers so events outlive deleted followers and trades.
+    """
+    EVENT_TYPES = [
+        ('trade_opened', 'Trade Opened'),
+        ('trade_closed', 'Trade Closed'),
+        ('trade_deleted', 'Trade Deleted'),
+        ('copy_created', 'Copy Created'),
+        ('copy_closed', 'Copy Closed'),
+        ('follow', 'Follow'),
+        ('unfollow', 'Unfollow'),
+    ]
+
+    id = models.BigAutoField(primary_key=True)
+    event_type = models.CharField(max_length=20, choices=EVENT_TYPES)
+    trader_id = models.BigIntegerField(null=True, blank=True)
+    trade_id = models.BigIntegerField(null=True, blank=True)
+    follower_id = models.BigIntegerField(null=True, blank=True)
+    copied_trade_id = models.BigIntegerField(null=True, blank=True)
+    payload = models.JSONField(default=dict, encoder=DjangoJSONEncoder)
+    created_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return f"#{self.id} {self.event_type}"
+
+    class Meta:
+        ordering = ['id']
+
+
+class ProjectionCheckpoint(models.Model):
+    """Last journal offset applied by each projection"""
+    name = models.CharField(max_length=50, unique=True)
+    offset = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.name} @ {self.offset}"
+
+
+class TraderStatsState(models.Model):
+    """
+    Running totals the trader_stats projection folds journal events into
+
+    The trader's headline stats are computed from these counters, so a
+    replay rebuilds them from the journal alone, archived history included.
+    Trader ids are plain integers like the journal's.
+    """
+    trader_id = models.BigIntegerField(unique=True)
+    trades = models.IntegerField(default=0)
+    closed = models.IntegerField(default=0)
+    wins = models.IntegerField(default=0)
+    profit = FixedPointField(default=0.0, scale=MONEY_SCALE)
+    roi_sum = models.FloatField(default=0.0)
+    followers = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return f"Stats state of trader {self.trader_id}"
+
+
+class FollowerLedgerEntry(models.Model):
+    """
+    Append-only change to a follower's balance columns
+
+    Closing a copy appends an entry instead of rewriting the Follower row,
+    so concurrent closes for one follower never contend for a lock. The
+    compaction job folds entries into the Follower columns and marks them
+    compacted; live balances are the columns plus the uncompacted tail.
+    """
+    id = models.BigAutoField(primary_key=True)
+    follower = models.ForeignKey(Follower, on_delete=models.CASCADE, related_name='ledger_entries')
+    copied_trade_id = models.BigIntegerField(null=True, blank=True)
+    balance_delta = FixedPointField(default=0.0, scale=MONEY_SCALE)
+    profit_delta = FixedPointField(default=0.0, scale=MONEY_SCALE)
+    commission_delta = FixedPointField(default=0.0, scale=MONEY_SCALE)
+    compacted = models.BooleanField(default=False)
+    created_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return f"{self.follower_id}: {self.balance_delta:+}"
+
+    class Meta:
+        ordering = ['id']
+        indexes = [models.Index(fields=['follower', 'compacted'])]
+
+
+class MarketStat(models.Model):
+    """
+    Running totals per currency pair
+
+    Maintained by markets.MarketStats as trades open, close, change or are
+    deleted, so the market overview never has to group the Trade table.
+    """
+    currency_pair = models.CharField(max_length=10, choices=Trade.CURRENCY_PAIRS, unique=True)
+    open_trades = models.IntegerField(default=0)
+    open_buy_lots = FixedPointField(default=0.0, scale=LOT_SCALE)
+    open_sell_lots = FixedPointField(default=0.0, scale=LOT_SCALE)
+    closed_trades = models.IntegerField(default=0)
+    closed_roi_sum = models.FloatField(default=0.0)
+    updated_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return f"{self.currency_pair}: {self.open_trades} open"
+
+    class Meta:
+        ordering = ['currency_pair']
+
+
+class MarketStatBucket(models.Model):
+    """Trades opened and closed per currency pair per UTC hour"""
+    currency_pair = models.CharField(max_length=10, choices=Trade.CURRENCY_PAIRS)
+    hour = models.DateTimeField()
+    opened = models.IntegerField(default=0)
+    closed = models.IntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.currency_pair} {self.hour:%Y-%m-%d %H}:00"
+
+    class Meta:
+        unique_together = ('currency_pair', 'hour')
+        ordering = ['currency_pair', 'hour']
+
+
+class FollowerExposure(models.Model):
+    """
+    Open copy positions of one follower in one currency pair
+
+    Maintained by exposure.ExposureIndex as copies open and close, so risk
+    checks and the portfolio read one row per pair instead of summing the
+    follower's open CopiedTrade rows.
+    """
+    follower = models.ForeignKey(Follower, on_delete=models.CASCADE, related_name='exposures')
+    currency_pair = models.CharField(max_length=10, choices=Trade.CURRENCY_PAIRS)
+    open_positions = models.IntegerField(default=0)
+    buy_lots = FixedPointField(default=0.0, scale=LOT_SCALE)
+    sell_lots = FixedPointField(default=0.0, scale=LOT_SCALE)
+    # Lots times entry price, both directions
+    notional = FixedPointField(default=0.0, scale=MONEY_SCALE)
+    updated_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return f"{self.currency_pair}: {self.open_positions} open for follower {self.follower_id}"
+
+    class Meta:
+        unique_together = ('follower', 'currency_pair')
+        ordering = ['follower', 'currency_pair']
+
+
+class TraderExposure(models.Model):
+    """Open positions of one trader in one currency pair; see FollowerExposure"""
+    trader = models.ForeignKey(Trader, on_delete=models.CASCADE, related_name='exposures')
+    currency_pair = models.CharField(max_length=10, choices=Trade.CURRENCY_PAIRS)
+    open_positions = models.IntegerField(default=0)
+    buy_lots = FixedPointField(default=0.0, scale=LOT_SCALE)
+    sell_lots = FixedPointField(default=0.0, scale=LOT_SCALE)
+    notional = FixedPointField(default=0.0, scale=MONEY_SCALE)
+    updated_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return f"{self.currency_pair}: {self.open_positions} open for trader {self.trader_id}"
+
+    class Meta:
+        unique_together = ('trader', 'currency_pair')
+        ordering = ['trader', 'currency_pair']
+
+
+class FollowerTeardown(models.Model):
+    """
+    Progress of the background removal of an unfollowed Follower
+
+    Ids are plain integers because the follower row is deleted at the end.
+    """
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    ]
+
+    follower_id = models.BigIntegerField(db_index=True)
+    trader_id = models.BigIntegerField()
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='follower_teardowns')
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    total_rows = models.BigIntegerField(default=0)
+    deleted_rows = models.BigIntegerField(default=0)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"Teardown of follower {self.follower_id}: {self.status}"
+
+    @property
+    def progress(self):
+        if self.status == 'done':
+            return 100.0
+        if not self.total_rows:
+            return 0.0
+        return min(self.deleted_rows * 100 / self.total_rows, 100.0)
+
+    class Meta:
+        ordering = ['-created_at']
+
+
+class RatingPrior(models.Model):
+    """
+    Population means trader ratings are shrunk toward
+
+    Written by the nightly rerate and read by every worker's single-trader
+    rating, so both rate on the same basis across processes and restarts.
+    """
+    name = models.CharField(max_length=50, unique=True, default='trader_rating')
+    win_rate = models.FloatField()
+    roi = models.FloatField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.name}: win rate {self.win_rate:.3f}, ROI {self.roi:.3f}"
@@ -0,0 +1,159 @@
+"""
+Projections of the trade event journal
+
+A projection folds journal events into derived data. Each one keeps its
+own ProjectionCheckpoint and applies a batch of events and the checkpoint
+advance in one transaction, so tailing is resumable and never applies an
+event twice. replay() resets a projection and rebuilds it from offset zero.
+"""
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .events import EventJournal
+from .fixedpoint import MONEY_SCALE, to_units
+from .models import ProjectionCheckpoint, Trader, TraderStatsState
+
+
+class Projection:
+    """Base class; subclasses set ``name`` and implement apply()"""
+    name = None
+
+    def reset(self):
+        """Discard derived state before a replay"""
+
+    def apply(self, events):
+        raise NotImplementedError
+
+
+PROJECTIONS = {}
+
+
+def register(projection_class):
+    PROJECTIONS[projection_class.name] = projection_class
+    return projection_class
+
+
+STATS_COUNTERS = ('trades', 'closed', 'wins', 'profit', 'roi_sum', 'followers')
+
+
+def _closed_delta(payload, sign):
+    profit_loss = payload.get('profit_loss') or 0.0
+    return {
+        'closed': sign,
+        'wins': sign if profit_loss > 0 else 0,
+        'profit': sign * to_units(profit_loss, MONEY_SCALE),
+        'roi_sum': sign * (payload.get('roi_percentage') or 0.0),
+    }
+
+
+def stats_delta(event):
+    """What one journal event adds to its trader's TraderStatsState counters"""
+    payload = event.payload
+    if event.event_type == 'trade_opened':
+        return {'trades': 1}
+    if event.event_type == 'trade_closed':
+        return _closed_delta(payload, 1)
+    if event.event_type == 'trade_deleted':
+        delta = _closed_delta(payload, -1) if payload.get('status') == 'closed' else {}
+        return {'trades': -1, **delta}
+    if event.event_type == 'follow':
+        return {'followers': 1}
+    if event.event_type == 'unfollow':
+        return {'followers': -1}
+    return {}
+
+
+@register
+class TraderStatsProjection(Projection):
+    """
+    Trader totals, win rate, average ROI and follower counts
+
+    Events are folded into per-trader TraderStatsState counters and the
+    Trader columns are computed from those, so neither applying nor
+    replaying reads the trade or follower tables. Ratings are time-decayed
+    rather than a fold of events; TraderRating.rerate() keeps them.
+    """
+    name = 'trader_stats'
+
+    def reset(self):
+        TraderStatsState.objects.all().delete()
+        Trader.objects.update(
+            total_followers=0, total_trades=0, win_rate=0.0, total_profit=0.0, avg_roi=0.0, monthly_return=0.0,
+        )
+
+    def apply(self, events):
+        deltas = defaultdict(lambda: dict.fromkeys(STATS_COUNTERS, 0))
+        for event in events:
+            if event.trader_id is None:
+                continue
+            for name, value in stats_delta(event).items():
+                deltas[event.trader_id][name] += value
+
+        now = timezone.now()
+        for trader_id, delta in deltas.items():
+            # profit is in MONEY_SCALE units, which F() arithmetic keeps as is
+            changed = {name: F(name) + value for name, value in delta.items() if value}
+            if not changed:
+                continue
+            rows = TraderStatsState.objects.filter(trader_id=trader_id)
+            if not rows.update(updated_at=now, **changed):
+                TraderStatsState.objects.get_or_create(trader_id=trader_id)
+                rows.update(updated_at=now, **changed)
+
+        states = {state.trader_id: state for state in TraderStatsState.objects.filter(trader_id__in=deltas)}
+        for trader in Trader.objects.filter(id__in=states):
+            state = states[trader.pk]
+            trader.total_followers = state.followers
+            trader.total_trades = state.trades
+            trader.total_profit = state.profit
+            trader.win_rate = state.wins / state.closed * 100 if state.closed else 0.0
+            trader.avg_roi = state.roi_sum / state.closed if state.closed else 0.0
+            trader.monthly_return = state.profit
+            # Signals bump the trader's cached responses
+            trader.save(update_fields=[
+                'total_followers', 'total_trades', 'total_profit', 'win_rate', 'avg_roi',
+                'monthly_return', 'updated_at',
+            ])
+
+
+def get_projections(names=None):
+    names = names or list(PROJECTIONS)
+    return [PROJECTIONS[name]() for name in names]
+
+
+def run(projection, batch_size=500, max_batches=None):
+    """
+    Apply every settled event after the projection's checkpoint
+
+    Returns:
+        Number of events applied
+    """
+    applied = batches = 0
+    while max_batches is None or batches < max_batches:
+        with transaction.atomic():
+            checkpoint, _ = ProjectionCheckpoint.objects.select_for_update().get_or_create(
+                name=projection.name
+            )
+            events = EventJournal.read(after=checkpoint.offset, limit=batch_size)
+            if not events:
+                break
+            projection.apply(events)
+            checkpoint.offset = events[-1].id
+            checkpoint.save(update_fields=['offset', 'updated_at'])
+
+        applied += len(events)
+        batches += 1
+        if len(events) < batch_size:
+            break
+    return applied
+
+
+def replay(projection, batch_size=500):
+    """Reset a projection and rebuild it from offset zero"""
+    with transaction.atomic():
+        projection.reset()
+        ProjectionCheckpoint.objects.update_or_create(name=projection.name, defaults={'offset': 0})
+    return run(projection, batch_size=batch_size)
@@ -0,0 +1,241 @@
+"""
+Trader ratings adjusted for sample size and recency
+
+The original rating mixed a trader's raw win rate and average ROI, so two
+lucky trades outranked a long record. Here every closed trade is weighted
+by its age, halving every RATING_HALF_LIFE_DAYS, and the weighted win rate
+and average ROI are shrunk toward the population mean as if the trader
+also had RATING_PRIOR_TRADES average trades:
+
+    shrunk = (weighted_total + prior_trades * population_mean)
+             / (weighted_count + prior_trades)
+
+A trader with few or only old trades rates close to average and moves away
+from it as evidence accumulates. rerate() scores every trader in one
+vectorized pass over per-trader, per-age-bucket aggregates of the hot and
+archive tables and writes the changed ratings back with chunked
+bulk_update(). The population means it used are stored in RatingPrior so
+that update_trader_stats() rates a single trader the same way in between,
+in every worker.
+"""
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, Count, IntegerField, Q, Sum, Value, When
+from django.utils import timezone
+
+from . import search
+from .cache import bump_trader_version
+from .models import ArchivedTrade, RatingPrior, Trade, Trader
+
+
+# Upper bounds of the age buckets in days; older trades share a last bucket
+AGE_BUCKETS_DAYS = (7, 30, 90, 180, 365, 730)
+
+PRIOR_NAME = 'trader_rating'
+
+# Used until the first rerate() has measured the population
+DEFAULT_PRIOR = {'win_rate': 0.5, 'roi': 0.0}
+
+
+def bucket_weights(half_life_days):
+    """Recency weight of each age bucket, taken at the bucket's midpoint"""
+    import numpy as np
+
+    bounds = (0,) + AGE_BUCKETS_DAYS
+    midpoints = [(low + high) / 2 for low, high in zip(bounds, bounds[1:])]
+    midpoints.append(AGE_BUCKETS_DAYS[-1] * 1.5)
+    return 0.5 ** (np.array(midpoints) / half_life_days)
+
+
+def age_bucket(now):
+    """Expression numbering a closed trade's age bucket, newest first"""
+    whens = [
+        When(closed_at__gte=now - timedelta(days=days), then=Value(index))
+        for index, days in enumerate(AGE_BUCKETS_DAYS)
+    ]
+    return Case(*whens, default=Value(len(AGE_BUCKETS_DAYS)), output_field=IntegerField())
+
+
+def bucket_rows(now, traders=None):
+    """
+    Closed trade counts, wins and ROI sums per trader and age bucket
+
+    Args:
+        now: Reference time for trade ages
+        traders: Optional trader id filter
+
+    Returns:
+        Iterator of (trader_id, bucket, trades, wins, roi_sum) tuples over
+        the hot and archive tables
+    """
+    for model in (Trade, ArchivedTrade):
+        rows = model.objects.filter(status='closed')
+        if traders is not None:
+            rows = rows.filter(trader_id__in=traders)
+        yield from rows.order_by().annotate(bucket=age_bucket(now)).values('trader_id', 'bucket').annotate(
+            trades=Count('id'),
+            wins=Count('id', filter=Q(profit_loss__gt=0)),
+            roi_sum=Sum('roi_percentage'),
+        ).values_list('trader_id', 'bucket', 'trades', 'wins', 'roi_sum').iterator(chunk_size=5000)
+
+
+def bucket_array(rows):
+    """bucket_rows() output as an (n, 5) float64 array"""
+    import numpy as np
+
+    return np.array(
+        [(trader_id, bucket, trades, wins, roi_sum or 0.0) for trader_id, bucket, trades, wins, roi_sum in rows],
+        dtype=np.float64,
+    ).reshape(-1, 5)
+
+
+def stored_prior():
+    """Population means saved by the last rerate(), DEFAULT_PRIOR before the first"""
+    row = RatingPrior.objects.filter(name=PRIOR_NAME).values('win_rate', 'roi').first()
+    return row or DEFAULT_PRIOR
+
+
+def score(index, bucket, trades, wins, roi_sum, count, weights, prior_trades, prior=None):
+    """
+    Shrunk, recency-weighted ratings for ``count`` traders
+
+    Args:
+        index: Trader position (0..count-1) of each aggregate row
+        bucket, trades, wins, roi_sum: Columns of the aggregate rows
+        count: Number of traders
+        weights: bucket_weights() array
+        prior_trades: Shrinkage strength in (weighted) trades
+        prior: Population means to shrink toward; measured from the rows
+            when None
+
+    Returns:
+        Tuple of (float64 ratings array, prior dictionary used)
+    """
+    import numpy as np
+
+    weight = weights[np.asarray(bucket, dtype=np.intp)]
+    index = np.asarray(index, dtype=np.intp)
+    weighted_trades = np.bincount(index, weights=weight * trades, minlength=count)
+    weighted_wins = np.bincount(index, weights=weight * wins, minlength=count)
+    weighted_roi = np.bincount(index, weights=weight * roi_sum, minlength=count)
+
+    if prior is None:
+        total = weighted_trades.sum()
+        prior = {
+            'win_rate': float(weighted_wins.sum() / total) if total else DEFAULT_PRIOR['win_rate'],
+            'roi': float(weighted_roi.sum() / total) if total else DEFAULT_PRIOR['roi'],
+        }
+
+    denominator = weighted_trades + prior_trades
+    with np.errstate(divide='ignore', invalid='ignore'):
+        win_rate = np.where(denominator > 0, (weighted_wins + prior_trades * prior['win_rate']) / denominator,
+                            prior['win_rate']) * 100
+        avg_roi = np.where(denominator > 0, (weighted_roi + prior_trades * prior['roi']) / denominator,
+                           prior['roi'])
+
+    # Same blend of win rate and ROI as before, on the adjusted inputs
+    return (win_rate * 0.4 + avg_roi * 0.6) / 100, prior
+
+
+class TraderRating:
+    """Batch and single-trader rating"""
+
+    @staticmethod
+    def options(half_life_days=None, prior_trades=None):
+        return (
+            half_life_days or getattr(settings, 'RATING_HALF_LIFE_DAYS', 90),
+            prior_trades if prior_trades is not None else getattr(settings, 'RATING_PRIOR_TRADES', 20),
+        )
+
+    @staticmethod
+    def rating_for(trader_id):
+        """
+        Rating of one trader, shrunk toward the last measured population means
+
+        Args:
+            trader_id: Trader primary key
+
+        Returns:
+            Float rating
+        """
+        half_life_days, prior_trades = TraderRating.options()
+        rows = bucket_array(bucket_rows(timezone.now(), traders=[trader_id]))
+        ratings, _ = score(
+            [0] * len(rows), rows[:, 1], rows[:, 2], rows[:, 3], rows[:, 4],
+            1, bucket_weights(half_life_days), prior_trades,
+            prior=stored_prior(),
+        )
+        return float(ratings[0])
+
+    @staticmethod
+    def rerate(batch_size=2000, half_life_days=None, prior_trades=None, now=None):
+        """
+        Recompute every trader's rating and write back the changed ones
+
+        Args:
+            batch_size: Traders per bulk_update statement
+            half_life_days: Default RATING_HALF_LIFE_DAYS
+            prior_trades: Default RATING_PRIOR_TRADES
+            now: Reference time for trade ages
+
+        Returns:
+            Dictionary with traders, updated, prior and per-phase seconds
+        """
+        import numpy as np
+
+        half_life_days, prior_trades = TraderRating.options(half_life_days, prior_trades)
+        now = now or timezone.now()
+        timings = {}
+
+        start = time.perf_counter()
+        current = np.array(list(Trader.objects.order_by('id').values_list('id', 'rating')), dtype=np.float64)
+        current = current.reshape(-1, 2)
+        trader_ids = current[:, 0].astype(np.int64)
+        rows = bucket_array(bucket_rows(now))
+        timings['load'] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        # Rows of traders deleted since the id list was read are dropped
+        position = np.searchsorted(trader_ids, rows[:, 0].astype(np.int64))
+        known = position < len(trader_ids)
+        known[known] = trader_ids[position[known]] == rows[known, 0]
+        rows, position = rows[known], position[known]
+        ratings, prior = score(
+            position, rows[:, 1], rows[:, 2], rows[:, 3], rows[:, 4],
+            len(trader_ids), bucket_weights(half_life_days), prior_trades,
+        )
+        changed = np.flatnonzero(np.abs(ratings - current[:, 1]) > 1e-9)
+        timings['score'] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        updated_at = timezone.now()
+        changed_ids = trader_ids[changed].tolist()
+        changed_ratings = ratings[changed].tolist()
+        for offset in range(0, len(changed_ids), batch_size):
+            batch = [
+                Trader(pk=trader_id, rating=rating, updated_at=updated_at)
+                for trader_id, rating in zip(
+                    changed_ids[offset:offset + batch_size], changed_ratings[offset:offset + batch_size]
+                )
+            ]
+            with transaction.atomic():
+                Trader.objects.bulk_update(batch, ['rating', 'updated_at'])
+        timings['write'] = time.perf_counter() - start
+
+        # bulk_update skips the post_save handlers that keep caches current
+        start = time.perf_counter()
+        for trader_id, rating in zip(changed_ids, changed_ratings):
+            bump_trader_version(trader_id)
+            search.update_trader_rating(trader_id, rating)
+        RatingPrior.objects.update_or_create(name=PRIOR_NAME, defaults=prior)
+        timings['invalidate'] = time.perf_counter() - start
+
+        return {
+            'traders': len(trader_ids),
+            'updated': len(changed_ids),
+            'prior': prior,
+            'timings': timings,
+        }
@@ -0,0 +1,85 @@
+"""
+Response renderers for Win Trade API
+"""
+import msgpack
+import orjson
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+
+_fallback_encoder = JSONEncoder()
+_SCALARS = frozenset({str, int, bool, type(None)})
+
+
+def _orjson_matches_stdlib(data):
+    """
+    Whether orjson renders ``data`` byte for byte as the stdlib encoder does
+
+    orjson writes NaN and infinities as null, and floats the stdlib puts in
+    exponent notation (below 1e-4 or from 1e16) as e.g. ``1e-5`` rather than
+    ``1e-05``. Values orjson hands to ``default`` are checked as the encoder
+    converts them. Non-string keys are left to orjson, which rejects them.
+    """
+    stack = [(data,)]
+    while stack:
+        for item in stack.pop():
+            if type(item) in _SCALARS:
+                continue
+            if isinstance(item, float):
+                # False for NaN as well as for infinities and tiny/huge values
+                if not (item == 0 or 1e-4 <= abs(item) < 1e16):
+                    return False
+            elif isinstance(item, dict):
+                stack.append(item.values())
+            elif isinstance(item, (list, tuple)):
+                stack.append(item)
+            elif not isinstance(item, (str, int)):
+                try:
+                    stack.append((_fallback_encoder.default(item),))
+                except TypeError:
+                    return False
+    return True
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    JSON renderer backed by orjson
+
+    Produces the same bytes as DRF's JSONRenderer; values orjson does not
+    handle natively (lazy strings, Decimals, ...) go through DRF's encoder.
+    Data orjson would format differently (NaN, infinities, floats written
+    with an exponent), data it cannot encode and pretty-printed responses
+    requested via the ``indent`` media type parameter use the stdlib encoder,
+    so NaN and infinities are rejected under STRICT_JSON exactly as in DRF.
+    """
+    options = orjson.OPT_PASSTHROUGH_DATETIME
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+
+        renderer_context = renderer_context or {}
+        if self.get_indent(accepted_media_type, renderer_context) or not _orjson_matches_stdlib(data):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        try:
+            ret = orjson.dumps(data, default=_fallback_encoder.default, option=self.options)
+        except orjson.JSONEncodeError:
+            # Non-string keys, integers beyond 64 bits
+            return super().render(data, accepted_media_type, renderer_context)
+
+        # Match JSONRenderer, which escapes these for JavaScript compatibility
+        return ret.replace('\u2028'.encode(), b'\\u2028').replace('\u2029'.encode(), b'\\u2029')
+
+
+class MessagePackRenderer(BaseRenderer):
+    """Render responses as MessagePack for clients sending Accept: application/msgpack"""
+    media_type = 'application/msgpack'
+    format = 'msgpack'
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return msgpack.packb(data, default=_fallback_encoder.default, use_bin_type=True)
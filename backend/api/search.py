@@ -0,0 +1,265 @@
+"""
+Trader name search
+
+Names are indexed as lowercased tokens (username, first and last name) in
+TraderSearchTerm. Every query token must prefix-match one of a trader's
+tokens; results are ranked by match quality (exact beats prefix, username
+beats names) plus the trader's rating.
+
+Two backends share that model:
+
+* ``database`` queries TraderSearchTerm with ``term LIKE 'token%'``, an
+  index range scan (on PostgreSQL Django adds a varchar_pattern_ops index
+  for the indexed column);
+* ``memory`` keeps a sorted in-process copy of the tokens and answers
+  prefix lookups with binary search, for keystroke-rate autocomplete.
+"""
+import bisect
+import threading
+import time
+
+from django.conf import settings
+from django.db.models import Case, F, FloatField, IntegerField, OuterRef, Subquery, Value, When
+from django.db.models.functions import Cast, Coalesce
+from rest_framework.filters import BaseFilterBackend
+
+from .models import Trader, TraderSearchTerm
+
+
+USERNAME_WEIGHT = 3
+NAME_WEIGHT = 2
+
+
+def tokenize(query):
+    return [token for token in query.lower().split() if token]
+
+
+def terms_for(username, first_name, last_name):
+    """Return the (term, weight) pairs indexed for a trader"""
+    terms = {}
+    for term in tokenize(username or ''):
+        terms[term] = max(terms.get(term, 0), USERNAME_WEIGHT)
+    for term in tokenize('%s %s' % (first_name or '', last_name or '')):
+        terms[term] = max(terms.get(term, 0), NAME_WEIGHT)
+    return list(terms.items())
+
+
+class DatabaseSearchBackend:
+    """Prefix search over the TraderSearchTerm table"""
+
+    def index(self, trader_id, terms, rating=0.0):
+        TraderSearchTerm.objects.filter(trader_id=trader_id).delete()
+        TraderSearchTerm.objects.bulk_create([
+            TraderSearchTerm(trader_id=trader_id, term=term, weight=weight) for term, weight in terms
+        ])
+
+    def update_rating(self, trader_id, rating):
+        # Ratings are read from the Trader row at query time
+        pass
+
+    def remove(self, trader_id):
+        TraderSearchTerm.objects.filter(trader_id=trader_id).delete()
+
+    def filter_queryset(self, queryset, query):
+        tokens = tokenize(query)
+        if not tokens:
+            return queryset
+
+        quality = Value(0, output_field=IntegerField())
+        for token in tokens:
+            matches = TraderSearchTerm.objects.filter(term__startswith=token)
+            queryset = queryset.filter(pk__in=matches.values('trader_id'))
+
+            best = matches.filter(trader_id=OuterRef('pk')).annotate(
+                quality=Case(
+                    When(term=token, then=F('weight') * 2), default=F('weight'), output_field=IntegerField()
+                )
+            ).order_by('-quality').values('quality')[:1]
+            quality = quality + Coalesce(Subquery(best, output_field=IntegerField()), 0)
+
+        return queryset.annotate(
+            search_rank=Cast(quality + F('rating'), FloatField())
+        ).order_by('-search_rank', '-rating')
+
+    def search(self, query, limit=10):
+        queryset = self.filter_queryset(Trader.objects.all(), query)
+        return list(queryset.values_list('id', 'search_rank')[:limit])
+
+
+class MemorySearchBackend:
+    """
+    Sorted in-process token index
+
+    The index is loaded lazily and reloaded every ``refresh_interval``
+    seconds so writes made by other workers show up; writes in this worker
+    are applied immediately through the signal handlers.
+    """
+
+    def __init__(self, refresh_interval=300):
+        self.refresh_interval = refresh_interval
+        self._terms = []
+        self._by_trader = {}
+        self._ratings = {}
+        self._loaded_at = None
+        self._lock = threading.RLock()
+
+    def _ensure_loaded(self):
+        if self._loaded_at is not None and time.monotonic() - self._loaded_at < self.refresh_interval:
+            return
+        with self._lock:
+            if self._loaded_at is not None and time.monotonic() - self._loaded_at < self.refresh_interval:
+                return
+            self.rebuild()
+
+    def rebuild(self):
+        terms, by_trader, ratings = [], {}, {}
+        rows = Trader.objects.values_list(
+            'id', 'rating', 'user__username', 'user__first_name', 'user__last_name'
+        )
+        for trader_id, rating, username, first_name, last_name in rows.iterator():
+            entries = [(term, trader_id, weight) for term, weight in terms_for(username, first_name, last_name)]
+            by_trader[trader_id] = entries
+            ratings[trader_id] = rating
+            terms.extend(entries)
+        terms.sort()
+        with self._lock:
+            self._terms, self._by_trader, self._ratings = terms, by_trader, ratings
+            self._loaded_at = time.monotonic()
+
+    def index(self, trader_id, terms, rating=0.0):
+        if self._loaded_at is None:
+            return
+        with self._lock:
+            self._remove(trader_id)
+            entries = [(term, trader_id, weight) for term, weight in terms]
+            for entry in entries:
+                bisect.insort(self._terms, entry)
+            self._by_trader[trader_id] = entries
+            self._ratings[trader_id] = rating
+
+    def update_rating(self, trader_id, rating):
+        if self._loaded_at is None:
+            return
+        with self._lock:
+            if trader_id in self._ratings:
+                self._ratings[trader_id] = rating
+
+    def remove(self, trader_id):
+        with self._lock:
+            self._remove(trader_id)
+
+    def _remove(self, trader_id):
+        for entry in self._by_trader.pop(trader_id, []):
+            position = bisect.bisect_left(self._terms, entry)
+            if position < len(self._terms) and self._terms[position] == entry:
+                del self._terms[position]
+        self._ratings.pop(trader_id, None)
+
+    def _prefix_matches(self, token):
+        position = bisect.bisect_left(self._terms, (token,))
+        while position < len(self._terms) and self._terms[position][0].startswith(token):
+            yield self._terms[position]
+            position += 1
+
+    def search(self, query, limit=10):
+        tokens = tokenize(query)
+        if not tokens:
+            return []
+        self._ensure_loaded()
+
+        with self._lock:
+            scores = None
+            for token in tokens:
+                best = {}
+                for term, trader_id, weight in self._prefix_matches(token):
+                    quality = weight * 2 if term == token else weight
+                    if quality > best.get(trader_id, 0):
+                        best[trader_id] = quality
+                if scores is None:
+                    scores = best
+                else:
+                    scores = {trader_id: scores[trader_id] + q for trader_id, q in best.items() if trader_id in scores}
+                if not scores:
+                    return []
+
+            ranked = sorted(
+                ((trader_id, quality + self._ratings.get(trader_id, 0.0)) for trader_id, quality in scores.items()),
+                key=lambda item: (-item[1], -self._ratings.get(item[0], 0.0)),
+            )
+        return ranked[:limit] if limit else ranked
+
+    def filter_queryset(self, queryset, query):
+        if not tokenize(query):
+            return queryset
+        ranked = self.search(query, limit=getattr(settings, 'TRADER_SEARCH_MAX_RESULTS', 500))
+        if not ranked:
+            return queryset.none()
+        return queryset.filter(pk__in=[trader_id for trader_id, _ in ranked]).annotate(
+            search_rank=Case(
+                *[When(pk=trader_id, then=Value(rank)) for trader_id, rank in ranked],
+                output_field=FloatField(),
+            )
+        ).order_by('-search_rank', '-rating')
+
+
+BACKENDS = {
+    'database': DatabaseSearchBackend,
+    'memory': MemorySearchBackend,
+}
+
+_backends = {}
+_backends_lock = threading.Lock()
+
+
+def get_backend(name=None):
+    """Return the shared backend instance, defaulting to settings.TRADER_SEARCH_BACKEND"""
+    name = name or getattr(settings, 'TRADER_SEARCH_BACKEND', 'database')
+    if name not in _backends:
+        with _backends_lock:
+            if name not in _backends:
+                _backends[name] = BACKENDS[name]()
+    return _backends[name]
+
+
+def get_autocomplete_backend():
+    return get_backend(getattr(settings, 'TRADER_AUTOCOMPLETE_BACKEND', 'memory'))
+
+
+def index_trader(trader):
+    """(Re)index a trader's names in every backend that is in use"""
+    user = trader.user
+    terms = terms_for(user.username, user.first_name, user.last_name)
+    get_backend('database').index(trader.pk, terms, trader.rating)
+    if 'memory' in _backends:
+        _backends['memory'].index(trader.pk, terms, trader.rating)
+
+
+def remove_trader(trader_id):
+    for backend in list(_backends.values()):
+        backend.remove(trader_id)
+
+
+def update_trader_rating(trader_id, rating):
+    for backend in list(_backends.values()):
+        backend.update_rating(trader_id, rating)
+
+
+class TraderSearchFilter(BaseFilterBackend):
+    """
+    ``?search=`` backed by the trader search index
+
+    Results are ordered by search rank unless the client asked for an
+    explicit ``?ordering=``, so this backend must come after OrderingFilter.
+    """
+    search_param = 'search'
+
+    def filter_queryset(self, request, queryset, view):
+        query = request.query_params.get(self.search_param, '')
+        if not tokenize(query):
+            return queryset
+
+        ordering = queryset.query.order_by
+        queryset = get_backend().filter_queryset(queryset, query)
+        if request.query_params.get('ordering'):
+            queryset = queryset.order_by(*ordering)
+        return queryset
@@ -1,6 +1,6 @@
 from rest_framework import serializers
 from django.contrib.auth.models import User
-from .models import Trader, Trade, Follower, CopiedTrade
+from .models import Trader, Trade, Follower, CopiedTrade, FollowerTeardown
 
 
 class UserSerializer(serializers.ModelSerializer):
@@ -48,9 +48,46 @@ class FollowerSerializer(serializers.ModelSerializer):
             'id', 'trader', 'trader_name', 'follower_user', 'follower_name',
             'auto_copy_trades', 'copy_percentage', 'initial_investment',
             'current_balance', 'total_profit', 'commission_paid',
+            'allowed_pairs', 'max_lot_size', 'max_open_copies', 'max_pair_exposure',
             'followed_at', 'updated_at'
         ]
-        read_only_fields = ['id', 'followed_at', 'updated_at']
+        # Balances only change through the ledger (api.ledger); a client
+        # writing back a balance it read would overwrite compacted entries
+        read_only_fields = [
+            'id', 'current_balance', 'total_profit', 'commission_paid', 'followed_at', 'updated_at'
+        ]
+
+    def validate_allowed_pairs(self, value):
+        """Normalize to the comma-separated form copy_candidates() matches on"""
+        pairs = [pair.strip().upper() for pair in value.split(',') if pair.strip()]
+        known = {pair for pair, _ in Trade.CURRENCY_PAIRS}
+        unknown = [pair for pair in pairs if pair not in known]
+        if unknown:
+            raise serializers.ValidationError(f"Unknown currency pairs: {', '.join(unknown)}")
+        return ','.join(dict.fromkeys(pairs))
+
+    def validate(self, attrs):
+        # PositiveIntegerField only validates its minimum on some databases
+        for name in ('max_lot_size', 'max_pair_exposure', 'max_open_copies'):
+            if attrs.get(name) is not None and attrs[name] < 0:
+                raise serializers.ValidationError({name: 'Must not be negative'})
+        return attrs
+
+    def update(self, instance, validated_data):
+        """Write only the validated columns so concurrent F() updates survive"""
+        for name, value in validated_data.items():
+            setattr(instance, name, value)
+        instance.save(update_fields=[*validated_data, 'updated_at'])
+        return instance
+
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        # Balance columns lag the ledger until the next compaction
+        if data.keys() & {'current_balance', 'total_profit', 'commission_paid'}:
+            data.update({
+                name: value for name, value in instance.live_balances().items() if name in data
+            })
+        return data
 
 
 class CopiedTradeSerializer(serializers.ModelSerializer):
@@ -64,3 +101,15 @@ class CopiedTradeSerializer(serializers.ModelSerializer):
             'profit_loss', 'roi_percentage', 'status', 'closed_at'
         ]
         read_only_fields = ['id', 'copied_at']
+
+
+class FollowerTeardownSerializer(serializers.ModelSerializer):
+    progress = serializers.FloatField(read_only=True)
+
+    class Meta:
+        model = FollowerTeardown
+        fields = [
+            'id', 'follower_id', 'trader_id', 'status', 'total_rows', 'deleted_rows',
+            'progress', 'error', 'created_at', 'updated_at', 'finished_at'
+        ]
+        read_only_fields = fields
@@ -0,0 +1,239 @@
+"""
+Read-optimized serializers for list and retrieve endpoints
+
+These build response dicts straight from ``queryset.values()`` rows using a
+field mapping compiled once per serializer, instead of going through DRF's
+per-field machinery. Their output matches the ModelSerializer they stand in
+for exactly, so they can be swapped in for reads without clients noticing.
+"""
+from django.utils import timezone
+
+from .fixedpoint import MONEY_SCALE, from_units, to_units
+from .models import Trader, Trade, Follower
+
+
+def _as_float(value):
+    return None if value is None else float(value)
+
+
+def _plus_pending(value, pending):
+    """Same sum as Follower.live_balances(), in integer units"""
+    return from_units(to_units(value, MONEY_SCALE) + to_units(pending or 0.0, MONEY_SCALE), MONEY_SCALE)
+
+
+def _as_str(value):
+    return None if value is None else str(value)
+
+
+def _as_datetime(value):
+    """Same output as DRF's DateTimeField with the default ISO 8601 format"""
+    if not value:
+        return None
+    value = timezone.localtime(value) if timezone.is_aware(value) else timezone.make_aware(value)
+    value = value.isoformat()
+    if value.endswith('+00:00'):
+        value = value[:-6] + 'Z'
+    return value
+
+
+def _full_name(first_name, last_name):
+    """Same output as User.get_full_name()"""
+    return ('%s %s' % (first_name, last_name)).strip()
+
+
+class Field:
+    """
+    A single output field
+
+    Args:
+        lookups: values() lookups the field is built from
+        convert: Callable receiving the looked-up values positionally
+    """
+
+    def __init__(self, *lookups, convert=None):
+        self.lookups = lookups
+        self.convert = convert
+
+
+class Nested:
+    """A nested object built from its own ordered list of fields"""
+
+    def __init__(self, fields):
+        self.fields = fields
+
+
+def _compile(fields):
+    """Turn an ordered field mapping into a list of (name, getter) pairs"""
+    compiled = []
+    for name, spec in fields:
+        if isinstance(spec, Nested):
+            nested = _compile(spec.fields)
+            getter = (lambda n: lambda row: {k: get(row) for k, get in n})(nested)
+        elif len(spec.lookups) == 1 and spec.convert is None:
+            getter = (lambda lookup: lambda row: row[lookup])(spec.lookups[0])
+        elif len(spec.lookups) == 1:
+            getter = (lambda lookup, convert: lambda row: convert(row[lookup]))(
+                spec.lookups[0], spec.convert
+            )
+        else:
+            getter = (lambda lookups, convert: lambda row: convert(*[row[l] for l in lookups]))(
+                spec.lookups, spec.convert
+            )
+        compiled.append((name, getter))
+    return compiled
+
+
+def _lookups(fields):
+    lookups = []
+    for _, spec in fields:
+        for lookup in (_lookups(spec.fields) if isinstance(spec, Nested) else spec.lookups):
+            if lookup not in lookups:
+                lookups.append(lookup)
+    return lookups
+
+
+class ValuesSerializer:
+    """
+    Base class for serializers that work on values() rows
+
+    Subclasses declare ``fields`` as an ordered list of (name, Field/Nested)
+    pairs mirroring the ModelSerializer they replace.
+    """
+    model = None
+    fields = []
+
+    def __init__(self, instance=None, many=False, context=None, fields=None):
+        self.instance = instance
+        self.many = many
+        self.context = context or {}
+        self._compiled = _compile(self.select(self.get_fields(), fields))
+
+    def get_fields(self):
+        return self.fields
+
+    @staticmethod
+    def select(fields, names=None):
+        """Keep only the named fields (all of them when names is None)"""
+        if names is None:
+            return fields
+        return [(name, spec) for name, spec in fields if name in names]
+
+    @classmethod
+    def values_lookups(cls, names=None):
+        """Lookups to pass to queryset.values()"""
+        return _lookups(cls.select(cls.fields, names))
+
+    @classmethod
+    def rows(cls, queryset, fields=None):
+        """Return the values() queryset this serializer reads from"""
+        return queryset.values(*cls.values_lookups(fields))
+
+    def to_representation(self, row):
+        return {name: get(row) for name, get in self._compiled}
+
+    @property
+    def data(self):
+        if self.many:
+            return [self.to_representation(row) for row in self.instance]
+        return self.to_representation(self.instance)
+
+
+class FastTraderSerializer(ValuesSerializer):
+    """values()-based equivalent of TraderSerializer"""
+    model = Trader
+    fields = [
+        ('id', Field('id')),
+        ('user', Nested([
+            ('id', Field('user__id')),
+            ('username', Field('user__username')),
+            ('email', Field('user__email')),
+            ('first_name', Field('user__first_name')),
+            ('last_name', Field('user__last_name')),
+        ])),
+        ('bio', Field('bio', convert=_as_str)),
+        ('experience_level', Field('experience_level')),
+        ('total_followers', Field('total_followers')),
+        ('total_trades', Field('total_trades')),
+        ('win_rate', Field('win_rate', convert=_as_float)),
+        ('total_profit', Field('total_profit', convert=_as_float)),
+        ('avg_roi', Field('avg_roi', convert=_as_float)),
+        ('monthly_return', Field('monthly_return', convert=_as_float)),
+        ('rating', Field('rating', convert=_as_float)),
+        ('profile_image', Field('profile_image')),
+        ('broker', Field('broker', convert=_as_str)),
+        ('account_size', Field('account_size', convert=_as_float)),
+        ('is_verified', Field('is_verified')),
+        ('created_at', Field('created_at', convert=_as_datetime)),
+        ('updated_at', Field('updated_at', convert=_as_datetime)),
+    ]
+
+    def get_fields(self):
+        # Image URLs depend on the request, so bind it per serializer instance
+        request = self.context.get('request')
+        storage = Trader._meta.get_field('profile_image').storage
+
+        def image_url(name):
+            if not name:
+                return None
+            url = storage.url(name)
+            return request.build_absolute_uri(url) if request is not None else url
+
+        return [
+            (name, Field('profile_image', convert=image_url) if name == 'profile_image' else spec)
+            for name, spec in self.fields
+        ]
+
+
+class FastTradeSerializer(ValuesSerializer):
+    """values()-based equivalent of TradeSerializer"""
+    model = Trade
+    fields = [
+        ('id', Field('id')),
+        ('trader', Field('trader_id')),
+        ('trader_name', Field('trader__user__first_name', 'trader__user__last_name', convert=_full_name)),
+        ('currency_pair', Field('currency_pair')),
+        ('direction', Field('direction')),
+        ('entry_price', Field('entry_price', convert=_as_float)),
+        ('exit_price', Field('exit_price', convert=_as_float)),
+        ('stop_loss', Field('stop_loss', convert=_as_float)),
+        ('take_profit', Field('take_profit', convert=_as_float)),
+        ('lot_size', Field('lot_size', convert=_as_float)),
+        ('profit_loss', Field('profit_loss', convert=_as_float)),
+        ('roi_percentage', Field('roi_percentage', convert=_as_float)),
+        ('status', Field('status')),
+        ('opened_at', Field('opened_at', convert=_as_datetime)),
+        ('closed_at', Field('closed_at', convert=_as_datetime)),
+        ('description', Field('description', convert=_as_str)),
+        ('risk_reward_ratio', Field('risk_reward_ratio', convert=_as_float)),
+    ]
+
+
+class FastFollowerSerializer(ValuesSerializer):
+    """values()-based equivalent of FollowerSerializer"""
+    model = Follower
+    fields = [
+        ('id', Field('id')),
+        ('trader', Field('trader_id')),
+        ('trader_name', Field('trader__user__first_name', 'trader__user__last_name', convert=_full_name)),
+        ('follower_user', Field('follower_user_id')),
+        ('follower_name', Field('follower_user__first_name', 'follower_user__last_name', convert=_full_name)),
+        ('auto_copy_trades', Field('auto_copy_trades')),
+        ('copy_percentage', Field('copy_percentage', convert=_as_float)),
+        ('initial_investment', Field('initial_investment', convert=_as_float)),
+        ('current_balance', Field('current_balance', 'pending_balance', convert=_plus_pending)),
+        ('total_profit', Field('total_profit', 'pending_profit', convert=_plus_pending)),
+        ('commission_paid', Field('commission_paid', 'pending_commission', convert=_plus_pending)),
+        ('allowed_pairs', Field('allowed_pairs')),
+        ('max_lot_size', Field('max_lot_size', convert=_as_float)),
+        ('max_open_copies', Field('max_open_copies')),
+        ('max_pair_exposure', Field('max_pair_exposure', convert=_as_float)),
+        ('followed_at', Field('followed_at', convert=_as_datetime)),
+        ('updated_at', Field('updated_at', convert=_as_datetime)),
+    ]
+
+    @classmethod
+    def rows(cls, queryset, fields=None):
+        # Balances are the compacted columns plus the pending ledger tail
+        if 'pending_balance' not in queryset.query.annotations:
+            queryset = queryset.with_ledger()
+        return super().rows(queryset, fields)
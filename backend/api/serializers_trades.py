@@ -1,9 +1,13 @@
 """
 Serializers for trade copying and execution
 """
+from django.db import transaction
 from rest_framework import serializers
 from .models import Trade, CopiedTrade, Follower
 from .services import TradeCopyingService
+from .events import EventJournal
+from .markets import MarketStats
+from .exposure import ExposureIndex
 
 
 class TradeExecutionSerializer(serializers.ModelSerializer):
@@ -149,7 +153,11 @@ class CreateTradeSerializer(serializers.ModelSerializer):
         auto_copy = validated_data.pop('auto_copy', True)
         
         # Create the trade
-        trade = Trade.objects.create(**validated_data)
+        with transaction.atomic():
+            trade = Trade.objects.create(**validated_data)
+            EventJournal.trade_opened(trade)
+            MarketStats.record([(None, trade)])
+            ExposureIndex.record_trades([(None, trade)])
         
         # Auto-copy to followers if enabled
         if auto_copy:
@@ -1,10 +1,35 @@
 """
 Trade copying and execution services for Win Trade platform
 """
+import copy
+import logging
+import time
+from datetime import timedelta
+
+from django.conf import settings
 from django.utils import timezone
 from django.db import transaction
-from decimal import Decimal
-from .models import Trade, Follower, CopiedTrade
+from django.db.models import Count, IntegerField, Max, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+from .models import (
+    Trade, Follower, CopiedTrade, FollowerExposure, FollowerLedgerEntry, TradeEvent, TraderExposure
+)
+from .cache import bump_trader_version
+from .archive import history_totals
+from .events import EventJournal
+from .exposure import ExposureIndex
+from .ledger import FollowerLedger
+from .rating import TraderRating
+from .fixedpoint import (
+    FixedPointField, LOT_SCALE, MONEY_SCALE, PRICE_SCALE, commission_units, copy_lot_units,
+    copy_lot_units_batch, from_units, profit_loss_units, profit_loss_units_batch, to_units
+)
+from .metrics import (
+    COPY_FANOUT_SIZE, COPY_FANOUT_DURATION, COPY_FAILURES,
+    CLOSE_CASCADE_DURATION, CLOSE_CASCADE_SIZE
+)
+
+logger = logging.getLogger(__name__)
 
 
 class TradeCopyingService:
@@ -27,13 +52,14 @@ class TradeCopyingService:
         if original_lot_size == 0 or original_entry_price == 0:
             return 0
         
-        # Calculate proportional investment
-        proportional_investment = (follower_investment * Decimal(copy_percentage)) / Decimal(100)
+        # Proportional investment / entry price, in integer units
+        copy_lot_size = copy_lot_units(
+            to_units(follower_investment, MONEY_SCALE),
+            copy_percentage,
+            to_units(original_entry_price, PRICE_SCALE)
+        )
         
-        # Calculate lot size: investment / entry_price
-        copy_lot_size = proportional_investment / Decimal(original_entry_price)
-        
-        return float(copy_lot_size)
+        return from_units(copy_lot_size, LOT_SCALE)
     
     @staticmethod
     def calculate_profit_loss(entry_price, exit_price, lot_size, direction):
@@ -49,107 +75,214 @@ class TradeCopyingService:
         Returns:
             Tuple of (profit_loss, roi_percentage)
         """
-        if direction == 'buy':
-            profit_loss = (Decimal(exit_price) - Decimal(entry_price)) * Decimal(lot_size)
-        else:  # sell
-            profit_loss = (Decimal(entry_price) - Decimal(exit_price)) * Decimal(lot_size)
-        
-        # Calculate ROI percentage
-        initial_investment = Decimal(entry_price) * Decimal(lot_size)
-        if initial_investment == 0:
-            roi_percentage = 0
-        else:
-            roi_percentage = (profit_loss / initial_investment) * Decimal(100)
-        
-        return float(profit_loss), float(roi_percentage)
+        profit_loss, roi_percentage = profit_loss_units(
+            to_units(entry_price, PRICE_SCALE),
+            to_units(exit_price, PRICE_SCALE),
+            to_units(lot_size, LOT_SCALE),
+            direction
+        )
+        
+        return from_units(profit_loss, MONEY_SCALE), roi_percentage
     
     @staticmethod
     @transaction.atomic
-    def copy_trade(original_trade, follower):
+    def copy_trade(original_trade, follower, lot_size=None):
         """
         Create a copy of a trade for a follower
         
         Args:
             original_trade: Trade instance to copy
             follower: Follower instance
+            lot_size: Optional copy lot size already calculated for this
+                follower, e.g. by copy_lot_sizes during fan-out
         
         Returns:
             Created CopiedTrade instance or None if error
         """
         try:
             # Calculate copy lot size
-            copy_lot_size = TradeCopyingService.calculate_copy_lot_size(
-                original_lot_size=original_trade.lot_size,
-                copy_percentage=follower.copy_percentage,
-                follower_investment=follower.initial_investment,
-                original_entry_price=original_trade.entry_price
-            )
+            if lot_size is not None:
+                copy_lot_size = lot_size
+            else:
+                copy_lot_size = TradeCopyingService.calculate_copy_lot_size(
+                    original_lot_size=original_trade.lot_size,
+                    copy_percentage=follower.copy_percentage,
+                    follower_investment=follower.initial_investment,
+                    original_entry_price=original_trade.entry_price
+                )
             
-            # Create copied trade
-            copied_trade = CopiedTrade.objects.create(
-                follower=follower,
-                original_trade=original_trade,
-                entry_price=original_trade.entry_price,
-                lot_size=copy_lot_size,
-                status='open'
-            )
+            # Create copied trade and journal it; a failure rolls back both
+            with transaction.atomic():
+                copied_trade = CopiedTrade.objects.create(
+                    follower=follower,
+                    original_trade=original_trade,
+                    entry_price=original_trade.entry_price,
+                    lot_size=copy_lot_size,
+                    status='open'
+                )
+                EventJournal.copy_created(copied_trade, follower)
+                ExposureIndex.record_copies([(None, copied_trade)])
             
             return copied_trade
         
-        except Exception as e:
-            print(f"Error copying trade: {str(e)}")
+        except Exception:
+            COPY_FAILURES.labels(operation='copy').inc()
+            logger.exception("Error copying trade %s for follower %s", original_trade.pk, follower.pk)
             return None
     
     @staticmethod
     @transaction.atomic
-    def close_copied_trade(copied_trade, exit_price):
+    def close_copied_trade(copied_trade, exit_price, precomputed=None):
         """
         Close a copied trade and calculate profit/loss
         
         Args:
             copied_trade: CopiedTrade instance to close
             exit_price: Exit price for the trade
+            precomputed: Optional (profit_loss, roi_percentage) already
+                calculated for this copy, e.g. by a batch close
         
         Returns:
             Updated CopiedTrade instance
         """
         try:
-            original_trade = copied_trade.original_trade
-            
             # Calculate profit/loss
-            profit_loss, roi_percentage = TradeCopyingService.calculate_profit_loss(
-                entry_price=copied_trade.entry_price,
-                exit_price=exit_price,
-                lot_size=copied_trade.lot_size,
-                direction=original_trade.direction
-            )
-            
-            # Update copied trade
-            copied_trade.exit_price = exit_price
-            copied_trade.profit_loss = profit_loss
-            copied_trade.roi_percentage = roi_percentage
-            copied_trade.status = 'closed'
-            copied_trade.closed_at = timezone.now()
-            copied_trade.save()
-            
-            # Update follower's balance and stats
-            follower = copied_trade.follower
-            follower.current_balance += Decimal(profit_loss)
-            follower.total_profit += Decimal(profit_loss)
+            if precomputed is not None:
+                profit_loss, roi_percentage = precomputed
+            else:
+                profit_loss, roi_percentage = TradeCopyingService.calculate_profit_loss(
+                    entry_price=copied_trade.entry_price,
+                    exit_price=exit_price,
+                    lot_size=copied_trade.lot_size,
+                    direction=copied_trade.original_trade.direction
+                )
             
-            # Calculate and update commission (e.g., 10% of profit if profitable)
-            if profit_loss > 0:
-                commission = Decimal(profit_loss) * Decimal(0.1)
-                follower.commission_paid += commission
-            
-            follower.save()
+            with transaction.atomic():
+                # Update copied trade
+                previous = copy.copy(copied_trade)
+                copied_trade.exit_price = exit_price
+                copied_trade.profit_loss = profit_loss
+                copied_trade.roi_percentage = roi_percentage
+                copied_trade.status = 'closed'
+                copied_trade.closed_at = timezone.now()
+                copied_trade.save()
+                
+                # Append the follower's balance change to the ledger instead
+                # of rewriting the Follower row, so concurrent closes never
+                # lose updates or wait on each other
+                follower = copied_trade.follower
+                
+                # Calculate commission (e.g., 10% of profit if profitable)
+                commission = from_units(commission_units(to_units(profit_loss, MONEY_SCALE)), MONEY_SCALE)
+                
+                FollowerLedger.append(
+                    follower, copied_trade,
+                    balance=profit_loss, profit=profit_loss, commission=commission
+                )
+                
+                EventJournal.copy_closed(copied_trade, follower, commission=commission)
+                ExposureIndex.record_copies([(previous, copied_trade)])
             
             return copied_trade
         
-        except Exception as e:
-            print(f"Error closing copied trade: {str(e)}")
+        except Exception:
+            COPY_FAILURES.labels(operation='close').inc()
+            logger.exception("Error closing copied trade %s", copied_trade.pk)
             return None
     
+    @staticmethod
+    def close_trade_copies(original_trade, exit_price):
+        """
+        Close every open copy of a trade that has just been closed
+        
+        Args:
+            original_trade: Closed Trade instance
+            exit_price: Exit price of the original trade
+        
+        Returns:
+            List of closed CopiedTrade instances
+        """
+        closed_copies = []
+        start = time.perf_counter()
+        
+        open_copies = list(
+            original_trade.copies.filter(status='open', follower__is_active=True).select_related('follower')
+        )
+        
+        # Every copy closes at the same price: compute all P&L in one pass
+        profit_loss, roi_percentage = profit_loss_units_batch(
+            [to_units(copied_trade.entry_price, PRICE_SCALE) for copied_trade in open_copies],
+            to_units(exit_price, PRICE_SCALE),
+            [to_units(copied_trade.lot_size, LOT_SCALE) for copied_trade in open_copies],
+            original_trade.direction == 'sell'
+        )
+        
+        for copied_trade, copy_profit_loss, copy_roi in zip(open_copies, profit_loss.tolist(), roi_percentage.tolist()):
+            # Avoid re-fetching the original trade for every copy
+            copied_trade.original_trade = original_trade
+            closed = TradeCopyingService.close_copied_trade(
+                copied_trade, exit_price,
+                precomputed=(from_units(copy_profit_loss, MONEY_SCALE), copy_roi)
+            )
+            if closed:
+                closed_copies.append(closed)
+        
+        CLOSE_CASCADE_DURATION.observe(time.perf_counter() - start)
+        CLOSE_CASCADE_SIZE.observe(len(closed_copies))
+        
+        # Follower balances shown on the trader's pages have changed
+        bump_trader_version(original_trade.trader_id)
+        
+        return closed_copies
+    
+    @staticmethod
+    def copy_lot_sizes(original_trade, followers):
+        """
+        Copy lot sizes for a follower cohort after the lot size rules
+        
+        Lot sizes are capped at each follower's max_lot_size, and followers
+        whose max_pair_exposure the copy would exceed are dropped. Both rules
+        are array masks over the whole cohort rather than per-follower checks.
+        
+        Args:
+            original_trade: Trade being copied
+            followers: Followers from Follower.objects.copy_candidates()
+        
+        Returns:
+            List of (follower, lot_size) pairs for the followers to copy to
+        """
+        # Loaded lazily like profit_loss_units_batch
+        import numpy as np
+        
+        if not followers:
+            return []
+        
+        if original_trade.lot_size == 0:
+            lots = np.zeros(len(followers), dtype=np.int64)
+        else:
+            lots = copy_lot_units_batch(
+                [to_units(follower.initial_investment, MONEY_SCALE) for follower in followers],
+                [follower.copy_percentage for follower in followers],
+                to_units(original_trade.entry_price, PRICE_SCALE)
+            )
+        
+        def lot_column(name):
+            # -1 marks "no limit" in the nullable rule columns
+            values = (getattr(follower, name) for follower in followers)
+            return np.array([-1 if value is None else to_units(value, LOT_SCALE) for value in values])
+        
+        max_lot = lot_column('max_lot_size')
+        max_exposure = lot_column('max_pair_exposure')
+        exposure = lot_column('pair_exposure')
+        
+        lots = np.where(max_lot >= 0, np.minimum(lots, max_lot), lots)
+        keep = (max_exposure < 0) | (exposure + lots <= max_exposure)
+        
+        return [
+            (follower, from_units(lot, LOT_SCALE))
+            for follower, lot, kept in zip(followers, lots.tolist(), keep.tolist()) if kept
+        ]
+    
     @staticmethod
     def auto_copy_trade_for_followers(original_trade):
         """
@@ -162,25 +295,39 @@ class TradeCopyingService:
             List of created CopiedTrade instances
         """
         copied_trades = []
+        start = time.perf_counter()
         
         try:
-            # Get all followers of the trader with auto_copy enabled
-            followers = Follower.objects.filter(
-                trader=original_trade.trader,
-                auto_copy_trades=True
+            # Get all followers of the trader with auto_copy enabled whose
+            # pair and open-copy rules admit this trade
+            followers = list(
+                Follower.objects.filter(
+                    trader=original_trade.trader,
+                    auto_copy_trades=True,
+                    is_active=True
+                ).copy_candidates(original_trade)
             )
             
-            # Copy trade for each follower
-            for follower in followers:
-                copied_trade = TradeCopyingService.copy_trade(original_trade, follower)
+            # Copy trade for each follower the lot size rules leave in
+            for follower, lot_size in TradeCopyingService.copy_lot_sizes(original_trade, followers):
+                copied_trade = TradeCopyingService.copy_trade(original_trade, follower, lot_size=lot_size)
                 if copied_trade:
                     copied_trades.append(copied_trade)
             
+            # Follower lists and the dashboard's exposure have changed
+            if copied_trades:
+                bump_trader_version(original_trade.trader_id)
+            
             return copied_trades
         
-        except Exception as e:
-            print(f"Error auto-copying trade: {str(e)}")
+        except Exception:
+            COPY_FAILURES.labels(operation='fanout').inc()
+            logger.exception("Error auto-copying trade %s", original_trade.pk)
             return []
+        
+        finally:
+            COPY_FANOUT_DURATION.observe(time.perf_counter() - start)
+            COPY_FANOUT_SIZE.observe(len(copied_trades))
     
     @staticmethod
     def get_follower_performance(follower):
@@ -193,30 +340,29 @@ class TradeCopyingService:
         Returns:
             Dictionary with performance metrics
         """
-        copied_trades = follower.copied_trades.all()
-        closed_trades = copied_trades.filter(status='closed')
-        winning_trades = closed_trades.filter(profit_loss__gt=0)
-        losing_trades = closed_trades.filter(profit_loss__lt=0)
+        # Closed history may have been moved to the archive table
+        totals = history_totals(follower.copied_trades.all(), follower.archived_copied_trades.all())
+        balances = follower.live_balances()
         
-        total_trades = copied_trades.count()
-        total_closed = closed_trades.count()
-        total_profit = sum(t.profit_loss for t in closed_trades)
-        total_loss = sum(abs(t.profit_loss) for t in losing_trades)
+        total_trades = totals['count']
+        total_closed = totals['closed']
+        total_profit = totals['profit']
+        total_loss = totals['loss']
         
         performance = {
             'total_copied_trades': total_trades,
-            'open_trades': copied_trades.filter(status='open').count(),
+            'open_trades': totals['open'],
             'closed_trades': total_closed,
-            'winning_trades': winning_trades.count(),
-            'losing_trades': losing_trades.count(),
-            'win_rate': (winning_trades.count() / total_closed * 100) if total_closed > 0 else 0,
-            'total_profit': follower.total_profit,
+            'winning_trades': totals['winning'],
+            'losing_trades': totals['losing'],
+            'win_rate': (totals['winning'] / total_closed * 100) if total_closed > 0 else 0,
+            'total_profit': balances['total_profit'],
             'total_loss': float(total_loss),
             'avg_profit_per_trade': float(total_profit / total_closed) if total_closed > 0 else 0,
-            'current_balance': float(follower.current_balance),
-            'commission_paid': float(follower.commission_paid),
+            'current_balance': float(balances['current_balance']),
+            'commission_paid': float(balances['commission_paid']),
             'initial_investment': float(follower.initial_investment),
-            'roi_percentage': (float(follower.total_profit) / float(follower.initial_investment) * 100) 
+            'roi_percentage': (float(balances['total_profit']) / float(follower.initial_investment) * 100) 
                              if float(follower.initial_investment) > 0 else 0,
         }
         
@@ -230,29 +376,302 @@ class TradeCopyingService:
         Args:
             trader: Trader instance
         """
-        trades = trader.trades.all()
-        closed_trades = trades.filter(status='closed')
-        winning_trades = closed_trades.filter(profit_loss__gt=0)
+        # Closed history may have been moved to the archive table
+        totals = history_totals(trader.trades.all(), trader.archived_trades.all())
         
-        total_trades = trades.count()
-        total_profit = sum(t.profit_loss for t in closed_trades)
+        total_trades = totals['count']
+        closed_count = totals['closed']
+        total_profit = totals['profit']
         
         # Update trader stats
         trader.total_trades = total_trades
         trader.total_profit = float(total_profit)
         
         if total_trades > 0:
-            trader.win_rate = (winning_trades.count() / closed_trades.count() * 100) if closed_trades.count() > 0 else 0
+            trader.win_rate = (totals['winning'] / closed_count * 100) if closed_count > 0 else 0
         
         # Calculate average ROI
-        if closed_trades.count() > 0:
-            total_roi = sum(t.roi_percentage for t in closed_trades)
-            trader.avg_roi = float(total_roi / closed_trades.count())
+        if closed_count > 0:
+            trader.avg_roi = float(totals['roi'] / closed_count)
         
-        # Update rating (based on win rate and ROI)
-        trader.rating = (trader.win_rate * 0.4 + trader.avg_roi * 0.6) / 100
+        # Update rating (win rate and ROI, recency-weighted and shrunk
+        # toward the population; rerate_traders refreshes everyone nightly)
+        trader.rating = TraderRating.rating_for(trader.pk)
         
         # Update monthly return (you can enhance this with date filtering)
         trader.monthly_return = float(total_profit)
         
         trader.save()
+
+
+class TraderDashboardService:
+    """Aggregate queries behind the trader dashboard"""
+    
+    STATS_FIELDS = (
+        'total_followers', 'total_trades', 'win_rate', 'total_profit',
+        'avg_roi', 'monthly_return', 'rating',
+    )
+    
+    SUMMARY_FIELDS = (
+        'follower_count', 'follower_invested', 'follower_profit', 'follower_pending_profit',
+    )
+    
+    @staticmethod
+    def stats(trader):
+        """
+        Headline statistics stored on the trader row
+        
+        Args:
+            trader: Trader instance
+        
+        Returns:
+            Dictionary of stats
+        """
+        return {name: getattr(trader, name) for name in TraderDashboardService.STATS_FIELDS}
+    
+    @staticmethod
+    def with_follower_summary(queryset):
+        """
+        Annotate traders with follower totals as scalar subqueries
+        
+        The totals then come back with the trader row itself instead of
+        needing a query of their own.
+        
+        Args:
+            queryset: Trader queryset
+        
+        Returns:
+            Queryset annotated with SUMMARY_FIELDS
+        """
+        followers = Follower.objects.filter(trader=OuterRef('pk'), is_active=True).order_by().values('trader')
+        pending = FollowerLedgerEntry.objects.filter(
+            follower__trader=OuterRef('pk'), follower__is_active=True, compacted=False
+        ).order_by().values('follower__trader')
+        money = FixedPointField(scale=MONEY_SCALE)
+        
+        def total(rows, aggregate, output_field):
+            return Coalesce(
+                Subquery(rows.annotate(total=aggregate).values('total')), Value(0), output_field=output_field
+            )
+        
+        return queryset.annotate(
+            follower_count=total(followers, Count('id'), IntegerField()),
+            follower_invested=total(followers, Sum('initial_investment'), money),
+            follower_profit=total(followers, Sum('total_profit'), money),
+            follower_pending_profit=total(pending, Sum('profit_delta'), money),
+        )
+    
+    @staticmethod
+    def follower_summary(totals):
+        """
+        Follower count, money invested and live copier profit
+        
+        Args:
+            totals: Mapping of the with_follower_summary() annotations
+        
+        Returns:
+            Dictionary with count, total_invested and total_copier_profit
+        """
+        profit = (
+            to_units(totals['follower_profit'], MONEY_SCALE)
+            + to_units(totals['follower_pending_profit'], MONEY_SCALE)
+        )
+        return {
+            'count': totals['follower_count'],
+            'total_invested': totals['follower_invested'],
+            'total_copier_profit': from_units(profit, MONEY_SCALE),
+        }
+    
+    @staticmethod
+    def exposure(trader_id):
+        """
+        Open-position exposure per currency pair
+        
+        Two small queries on the exposure index: the trader's own row per
+        pair and the rows of their active followers, added up per pair.
+        
+        Args:
+            trader_id: Trader primary key
+        
+        Returns:
+            List of per-pair dictionaries ordered by pair
+        """
+        own = TraderExposure.objects.filter(trader_id=trader_id, open_positions__gt=0)
+        copied = ExposureIndex.combine(
+            ExposureIndex.as_dict(row)
+            for row in FollowerExposure.objects.filter(
+                follower__trader_id=trader_id, follower__is_active=True, open_positions__gt=0
+            ).values('currency_pair', 'open_positions', 'buy_lots', 'sell_lots', 'notional')
+        )
+        copied = {row['currency_pair']: row for row in copied}
+        
+        exposure = []
+        for row in own.order_by('currency_pair'):
+            pair = ExposureIndex.as_dict(row)
+            copies = copied.get(row.currency_pair, {})
+            exposure.append({
+                'currency_pair': pair['currency_pair'],
+                'open_trades': pair['open_positions'],
+                'buy_lots': pair['buy_lots'],
+                'sell_lots': pair['sell_lots'],
+                'net_lots': pair['net_lots'],
+                'notional': pair['notional'],
+                'open_copies': copies.get('open_positions', 0),
+                'copied_lots': copies.get('gross_lots', 0.0),
+            })
+        return exposure
+
+
+class PortfolioService:
+    """Aggregate a user's positions across every trader they follow"""
+    
+    @staticmethod
+    def _plus(stored, pending):
+        return from_units(to_units(stored, MONEY_SCALE) + to_units(pending or 0, MONEY_SCALE), MONEY_SCALE)
+    
+    @staticmethod
+    def event_cursor():
+        """
+        Journal offset a client can pass back as ``since``
+        
+        Only events older than EVENT_GAP_GRACE_SECONDS count, so a
+        transaction that commits a lower offset late is still picked up by
+        the next refresh (at worst an event is reported twice).
+        """
+        grace = getattr(settings, 'EVENT_GAP_GRACE_SECONDS', 5)
+        settled_before = timezone.now() - timedelta(seconds=grace)
+        return TradeEvent.objects.filter(created_at__lte=settled_before).aggregate(
+            cursor=Coalesce(Max('id'), Value(0))
+        )['cursor']
+    
+    @staticmethod
+    def changed_followers(follower_ids, since):
+        """Followers among follower_ids touched by a journal event after since"""
+        return set(TradeEvent.objects.filter(
+            id__gt=since, follower_id__in=follower_ids
+        ).order_by().values_list('follower_id', flat=True).distinct())
+    
+    @staticmethod
+    def exposure(rows):
+        """
+        FollowerExposure rows in the portfolio's shape
+        
+        Args:
+            rows: ExposureIndex.as_dict() rows
+        
+        Returns:
+            List of dictionaries with currency_pair, open_copies, buy_lots,
+            sell_lots, net_lots, gross_lots and notional
+        """
+        exposure = []
+        for row in rows:
+            row = dict(row)
+            row['open_copies'] = row.pop('open_positions')
+            exposure.append(row)
+        return exposure
+    
+    @staticmethod
+    def totals(user):
+        """Money totals over all of a user's followers, pending ledger entries included"""
+        followers = Follower.objects.filter(follower_user=user, is_active=True)
+        stored = followers.aggregate(
+            count=Count('id'),
+            invested=Sum('initial_investment'),
+            balance=Sum('current_balance'),
+            profit=Sum('total_profit'),
+            commission=Sum('commission_paid'),
+        )
+        pending = FollowerLedgerEntry.objects.filter(follower__in=followers, compacted=False).aggregate(
+            balance=Sum('balance_delta'), profit=Sum('profit_delta'), commission=Sum('commission_delta')
+        )
+        
+        plus = PortfolioService._plus
+        return {
+            'traders_followed': stored['count'],
+            'total_invested': stored['invested'] or 0.0,
+            'current_balance': plus(stored['balance'] or 0, pending['balance']),
+            'realized_profit': plus(stored['profit'] or 0, pending['profit']),
+            'commission_paid': plus(stored['commission'] or 0, pending['commission']),
+        }
+    
+    @staticmethod
+    def portfolio(user, since=None):
+        """
+        Totals and per-trader breakdown of a user's copy positions
+        
+        Uses a fixed number of queries however many traders the user
+        follows. With ``since`` (a cursor from an earlier response) only
+        followers touched by journal events after it are listed under
+        ``traders``; ``follower_ids`` lets the client drop unfollowed ones.
+        
+        Args:
+            user: Following user
+            since: Optional event cursor for an incremental refresh
+        
+        Returns:
+            Dictionary with cursor, totals, exposure, traders and, for
+            incremental refreshes, follower_ids
+        """
+        cursor = PortfolioService.event_cursor()
+        followers = Follower.objects.filter(follower_user=user, is_active=True)
+        
+        # One indexed row per (follower, pair) instead of grouping open copies
+        by_follower = {}
+        rows = FollowerExposure.objects.filter(
+            follower__follower_user=user, follower__is_active=True, open_positions__gt=0
+        ).order_by('follower_id', 'currency_pair').values(
+            'follower_id', 'currency_pair', 'open_positions', 'buy_lots', 'sell_lots', 'notional'
+        )
+        for row in rows:
+            by_follower.setdefault(row['follower_id'], []).append(ExposureIndex.as_dict(row))
+        
+        exposure = PortfolioService.exposure(ExposureIndex.combine(
+            pair for pairs in by_follower.values() for pair in pairs
+        ))
+        totals = PortfolioService.totals(user)
+        totals['open_copies'] = sum(row['open_copies'] for row in exposure)
+        notional = from_units(sum(to_units(row['notional'], MONEY_SCALE) for row in exposure), MONEY_SCALE)
+        totals.update(ExposureIndex.margin(totals['current_balance'], notional))
+        result = {
+            'cursor': cursor,
+            'totals': totals,
+            'exposure': exposure,
+        }
+        
+        if since is not None:
+            follower_ids = list(followers.values_list('id', flat=True))
+            changed = PortfolioService.changed_followers(follower_ids, since)
+            result['follower_ids'] = follower_ids
+            if not changed:
+                result['traders'] = []
+                return result
+            followers = followers.filter(id__in=changed)
+        
+        plus = PortfolioService._plus
+        traders = []
+        rows = followers.with_ledger().order_by('trader_id').values(
+            'id', 'trader_id', 'trader__user__first_name', 'trader__user__last_name',
+            'auto_copy_trades', 'copy_percentage', 'initial_investment',
+            'current_balance', 'total_profit', 'commission_paid',
+            'pending_balance', 'pending_profit', 'pending_commission',
+        )
+        for row in rows:
+            pair_exposure = PortfolioService.exposure(by_follower.get(row['id'], []))
+            balance = plus(row['current_balance'], row['pending_balance'])
+            notional = from_units(sum(to_units(pair['notional'], MONEY_SCALE) for pair in pair_exposure), MONEY_SCALE)
+            traders.append({
+                'follower_id': row['id'],
+                'trader_id': row['trader_id'],
+                'trader_name': f"{row['trader__user__first_name']} {row['trader__user__last_name']}",
+                'auto_copy_trades': row['auto_copy_trades'],
+                'copy_percentage': row['copy_percentage'],
+                'initial_investment': row['initial_investment'],
+                'current_balance': balance,
+                'realized_profit': plus(row['total_profit'], row['pending_profit']),
+                'commission_paid': plus(row['commission_paid'], row['pending_commission']),
+                'open_copies': sum(pair['open_copies'] for pair in pair_exposure),
+                'exposure': pair_exposure,
+                **ExposureIndex.margin(balance, notional),
+            })
+        result['traders'] = traders
+        return result
@@ -0,0 +1,71 @@
+"""
+Model signal handlers for Win Trade API
+"""
+from django.contrib.auth.models import User
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from . import search
+from .authentication import user_cache
+from .cache import bump_trader_version
+from .models import Trader, Trade, Follower
+
+
+@receiver(post_save, sender=User)
+def touch_trader_on_user_change(sender, instance, created, update_fields=None, **kwargs):
+    """
+    Bump Trader.updated_at when the user's names or email change
+
+    Trader payloads embed these fields, so the trader's Last-Modified/ETag
+    validators and cached responses must move with them. Login-only saves
+    are ignored.
+    """
+    if created or (update_fields and set(update_fields) <= {'last_login'}):
+        return
+    for trader_id in Trader.objects.filter(user_id=instance.pk).values_list('id', flat=True):
+        Trader.objects.filter(pk=trader_id).update(updated_at=timezone.now())
+        bump_trader_version(trader_id)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_cached_user(sender, instance, **kwargs):
+    """Drop the user from the JWT authentication cache on profile or password change"""
+    user_cache.invalidate(instance.pk)
+
+
+@receiver(post_save, sender=Trader)
+@receiver(post_delete, sender=Trader)
+def invalidate_trader(sender, instance, **kwargs):
+    bump_trader_version(instance.pk)
+
+
+@receiver(post_save, sender=Trade)
+@receiver(post_delete, sender=Trade)
+@receiver(post_save, sender=Follower)
+@receiver(post_delete, sender=Follower)
+def invalidate_trader_of_related(sender, instance, **kwargs):
+    bump_trader_version(instance.trader_id)
+
+
+@receiver(post_save, sender=User)
+def reindex_trader_names(sender, instance, created, update_fields=None, **kwargs):
+    if created or (update_fields and set(update_fields) <= {'last_login'}):
+        return
+    for trader in Trader.objects.filter(user_id=instance.pk).select_related('user'):
+        search.index_trader(trader)
+
+
+@receiver(post_save, sender=Trader)
+def index_trader_on_save(sender, instance, created, **kwargs):
+    """Index new traders; later saves only move their rating"""
+    if created:
+        search.index_trader(instance)
+    else:
+        search.update_trader_rating(instance.pk, instance.rating)
+
+
+@receiver(post_delete, sender=Trader)
+def remove_trader_from_index(sender, instance, **kwargs):
+    search.remove_trader(instance.pk)
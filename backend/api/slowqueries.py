@@ -0,0 +1,308 @@
+"""
+Opt-in slow-query log with EXPLAIN plans
+
+With SLOW_QUERY_LOG enabled, a wrapper installed on every database
+connection times each statement. One that takes SLOW_QUERY_THRESHOLD_MS or
+longer is written as a JSON line to a rotating log (SLOW_QUERY_LOG_FILE)
+together with:
+
+- its fingerprint: the SQL with literals and placeholder lists collapsed,
+  so every execution of the same query groups together
+- its origin: the view that was serving the request, e.g.
+  ``TraderViewSet.trades``, and the innermost project function that issued
+  it, e.g. ``TradeCopyingService.update_trader_stats``
+- the database's EXPLAIN output for the statement, and the hot tables
+  (SLOW_QUERY_HOT_TABLES) it reads with a sequential scan
+
+Parameters are used for the EXPLAIN but never logged. ``manage.py
+slow_query_report`` summarizes the log by total time per fingerprint.
+
+Strict mode (SLOW_QUERY_FAIL_ON_SEQ_SCAN, or the strict_plans() context
+manager) is for test and CI runs: every read, update or delete touching a
+hot table is explained regardless of its time, with sequential scans disabled on
+PostgreSQL so small test tables do not hide a missing index, and a
+remaining sequential scan raises SeqScanError.
+"""
+import json
+import logging
+import os
+import re
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone as dt_timezone
+from hashlib import sha1
+from logging.handlers import RotatingFileHandler
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import transaction
+from django.db.backends.signals import connection_created
+
+
+logger = logging.getLogger('api.slowqueries')
+
+_state = threading.local()
+_handler_lock = threading.Lock()
+
+PROJECT_PACKAGES = ('api', 'win_trade')
+
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_RE = re.compile(r'\b\d+(?:\.\d+)?\b')
+_PLACEHOLDER_LIST_RE = re.compile(r'\(\s*\?(?:\s*,\s*\?)*\s*\)')
+_WHITESPACE_RE = re.compile(r'\s+')
+
+# "Seq Scan on api_trade" (PostgreSQL), "SCAN api_trade" / "SCAN TABLE
+# api_trade" without an index (SQLite)
+_SEQ_SCAN_RES = (
+    re.compile(r'Seq Scan on "?(\w+)"?'),
+    re.compile(r'^\s*SCAN (?:TABLE )?"?(\w+)"?(?!.*\bUSING\b)', re.MULTILINE),
+)
+
+# EXPLAIN without ANALYZE plans these without running them
+EXPLAINABLE = ('SELECT', 'WITH', 'UPDATE', 'DELETE')
+
+
+class SeqScanError(AssertionError):
+    """A query read a hot table with a sequential scan in strict mode"""
+
+
+def fingerprint(sql):
+    """
+    Normalized form of a statement and its short hash
+
+    String and number literals become ``?`` and placeholder lists of any
+    length become ``(...)``, so ``id IN (%s, %s)`` and ``id IN (%s)`` group
+    together.
+
+    Returns:
+        Tuple of (normalized SQL, 16-character hex digest)
+    """
+    normalized = _STRING_RE.sub('?', sql)
+    normalized = _NUMBER_RE.sub('?', normalized)
+    normalized = _PLACEHOLDER_LIST_RE.sub('(...)', normalized.replace('%s', '?'))
+    normalized = _WHITESPACE_RE.sub(' ', normalized).strip()
+    return normalized, sha1(normalized.encode()).hexdigest()[:16]
+
+
+def seq_scans(plan, tables=None):
+    """Tables read with a sequential scan in an EXPLAIN plan, limited to ``tables`` if given"""
+    found = {match for pattern in _SEQ_SCAN_RES for match in pattern.findall(plan)}
+    if tables is not None:
+        found &= set(tables)
+    return sorted(found)
+
+
+def enabled():
+    return getattr(settings, 'SLOW_QUERY_LOG', False)
+
+
+def hot_tables():
+    return [table for table in getattr(settings, 'SLOW_QUERY_HOT_TABLES', []) if table]
+
+
+def is_strict():
+    return getattr(_state, 'strict', False) or getattr(settings, 'SLOW_QUERY_FAIL_ON_SEQ_SCAN', False)
+
+
+@contextmanager
+def strict_plans():
+    """Raise SeqScanError for sequential scans on hot tables inside the block"""
+    previous = getattr(_state, 'strict', False)
+    _state.strict = True
+    try:
+        yield
+    finally:
+        _state.strict = previous
+
+
+def view_name(view_func, method):
+    """``ViewSet.action`` for DRF views, else the view function's name"""
+    view_class = getattr(view_func, 'cls', None) or getattr(view_func, 'view_class', None)
+    if view_class is None:
+        return f'{view_func.__module__}.{getattr(view_func, "__qualname__", view_func.__class__.__name__)}'
+    actions = getattr(view_func, 'actions', None) or {}
+    action = actions.get(method.lower(), method.lower())
+    return f'{view_class.__name__}.{action}'
+
+
+def calling_function():
+    """Innermost project frame outside this module, as ``module:qualname:line``"""
+    frame = sys._getframe(1)
+    while frame is not None:
+        module = frame.f_globals.get('__name__', '')
+        if module != __name__ and module.split('.', 1)[0] in PROJECT_PACKAGES:
+            code = frame.f_code
+            return f'{module}:{getattr(code, "co_qualname", code.co_name)}:{frame.f_lineno}'
+        frame = frame.f_back
+    return None
+
+
+def explain(connection, sql, params):
+    """
+    EXPLAIN output of a statement, one line per plan row
+
+    The EXPLAIN runs in a transaction or savepoint that is always rolled
+    back, so neither a failing EXPLAIN nor the strict-mode planner setting
+    can affect the caller's transaction. Returns None when the backend
+    cannot explain.
+    """
+    try:
+        prefix = connection.ops.explain_query_prefix()
+    except Exception:
+        return None
+    _state.explaining = True
+    try:
+        with transaction.atomic(using=connection.alias):
+            with connection.cursor() as cursor:
+                if is_strict() and connection.vendor == 'postgresql':
+                    cursor.execute('SET LOCAL enable_seqscan = off')
+                cursor.execute(f'{prefix} {sql}', params)
+                rows = cursor.fetchall()
+            transaction.set_rollback(True, using=connection.alias)
+    except Exception:
+        logger.debug('EXPLAIN failed for %s', sql, exc_info=True)
+        return None
+    finally:
+        _state.explaining = False
+    if connection.vendor == 'sqlite':
+        # (id, parent, notused, detail)
+        return '\n'.join(str(row[-1]) for row in rows)
+    return '\n'.join('\t'.join(str(column) for column in row) for row in rows)
+
+
+def _log_handler():
+    """Attach the rotating file handler on first use"""
+    with _handler_lock:
+        if not logger.handlers:
+            path = settings.SLOW_QUERY_LOG_FILE
+            os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+            handler = RotatingFileHandler(
+                path,
+                maxBytes=getattr(settings, 'SLOW_QUERY_LOG_MAX_BYTES', 10 * 1024 * 1024),
+                backupCount=getattr(settings, 'SLOW_QUERY_LOG_BACKUPS', 5),
+            )
+            handler.setFormatter(logging.Formatter('%(message)s'))
+            logger.addHandler(handler)
+            logger.setLevel(logging.INFO)
+            logger.propagate = False
+
+
+class SlowQueryWrapper:
+    """connection.execute_wrapper() callable that times and logs statements"""
+
+    def __init__(self, connection):
+        self.connection = connection
+
+    def __call__(self, execute, sql, params, many, context):
+        if getattr(_state, 'explaining', False):
+            return execute(sql, params, many, context)
+
+        start = time.perf_counter()
+        result = execute(sql, params, many, context)
+        duration_ms = (time.perf_counter() - start) * 1000
+
+        slow = enabled() and duration_ms >= getattr(settings, 'SLOW_QUERY_THRESHOLD_MS', 200)
+        checked = is_strict() and _explainable(sql, many) and any(table in sql for table in hot_tables())
+        if slow or checked:
+            self.record(sql, params, many, duration_ms, slow)
+        return result
+
+    def record(self, sql, params, many, duration_ms, slow):
+        tables = hot_tables()
+        plan = explain(self.connection, sql, params) if _explainable(sql, many) else None
+        scans = seq_scans(plan, tables) if plan else []
+
+        if slow:
+            normalized, digest = fingerprint(sql)
+            _log_handler()
+            logger.info(json.dumps({
+                'time': datetime.now(dt_timezone.utc).isoformat(),
+                'database': self.connection.alias,
+                'vendor': self.connection.vendor,
+                'duration_ms': round(duration_ms, 3),
+                'fingerprint': digest,
+                'sql': normalized,
+                'params': 0 if params is None else len(params),
+                'many': many,
+                'view': getattr(_state, 'view', None),
+                'function': calling_function(),
+                'plan': plan,
+                'seq_scans': scans,
+            }))
+
+        if scans and is_strict():
+            raise SeqScanError(
+                f'Sequential scan on {", ".join(scans)} from {calling_function() or "unknown"}:\n'
+                f'{sql}\n{plan}'
+            )
+
+
+def _explainable(sql, many):
+    return not many and (sql.split(None, 1) or [''])[0].upper() in EXPLAINABLE
+
+
+def _install(sender, connection, **kwargs):
+    if not any(isinstance(wrapper, SlowQueryWrapper) for wrapper in connection.execute_wrappers):
+        connection.execute_wrappers.append(SlowQueryWrapper(connection))
+
+
+def install():
+    """Wrap every new database connection; called from AppConfig.ready()"""
+    if enabled() or getattr(settings, 'SLOW_QUERY_FAIL_ON_SEQ_SCAN', False):
+        connection_created.connect(_install, dispatch_uid='api.slowqueries.install')
+
+
+class SlowQueryMiddleware:
+    """Remember which view is serving the request for the slow-query log"""
+
+    def __init__(self, get_response):
+        if not (enabled() or getattr(settings, 'SLOW_QUERY_FAIL_ON_SEQ_SCAN', False)):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        try:
+            return self.get_response(request)
+        finally:
+            _state.view = None
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        _state.view = view_name(view_func, request.method)
+
+
+def read_log(path=None):
+    """
+    Yield the entries of the slow-query log, oldest rotated file first
+
+    Lines that are not valid JSON (e.g. cut off by a crash) are skipped.
+    """
+    path = path or settings.SLOW_QUERY_LOG_FILE
+    backups = sorted(
+        _rotated(path),
+        key=lambda name: int(name.rsplit('.', 1)[1]),
+        reverse=True,
+    )
+    for name in backups + [path]:
+        try:
+            handle = open(name)
+        except FileNotFoundError:
+            continue
+        with handle:
+            for line in handle:
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    continue
+
+
+def _rotated(path):
+    directory, base = os.path.split(path)
+    directory = directory or '.'
+    if not os.path.isdir(directory):
+        return []
+    return [
+        os.path.join(directory, name) for name in os.listdir(directory)
+        if name.startswith(base + '.') and name[len(base) + 1:].isdigit()
+    ]
@@ -0,0 +1,37 @@
+"""
+Celery tasks for Win Trade API
+"""
+from django.conf import settings
+
+from win_trade.celery import app
+
+from .exposure import ExposureIndex
+from .rating import TraderRating
+from .teardown import FollowerTeardownService
+
+
+@app.task(bind=True, acks_late=True)
+def teardown_follower(self, teardown_id):
+    """
+    Delete a bounded number of chunks of an unfollowed follower's history
+
+    The task requeues itself until the teardown is done, so one long
+    teardown never holds a worker for long.
+    """
+    finished = FollowerTeardownService.run(
+        teardown_id, max_chunks=getattr(settings, 'FOLLOWER_TEARDOWN_CHUNKS_PER_TASK', 20)
+    )
+    if not finished:
+        self.apply_async((teardown_id,))
+
+
+@app.task
+def reconcile_exposure():
+    """Repair drift in the exposure index; schedule periodically with celery beat"""
+    return len(ExposureIndex.reconcile())
+
+
+@app.task
+def rerate_traders():
+    """Nightly re-rating of every trader; schedule with celery beat"""
+    return TraderRating.rerate()['updated']
@@ -0,0 +1,122 @@
+"""
+Background teardown of unfollowed followers
+
+Deleting a Follower inline cascades to every CopiedTrade, archived copy and
+ledger entry it owns, all inside the request. Unfollowing instead marks the
+row inactive, which stops fan-out at once, and records a FollowerTeardown.
+A Celery task (or process_follower_teardowns) then deletes the history in
+chunks of FOLLOWER_TEARDOWN_CHUNK_SIZE rows, each in its own short
+transaction, updating the teardown's progress as it goes, and finally
+deletes the now childless Follower row.
+"""
+import logging
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import (
+    ArchivedCopiedTrade, CopiedTrade, Follower, FollowerExposure, FollowerLedgerEntry, FollowerTeardown
+)
+
+logger = logging.getLogger(__name__)
+
+
+# Every table holding rows that cascade from Follower
+TEARDOWN_MODELS = (CopiedTrade, ArchivedCopiedTrade, FollowerLedgerEntry, FollowerExposure)
+
+
+class FollowerTeardownService:
+    """Deactivate followers and remove their history in bounded chunks"""
+
+    @staticmethod
+    def unfollow(follower):
+        """
+        Deactivate a follower and schedule its teardown
+
+        Call inside the transaction that records the unfollow; the task is
+        only queued once it commits.
+
+        Returns:
+            Created FollowerTeardown instance
+        """
+        Follower.objects.filter(pk=follower.pk).update(
+            is_active=False, unfollowed_at=timezone.now(), updated_at=timezone.now()
+        )
+        teardown = FollowerTeardown.objects.create(
+            follower_id=follower.pk, trader_id=follower.trader_id, user_id=follower.follower_user_id
+        )
+        transaction.on_commit(lambda: FollowerTeardownService.schedule(teardown.pk))
+        return teardown
+
+    @staticmethod
+    def schedule(teardown_id):
+        """Queue the teardown task; process_follower_teardowns picks up anything this misses"""
+        from .tasks import teardown_follower
+
+        try:
+            teardown_follower.delay(teardown_id)
+        except Exception:
+            logger.exception("Could not queue teardown %s; run process_follower_teardowns", teardown_id)
+
+    @staticmethod
+    def run(teardown_id, chunk_size=None, max_chunks=None):
+        """
+        Delete a deactivated follower's history chunk by chunk
+
+        Args:
+            teardown_id: FollowerTeardown primary key
+            chunk_size: Rows per chunk, default FOLLOWER_TEARDOWN_CHUNK_SIZE
+            max_chunks: Stop after this many chunks (None: run to completion)
+
+        Returns:
+            True once the teardown is done, False if it stopped at max_chunks
+        """
+        chunk_size = chunk_size or getattr(settings, 'FOLLOWER_TEARDOWN_CHUNK_SIZE', 1000)
+        teardown = FollowerTeardown.objects.get(pk=teardown_id)
+        if teardown.status == 'done':
+            return True
+
+        try:
+            return FollowerTeardownService._run(teardown, chunk_size, max_chunks)
+        except Exception as exc:
+            FollowerTeardown.objects.filter(pk=teardown.pk).update(
+                status='failed', error=repr(exc), updated_at=timezone.now()
+            )
+            raise
+
+    @staticmethod
+    def _run(teardown, chunk_size, max_chunks):
+        follower_id = teardown.follower_id
+        if teardown.status != 'running':
+            teardown.total_rows = sum(
+                model.objects.filter(follower_id=follower_id).count() for model in TEARDOWN_MODELS
+            )
+            teardown.status = 'running'
+            teardown.error = ''
+            teardown.save(update_fields=['total_rows', 'status', 'error', 'updated_at'])
+
+        chunks = 0
+        for model in TEARDOWN_MODELS:
+            while True:
+                if max_chunks is not None and chunks >= max_chunks:
+                    return False
+                ids = list(
+                    model.objects.filter(follower_id=follower_id).order_by('pk').values_list('pk', flat=True)[:chunk_size]
+                )
+                if not ids:
+                    break
+                with transaction.atomic():
+                    deleted, _ = model.objects.filter(pk__in=ids).delete()
+                    FollowerTeardown.objects.filter(pk=teardown.pk).update(
+                        deleted_rows=F('deleted_rows') + deleted, updated_at=timezone.now()
+                    )
+                chunks += 1
+
+        with transaction.atomic():
+            Follower.objects.filter(pk=follower_id, is_active=False).delete()
+            FollowerTeardown.objects.filter(pk=teardown.pk).update(
+                status='done', finished_at=timezone.now(), updated_at=timezone.now()
+            )
+        return True
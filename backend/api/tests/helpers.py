@@ -0,0 +1,25 @@
+"""Shared test data builders"""
+from django.contrib.auth.models import User
+
+from api.models import Follower, Trade, Trader
+
+
+def make_trader(username='alice', **kwargs):
+    user = User.objects.create_user(username, f'{username}@example.com', 'password', first_name=username.title())
+    return Trader.objects.create(user=user, **kwargs)
+
+
+def make_follower(trader, username, **kwargs):
+    user = User.objects.create_user(username, f'{username}@example.com', 'password', first_name=username.title())
+    kwargs.setdefault('initial_investment', 1000.0)
+    kwargs.setdefault('current_balance', kwargs['initial_investment'])
+    return Follower.objects.create(trader=trader, follower_user=user, **kwargs)
+
+
+def make_trade(trader, **kwargs):
+    values = {
+        'currency_pair': 'EURUSD', 'direction': 'buy', 'entry_price': 1.1,
+        'stop_loss': 1.0, 'take_profit': 1.2, 'lot_size': 1.0, 'status': 'open',
+    }
+    values.update(kwargs)
+    return Trade.objects.create(trader=trader, **values)
@@ -0,0 +1,73 @@
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from api.models import Trade
+from api.services import TradeCopyingService
+
+from .helpers import make_follower, make_trade, make_trader
+
+
+class AdminChangelistQueryTests(TestCase):
+    """Admin changelists run a fixed number of queries however many rows they show"""
+
+    # Session, user, count and page queries; LargeTableAdmin changelists skip
+    # the unfiltered full count the trader changelist still runs
+    BUDGETS = {
+        'trader': 5,
+        'trade': 4,
+        'follower': 4,
+        'copiedtrade': 4,
+    }
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser('admin', 'admin@example.com', 'password')
+        cls.add_rows('a', 2)
+
+    @staticmethod
+    def add_rows(prefix, traders):
+        for index in range(traders):
+            trader = make_trader(f'{prefix}trader{index}')
+            for follower in range(2):
+                make_follower(trader, f'{prefix}follower{index}_{follower}')
+            for _ in range(2):
+                TradeCopyingService.auto_copy_trade_for_followers(make_trade(trader))
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+
+    def get(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def queries(self, url):
+        with CaptureQueriesContext(connection) as captured:
+            self.get(url)
+        return len(captured.captured_queries)
+
+    def test_changelist_query_budgets(self):
+        for model, budget in self.BUDGETS.items():
+            with self.subTest(model=model), self.assertNumQueries(budget):
+                self.get(f'/admin/api/{model}/')
+
+    def test_query_counts_do_not_grow_with_rows(self):
+        before = {model: self.queries(f'/admin/api/{model}/') for model in self.BUDGETS}
+        self.add_rows('b', 5)
+        after = {model: self.queries(f'/admin/api/{model}/') for model in self.BUDGETS}
+        self.assertEqual(after, before)
+
+    def test_cursor_page(self):
+        cursor = Trade.objects.order_by('-pk').values_list('pk', flat=True)[1]
+        with self.assertNumQueries(self.BUDGETS['trade']):
+            response = self.get(f'/admin/api/trade/?cursor={cursor}')
+        shown = [trade.pk for trade in response.context['cl'].result_list]
+        self.assertTrue(shown)
+        self.assertTrue(all(pk < cursor for pk in shown))
+        self.assertEqual(shown, sorted(shown, reverse=True))
+
+    def test_filtered_changelist(self):
+        with self.assertNumQueries(self.BUDGETS['trade']):
+            self.get('/admin/api/trade/?status__exact=open&currency_pair__exact=EURUSD')
@@ -0,0 +1,131 @@
+from datetime import timedelta
+
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from api.archive import TradeArchiveService, history_totals
+from api.models import ArchivedCopiedTrade, ArchivedTrade, CopiedTrade, Trade
+from api.services import TradeCopyingService
+
+from .helpers import make_follower, make_trade, make_trader
+
+
+class TradeArchiveTests(TestCase):
+    def setUp(self):
+        self.now = timezone.now()
+        self.trader = make_trader()
+        self.follower = make_follower(self.trader, 'bob')
+        self.client = APIClient()
+        self.client.force_authenticate(self.trader.user)
+
+    def closed_trade(self, days_ago, exit_price=1.2, copy=False):
+        """A trade opened and closed ``days_ago``, optionally copied to the follower first"""
+        when = self.now - timedelta(days=days_ago)
+        trade = make_trade(self.trader)
+        if copy:
+            TradeCopyingService.auto_copy_trade_for_followers(trade)
+        trade.status = 'closed'
+        trade.exit_price = exit_price
+        trade.profit_loss, trade.roi_percentage = TradeCopyingService.calculate_profit_loss(
+            entry_price=trade.entry_price, exit_price=exit_price, lot_size=trade.lot_size, direction=trade.direction
+        )
+        trade.closed_at = when
+        trade.save()
+        Trade.objects.filter(pk=trade.pk).update(opened_at=when - timedelta(hours=1))
+        if copy:
+            TradeCopyingService.close_trade_copies(trade, exit_price)
+            CopiedTrade.objects.filter(original_trade=trade).update(closed_at=when)
+        trade.refresh_from_db()
+        return trade
+
+    def archive(self, days=365):
+        return TradeArchiveService.archive(cutoff=self.now - timedelta(days=days))
+
+    def trade_ids(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return [row['id'] for row in response.json()['results']]
+
+    def test_archive_moves_old_closed_rows_only(self):
+        old = self.closed_trade(400, copy=True)
+        recent = self.closed_trade(10)
+        still_open = make_trade(self.trader)
+
+        self.assertEqual(self.archive(), (1, 1))
+
+        self.assertEqual(list(ArchivedTrade.objects.values_list('id', flat=True)), [old.pk])
+        self.assertEqual(set(Trade.objects.values_list('id', flat=True)), {recent.pk, still_open.pk})
+        self.assertEqual(ArchivedCopiedTrade.objects.get().original_trade_id, old.pk)
+        self.assertFalse(CopiedTrade.objects.exists())
+
+        archived = ArchivedTrade.objects.get()
+        for field in ('trader_id', 'currency_pair', 'entry_price', 'exit_price', 'lot_size', 'profit_loss',
+                      'roi_percentage', 'status', 'opened_at', 'closed_at'):
+            self.assertEqual(getattr(archived, field), getattr(old, field), field)
+
+    def test_trade_with_open_copy_stays_hot(self):
+        trade = make_trade(self.trader)
+        TradeCopyingService.auto_copy_trade_for_followers(trade)
+        Trade.objects.filter(pk=trade.pk).update(
+            status='closed', closed_at=self.now - timedelta(days=400)
+        )
+
+        self.assertEqual(self.archive(), (0, 0))
+        self.assertTrue(Trade.objects.filter(pk=trade.pk).exists())
+
+    def test_archive_is_idempotent_in_batches(self):
+        trades = [self.closed_trade(400 + index) for index in range(5)]
+        TradeArchiveService.archive(cutoff=self.now - timedelta(days=365), batch_size=2)
+        self.assertEqual(self.archive(), (0, 0))
+        self.assertEqual(ArchivedTrade.objects.count(), len(trades))
+
+    def test_trader_trades_union_live_and_archive(self):
+        old = self.closed_trade(400)
+        month = self.closed_trade(30)
+        live = make_trade(self.trader)
+        self.archive(days=20)
+        url = f'/api/traders/{self.trader.pk}/trades/'
+
+        # Newest first across both tables
+        self.assertEqual(self.trade_ids(url), [live.pk, month.pk, old.pk])
+        since = (self.now - timedelta(days=100)).date().isoformat()
+        self.assertEqual(self.trade_ids(f'{url}?since={since}'), [live.pk, month.pk])
+        since = (self.now - timedelta(days=5)).date().isoformat()
+        self.assertEqual(self.trade_ids(f'{url}?since={since}'), [live.pk])
+
+    def test_range_needs_archive(self):
+        self.assertFalse(TradeArchiveService.range_needs_archive(None))
+        old = self.closed_trade(400)
+        self.archive()
+
+        self.assertTrue(TradeArchiveService.range_needs_archive(None))
+        self.assertTrue(TradeArchiveService.range_needs_archive(old.opened_at))
+        self.assertFalse(TradeArchiveService.range_needs_archive(old.closed_at + timedelta(seconds=1)))
+
+    def test_history_totals_span_both_tables(self):
+        for days, exit_price in ((400, 1.2), (390, 1.0), (10, 1.15), (5, 1.05)):
+            self.closed_trade(days, exit_price=exit_price)
+        make_trade(self.trader)
+        before = history_totals(self.trader.trades.all())
+
+        self.archive()
+
+        self.assertEqual(Trade.objects.filter(trader=self.trader).count(), 3)
+        after = history_totals(self.trader.trades.all(), self.trader.archived_trades.all())
+        self.assertEqual(after.keys(), before.keys())
+        for key in before:
+            self.assertAlmostEqual(after[key], before[key], places=6, msg=key)
+        self.assertEqual((after['count'], after['open'], after['closed']), (5, 1, 4))
+        self.assertEqual((after['winning'], after['losing']), (2, 2))
+
+    def test_top_performers_include_archived(self):
+        best = self.closed_trade(400, exit_price=1.5)
+        middle = self.closed_trade(10, exit_price=1.3)
+        worst = self.closed_trade(5, exit_price=1.0)
+        self.archive()
+
+        response = self.client.get('/api/trades/top_performers/', {'limit': 2})
+        self.assertEqual([row['id'] for row in response.json()], [best.pk, middle.pk])
+        response = self.client.get('/api/trades/top_performers/')
+        self.assertEqual([row['id'] for row in response.json()], [best.pk, middle.pk, worst.pk])
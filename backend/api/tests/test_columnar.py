@@ -0,0 +1,70 @@
+import os
+import shutil
+import tempfile
+from datetime import datetime, timezone as dt_timezone
+
+from django.test import TestCase
+
+from api.columnar import ColumnarExporter, iter_months, load_columns
+from api.models import Trade
+
+from .helpers import make_trade, make_trader
+
+
+class ColumnarExportTests(TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root, ignore_errors=True)
+        self.trader = make_trader()
+
+    def close(self, year, month, day):
+        trade = make_trade(self.trader, status='closed', exit_price=1.2)
+        Trade.objects.filter(pk=trade.pk).update(closed_at=datetime(year, month, day, tzinfo=dt_timezone.utc))
+        return trade.pk
+
+    def export(self):
+        return ColumnarExporter('trades', root=self.root).export()
+
+    def month_entries(self, month):
+        return sorted(name for name in os.listdir(os.path.join(self.root, 'trades', month)) if not name.startswith('.'))
+
+    def test_runs_add_parts_without_rewriting_the_month(self):
+        first = self.close(2024, 1, 5)
+        self.export()
+        [part] = self.month_entries('2024-01')
+        first_file = os.path.join(self.root, 'trades', '2024-01', part, 'id.npy')
+        first_inode = os.stat(first_file).st_ino
+
+        second = self.close(2024, 1, 6)
+        self.assertEqual(self.export(), 1)
+
+        self.assertEqual(len(self.month_entries('2024-01')), 2)
+        self.assertEqual(os.stat(first_file).st_ino, first_inode)
+        self.assertEqual(list(load_columns('trades', ['id'], root=self.root)['id']), [first, second])
+
+    def test_month_is_compacted_once_closed(self):
+        ids = [self.close(2024, 1, 5)]
+        self.export()
+        ids.append(self.close(2024, 1, 6))
+        self.export()
+        ids.append(self.close(2024, 2, 1))
+        self.export()
+
+        self.assertNotIn('part', ' '.join(self.month_entries('2024-01')))
+        self.assertIn('id.npy', self.month_entries('2024-01'))
+        months = {month: arrays for month, arrays in iter_months('trades', ['id', 'closed_at'], root=self.root)}
+        self.assertEqual(list(months['2024-01']['id']), ids[:2])
+        self.assertEqual(list(months['2024-02']['id']), ids[2:])
+
+    def test_parts_of_an_interrupted_run_are_replaced(self):
+        first = self.close(2024, 1, 5)
+        self.export()
+        second = self.close(2024, 1, 6)
+
+        exporter = ColumnarExporter('trades', root=self.root)
+        exporter.write_watermark = lambda *args, **kwargs: None
+        exporter.export()
+        self.assertEqual(len(self.month_entries('2024-01')), 2)
+
+        self.assertEqual(self.export(), 1)
+        self.assertEqual(list(load_columns('trades', ['id'], root=self.root)['id']), [first, second])
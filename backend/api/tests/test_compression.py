@@ -0,0 +1,31 @@
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from .helpers import make_trade, make_trader
+
+
+class CompressionTests(TestCase):
+    def setUp(self):
+        self.trader = make_trader()
+        for _ in range(5):
+            make_trade(self.trader)
+        self.client = APIClient()
+
+    def test_list_and_history_responses_are_gzipped(self):
+        self.client.force_authenticate(self.trader.user)
+        for url in (
+            '/api/trades/', '/api/trades/by_status/', f'/api/traders/{self.trader.pk}/trades/',
+            f'/api/traders/{self.trader.pk}/trades/?stream=1',
+        ):
+            with self.subTest(url):
+                response = self.client.get(url, HTTP_ACCEPT_ENCODING='gzip')
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response.get('Content-Encoding'), 'gzip')
+
+    def test_auth_responses_are_not_gzipped(self):
+        response = self.client.post(
+            '/api/auth/login/', {'username': 'alice', 'password': 'password'}, HTTP_ACCEPT_ENCODING='gzip'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('access', response.json())
+        self.assertIsNone(response.get('Content-Encoding'))
@@ -0,0 +1,87 @@
+from datetime import timedelta
+
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from api.archive import TradeArchiveService
+from api.cache import get_backend
+
+from .helpers import make_trade, make_trader
+
+
+class ConditionalGetTests(TestCase):
+    def setUp(self):
+        get_backend().clear()
+        self.trader = make_trader()
+        self.trades = [make_trade(self.trader), make_trade(self.trader, currency_pair='GBPUSD')]
+        self.client = APIClient()
+        self.client.force_authenticate(self.trader.user)
+
+    def assertRevalidates(self, url, change):
+        """200, then 304 for the same ETag, then 200 with a new ETag after change()"""
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        # Response cache versions are bumped when the write commits
+        with self.captureOnCommitCallbacks(execute=True):
+            change()
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        return response
+
+    def test_retrieve_revalidates_after_profile_edit(self):
+        url = f'/api/traders/{self.trader.pk}/'
+
+        def edit():
+            self.trader.bio = 'Swing trader'
+            self.trader.save()
+
+        response = self.assertRevalidates(url, edit)
+        self.assertEqual(response.json()['bio'], 'Swing trader')
+
+    def test_trades_revalidate_after_trade_edit(self):
+        url = f'/api/traders/{self.trader.pk}/trades/'
+
+        def edit():
+            response = self.client.patch(f'/api/trades/{self.trades[0].pk}/', {'lot_size': 2.5}, format='json')
+            self.assertEqual(response.status_code, 200)
+
+        response = self.assertRevalidates(url, edit)
+        lots = {row['id']: row['lot_size'] for row in response.json()['results']}
+        self.assertEqual(lots[self.trades[0].pk], 2.5)
+
+    def test_trades_revalidate_after_close(self):
+        url = f'/api/traders/{self.trader.pk}/trades/'
+
+        def close():
+            response = self.client.post(
+                f'/api/trades/{self.trades[1].pk}/close_trade/', {'exit_price': 1.3}, format='json'
+            )
+            self.assertEqual(response.status_code, 200)
+
+        self.assertRevalidates(url, close)
+
+    def test_trades_revalidate_after_archiving(self):
+        old = timezone.now() - timedelta(days=400)
+        self.trades[0].status = 'closed'
+        self.trades[0].exit_price = 1.15
+        self.trades[0].closed_at = old
+        self.trades[0].save()
+        url = f'/api/traders/{self.trader.pk}/trades/'
+
+        response = self.assertRevalidates(url, lambda: TradeArchiveService.archive(cutoff=timezone.now()))
+        self.assertEqual(response.json()['count'], 2)
+
+    def test_stale_validator_on_other_trader_is_unaffected(self):
+        other = make_trader('bob')
+        url = f'/api/traders/{other.pk}/trades/'
+        etag = self.client.get(url)['ETag']
+
+        make_trade(self.trader)
+
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
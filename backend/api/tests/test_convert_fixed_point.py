@@ -0,0 +1,60 @@
+from io import StringIO
+
+from django.apps import apps
+from django.core.management import call_command
+from django.db import connection, models
+from django.db.migrations.state import ProjectState
+from django.test import TransactionTestCase
+
+from api.management.commands.convert_to_fixed_point import Command
+from api.models import Follower
+
+from .helpers import make_follower, make_trader
+
+
+class ConvertToFixedPointTests(TransactionTestCase):
+    """Runs against a follower table whose balance columns are still float"""
+
+    columns = ('current_balance', 'total_profit')
+
+    def setUp(self):
+        state = ProjectState.from_apps(apps)
+        for name in self.columns:
+            state.models['api', 'follower'].fields[name] = models.FloatField()
+        with connection.schema_editor() as editor:
+            editor.delete_model(Follower)
+            editor.create_model(state.apps.get_model('api', 'Follower'))
+        trader = make_trader()
+        self.followers = [make_follower(trader, f'user{i}') for i in range(5)]
+        with connection.cursor() as cursor:
+            cursor.execute('UPDATE api_follower SET current_balance = id + 0.1234564, total_profit = -2.5')
+
+    def convert(self, *args):
+        call_command('convert_to_fixed_point', '--batch-size', '2', *args, stdout=StringIO())
+
+    def test_backfill_then_swap(self):
+        self.convert('--backfill-only')
+        self.assertEqual(Command.column_types('api_follower')['current_balance'], 'FloatField')
+
+        # A write between the backfill and the swap is caught up
+        first = self.followers[0].pk
+        with connection.cursor() as cursor:
+            cursor.execute('UPDATE api_follower SET current_balance = 42.5 WHERE id = %s', [first])
+        self.convert()
+
+        types = Command.column_types('api_follower')
+        for name in self.columns:
+            self.assertEqual(types[name], 'BigIntegerField')
+            self.assertNotIn(name + '_fixed', types)
+        for follower in Follower.objects.order_by('pk'):
+            expected = 42.5 if follower.pk == first else follower.pk + 0.123456
+            self.assertAlmostEqual(follower.current_balance, expected, places=6)
+            self.assertEqual(follower.total_profit, -2.5)
+
+    def test_rerun_is_a_noop(self):
+        self.convert()
+        before = list(Follower.objects.order_by('pk').values_list('current_balance', 'total_profit'))
+        out = StringIO()
+        call_command('convert_to_fixed_point', stdout=out)
+        self.assertEqual(out.getvalue(), '')
+        self.assertEqual(list(Follower.objects.order_by('pk').values_list('current_balance', 'total_profit')), before)
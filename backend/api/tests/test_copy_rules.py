@@ -0,0 +1,110 @@
+from django.test import TestCase
+
+from api.models import Follower
+from api.serializers import FollowerSerializer
+from api.services import TradeCopyingService
+
+from .helpers import make_follower, make_trade, make_trader
+
+
+class CopyCandidateTests(TestCase):
+    """Copy rules applied by copy_candidates() and copy_lot_sizes()"""
+
+    def setUp(self):
+        self.trader = make_trader()
+
+    def candidates(self, trade):
+        return list(Follower.objects.filter(trader=self.trader).copy_candidates(trade).order_by('pk'))
+
+    def copy_lots(self, trade):
+        """Lot size copied to each follower, by follower username"""
+        copies = TradeCopyingService.auto_copy_trade_for_followers(trade)
+        return {copied.follower.follower_user.username: copied.lot_size for copied in copies}
+
+    def test_allowed_pairs(self):
+        anything = make_follower(self.trader, 'any')
+        majors = make_follower(self.trader, 'majors', allowed_pairs='EURUSD,GBPUSD')
+        yen = make_follower(self.trader, 'yen', allowed_pairs='USDJPY')
+
+        self.assertEqual(self.candidates(make_trade(self.trader, currency_pair='GBPUSD')), [anything, majors])
+        self.assertEqual(self.candidates(make_trade(self.trader, currency_pair='USDJPY')), [anything, yen])
+
+    def test_allowed_pairs_match_whole_pairs_only(self):
+        make_follower(self.trader, 'partial', allowed_pairs='EURUSDX,XGBPUSD')
+        self.assertEqual(self.candidates(make_trade(self.trader, currency_pair='GBPUSD')), [])
+
+    def test_max_open_copies(self):
+        limited = make_follower(self.trader, 'limited', max_open_copies=1)
+        unlimited = make_follower(self.trader, 'unlimited')
+
+        self.assertEqual(set(self.copy_lots(make_trade(self.trader))), {'limited', 'unlimited'})
+        self.assertEqual(self.candidates(make_trade(self.trader)), [unlimited])
+        self.assertEqual(set(self.copy_lots(make_trade(self.trader))), {'unlimited'})
+
+        # Closing the open copy frees the slot again
+        first = limited.copied_trades.get()
+        TradeCopyingService.close_trade_copies(first.original_trade, 1.2)
+        self.assertEqual(self.candidates(make_trade(self.trader)), [limited, unlimited])
+
+    def test_max_lot_size_caps_the_copy(self):
+        make_follower(self.trader, 'capped', max_lot_size=500.0)
+        make_follower(self.trader, 'uncapped')
+
+        # 1000 invested at 100% over an entry price of 1.25
+        lots = self.copy_lots(make_trade(self.trader, entry_price=1.25))
+        self.assertEqual(lots, {'capped': 500.0, 'uncapped': 800.0})
+
+    def test_max_pair_exposure(self):
+        make_follower(self.trader, 'limited', max_pair_exposure=1000.0)
+        make_follower(self.trader, 'unlimited')
+
+        self.assertEqual(set(self.copy_lots(make_trade(self.trader, entry_price=1.25))), {'limited', 'unlimited'})
+        # A second 800-lot copy would take the pair to 1600 lots
+        self.assertEqual(set(self.copy_lots(make_trade(self.trader, entry_price=1.25))), {'unlimited'})
+        # Other pairs have their own exposure
+        lots = self.copy_lots(make_trade(self.trader, currency_pair='GBPUSD', entry_price=1.25))
+        self.assertEqual(set(lots), {'limited', 'unlimited'})
+
+    def test_rules_combine(self):
+        make_follower(self.trader, 'strict', allowed_pairs='EURUSD', max_lot_size=100.0, max_open_copies=2)
+
+        self.assertEqual(self.copy_lots(make_trade(self.trader, currency_pair='GBPUSD')), {})
+        self.assertEqual(self.copy_lots(make_trade(self.trader, entry_price=1.25)), {'strict': 100.0})
+        self.assertEqual(self.copy_lots(make_trade(self.trader, entry_price=1.25)), {'strict': 100.0})
+        self.assertEqual(self.copy_lots(make_trade(self.trader, entry_price=1.25)), {})
+
+
+class CopyRuleValidationTests(TestCase):
+    def setUp(self):
+        self.trader = make_trader()
+        self.follower = make_follower(self.trader, 'bob')
+
+    def validate(self, **data):
+        serializer = FollowerSerializer(self.follower, data=data, partial=True)
+        serializer.is_valid()
+        return serializer
+
+    def test_allowed_pairs_are_normalized(self):
+        serializer = self.validate(allowed_pairs=' eurusd, GBPUSD,,eurusd ')
+        self.assertEqual(serializer.errors, {})
+        self.assertEqual(serializer.validated_data['allowed_pairs'], 'EURUSD,GBPUSD')
+
+    def test_unknown_pairs_are_rejected(self):
+        serializer = self.validate(allowed_pairs='EURUSD,XAUUSD,BTCUSD')
+        self.assertIn('allowed_pairs', serializer.errors)
+        self.assertIn('XAUUSD, BTCUSD', str(serializer.errors['allowed_pairs'][0]))
+
+    def test_blank_allowed_pairs_means_any(self):
+        serializer = self.validate(allowed_pairs='')
+        self.assertEqual(serializer.errors, {})
+        self.assertEqual(serializer.validated_data['allowed_pairs'], '')
+
+    def test_negative_limits_are_rejected(self):
+        for name in ('max_lot_size', 'max_pair_exposure'):
+            with self.subTest(name=name):
+                self.assertIn(name, self.validate(**{name: -1}).errors)
+        self.assertIn('max_open_copies', self.validate(max_open_copies=-1).errors)
+
+    def test_zero_and_positive_limits_are_accepted(self):
+        serializer = self.validate(max_lot_size=0, max_pair_exposure=2.5, max_open_copies=3)
+        self.assertEqual(serializer.errors, {})
@@ -0,0 +1,114 @@
+from unittest import mock
+
+from django.core.cache import caches
+from django.db import connections
+from django.test import RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from api.db_router import PrimaryReplicaRouter, ReplicaRoutingMiddleware, pin_primary, replica_health
+from api.models import Trade
+
+from .helpers import make_trader
+
+
+@override_settings(DATABASE_REPLICAS=['replica_0'], REPLICA_STICKY_SECONDS=5)
+class ReplicaRoutingTests(TestCase):
+    """Primary/replica routing with two SQLite aliases, 'default' and 'replica_0'"""
+    databases = {'default', 'replica_0'}
+
+    def setUp(self):
+        caches['default'].clear()
+        replica_health._checked.clear()
+        self.router = PrimaryReplicaRouter()
+        self.trader = make_trader()
+        self.user = self.trader.user
+
+    def route(self, method, user=None, status=200):
+        """Serve a request through the routing middleware and return the read and write aliases inside it"""
+        seen = {}
+
+        def view(request):
+            seen['read'] = self.router.db_for_read(Trade)
+            seen['write'] = self.router.db_for_write(Trade)
+            return mock.Mock(status_code=status)
+
+        request = getattr(RequestFactory(), method.lower())('/api/trades/')
+        if user is not None:
+            # What DRF leaves on the request once it has authenticated
+            request.user = user
+        ReplicaRoutingMiddleware(view)(request)
+        return seen['read'], seen['write']
+
+    def test_safe_requests_read_from_the_replica(self):
+        for method in ('GET', 'HEAD', 'OPTIONS'):
+            with self.subTest(method=method):
+                self.assertEqual(self.route(method, self.user), ('replica_0', 'default'))
+
+    def test_writes_and_unsafe_requests_use_the_primary(self):
+        for method in ('POST', 'PUT', 'PATCH', 'DELETE'):
+            with self.subTest(method=method):
+                self.assertEqual(self.route(method), ('default', 'default'))
+
+    def test_outside_requests_use_the_primary(self):
+        self.assertEqual(self.router.db_for_read(Trade), 'default')
+        self.assertEqual(self.router.db_for_write(Trade), 'default')
+
+    def test_write_request_queries_only_the_primary(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        with CaptureQueriesContext(connections['default']) as primary, \
+                CaptureQueriesContext(connections['replica_0']) as replica:
+            response = client.post('/api/trades/', {
+                'trader': self.trader.pk, 'currency_pair': 'EURUSD', 'direction': 'buy',
+                'entry_price': 1.1, 'stop_loss': 1.0, 'take_profit': 1.2, 'lot_size': 1.0,
+            }, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertTrue(any(query['sql'].startswith('INSERT') for query in primary.captured_queries))
+        self.assertEqual(replica.captured_queries, [])
+
+    def test_reads_stick_to_the_primary_after_a_write(self):
+        other = make_trader('bob').user
+        client = APIClient()
+        client.force_authenticate(self.user)
+        response = client.post('/api/trades/', {
+            'trader': self.trader.pk, 'currency_pair': 'EURUSD', 'direction': 'buy',
+            'entry_price': 1.1, 'stop_loss': 1.0, 'take_profit': 1.2, 'lot_size': 1.0,
+        }, format='json')
+        self.assertEqual(response.status_code, 201)
+
+        self.assertEqual(self.route('GET', self.user)[0], 'default')
+        # Only the writer sticks, and anonymous reads never do
+        self.assertEqual(self.route('GET', other)[0], 'replica_0')
+        self.assertEqual(self.route('GET')[0], 'replica_0')
+
+    def test_stickiness_expires(self):
+        self.route('POST', self.user, status=201)
+        self.assertEqual(self.route('GET', self.user)[0], 'default')
+
+        caches['default'].clear()  # REPLICA_STICKY_SECONDS elapsed
+        self.assertEqual(self.route('GET', self.user)[0], 'replica_0')
+
+    def test_failed_writes_do_not_stick(self):
+        self.route('POST', self.user, status=400)
+        self.assertEqual(self.route('GET', self.user)[0], 'replica_0')
+
+    def test_pin_primary(self):
+        seen = {}
+
+        def view(request):
+            with pin_primary():
+                seen['pinned'] = self.router.db_for_read(Trade)
+            seen['after'] = self.router.db_for_read(Trade)
+            return mock.Mock(status_code=200)
+
+        ReplicaRoutingMiddleware(view)(RequestFactory().get('/'))
+        self.assertEqual(seen, {'pinned': 'default', 'after': 'replica_0'})
+
+    def test_unhealthy_replica_falls_back_to_the_primary(self):
+        with mock.patch.object(replica_health, 'check', return_value=False):
+            self.assertEqual(self.route('GET', self.user)[0], 'default')
+
+    @override_settings(DATABASE_REPLICAS=[])
+    def test_no_replicas(self):
+        self.assertEqual(self.route('GET', self.user), ('default', 'default'))
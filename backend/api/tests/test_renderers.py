@@ -0,0 +1,43 @@
+import datetime
+import uuid
+from decimal import Decimal
+
+from django.test import SimpleTestCase
+from django.utils.translation import gettext_lazy
+from rest_framework.renderers import JSONRenderer
+
+from api.renderers import FastJSONRenderer
+
+
+class FastJSONRendererTests(SimpleTestCase):
+    def test_matches_drf_byte_for_byte(self):
+        payloads = {
+            'plain': {'id': 1, 'pair': 'EURUSD', 'price': 1.1, 'closed': None, 'open': True},
+            'small float': {'profit': 0.00005, 'fee': -1e-06},
+            'large float': [1e16, 1.5e300, 9999999999999998.0],
+            'zero': [0.0, -0.0],
+            'non-string keys': {1: 'a', True: 'b', None: 'c', 2.5: 'd'},
+            'fallback types': [
+                Decimal('0.00001'), gettext_lazy('Trades'), uuid.UUID(int=1),
+                datetime.datetime(2024, 1, 2, 3, 4, 5, 6, tzinfo=datetime.timezone.utc), datetime.date(2024, 1, 2),
+            ],
+            'strings': ['café', 'line sep ', '\x00\x1f\x7f', '</script>', '"quoted"\\'],
+            'big integer': [2 ** 70],
+            'nested': {'results': [{'roi': 12.5, 'history': [[1, 2e-05]]}], 'next': None},
+        }
+        for name, data in payloads.items():
+            with self.subTest(name):
+                self.assertEqual(FastJSONRenderer().render(data), JSONRenderer().render(data))
+
+    def test_unencodable_data_fails_like_drf(self):
+        cases = {
+            'nan': (float('nan'), ValueError),
+            'infinity': (float('-inf'), ValueError),
+            'object': (object(), TypeError),
+        }
+        for name, (value, error) in cases.items():
+            with self.subTest(name):
+                with self.assertRaises(error):
+                    JSONRenderer().render({'value': value})
+                with self.assertRaises(error):
+                    FastJSONRenderer().render({'value': value})
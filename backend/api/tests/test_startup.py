@@ -0,0 +1,32 @@
+from django.conf import settings
+from django.test import SimpleTestCase
+
+from api.management.commands.profile_imports import measure_cold_start
+
+
+class ColdStartTests(SimpleTestCase):
+    """Loading the WSGI application stays within COLD_START_BUDGET_MS"""
+
+    # Loaded on first use by the request paths that need them
+    LAZY_MODULES = ('numpy',)
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        # Best of three, so one slow run on a busy machine does not fail the suite
+        runs = [measure_cold_start() for _ in range(3)]
+        cls.startup_ms, cls.imports = min(runs, key=lambda run: run[0])
+
+    def test_cold_start_within_budget(self):
+        budget = settings.COLD_START_BUDGET_MS
+        slowest = sorted(self.imports, key=lambda row: row[2], reverse=True)[:5]
+        self.assertLessEqual(
+            self.startup_ms, budget,
+            f'Cold start took {self.startup_ms:.0f}ms, over the {budget:.0f}ms budget; slowest imports: '
+            + ', '.join(f'{module} {cumulative / 1000:.0f}ms' for module, _, cumulative in slowest)
+        )
+
+    def test_heavy_modules_are_not_imported_at_startup(self):
+        imported = {module for module, _, _ in self.imports}
+        for module in self.LAZY_MODULES:
+            self.assertNotIn(module, imported)
@@ -0,0 +1,259 @@
+"""
+Append-only, memory-mapped tick history per currency pair
+
+Each pair's ticks live in one file of fixed-width 24-byte records::
+
+    <TICK_STORE_DIR>/<PAIR>.ticks
+
+    ts   int64  naive UTC microseconds (datetime64[us])
+    bid  int64  PRICE_SCALE units
+    ask  int64  PRICE_SCALE units
+
+Records are only ever appended, in non-decreasing time order, so the file
+is sorted by ``ts``. Readers memory-map it and binary-search the timestamp
+column, so a range query touches only the pages it returns and OHLC
+resampling walks the range in fixed-size chunks; hundreds of millions of
+ticks per pair never have to fit in memory. A record left half-written by
+an interrupted append is ignored by readers and cut off by the next append.
+"""
+import os
+import re
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+import numpy as np
+from django.conf import settings
+
+from .fixedpoint import PRICE_SCALE
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - not available on Windows
+    fcntl = None
+
+
+TICK_DTYPE = np.dtype([('ts', '<M8[us]'), ('bid', '<i8'), ('ask', '<i8')])
+
+SUFFIX = '.ticks'
+
+PAIR_RE = re.compile(r'^[A-Z0-9]{3,12}$')
+
+PRICE_FIELDS = ('bid', 'ask', 'mid')
+
+
+def get_root(root=None):
+    return str(root or getattr(settings, 'TICK_STORE_DIR', os.path.join(settings.BASE_DIR, 'ticks')))
+
+
+def list_pairs(root=None):
+    """Return the pairs that have a tick file, sorted"""
+    path = get_root(root)
+    if not os.path.isdir(path):
+        return []
+    return sorted(name[:-len(SUFFIX)] for name in os.listdir(path) if name.endswith(SUFFIX))
+
+
+def to_timestamp(value):
+    """datetime, date string or epoch seconds as a naive UTC datetime64[us]"""
+    if value is None or isinstance(value, np.datetime64):
+        return None if value is None else value.astype('M8[us]')
+    if isinstance(value, datetime):
+        if value.tzinfo is not None:
+            value = value.astimezone(dt_timezone.utc).replace(tzinfo=None)
+        return np.datetime64(value, 'us')
+    if isinstance(value, (int, float)):
+        return np.datetime64(int(round(value * 1_000_000)), 'us')
+    return np.datetime64(value, 'us')
+
+
+def to_interval(value):
+    """Bucket width as timedelta64[us]; seconds, a timedelta or a timedelta64"""
+    if isinstance(value, timedelta):
+        value = np.timedelta64(value)
+    elif not isinstance(value, np.timedelta64):
+        value = np.timedelta64(int(round(value * 1_000_000)), 'us')
+    value = value.astype('m8[us]')
+    if value <= np.timedelta64(0, 'us'):
+        raise ValueError('Interval must be positive')
+    return value
+
+
+def prices(records, field='mid'):
+    """bid, ask or mid prices of tick records as float64"""
+    if field == 'mid':
+        return (records['bid'] + records['ask']) / (2 * PRICE_SCALE)
+    if field not in PRICE_FIELDS:
+        raise ValueError(f'Unknown price field {field!r}')
+    return records[field] / PRICE_SCALE
+
+
+class TickStore:
+    """Tick file of one currency pair"""
+
+    def __init__(self, pair, root=None):
+        if not PAIR_RE.match(pair):
+            raise ValueError(f'Invalid currency pair {pair!r}')
+        self.pair = pair
+        self.path = os.path.join(get_root(root), pair + SUFFIX)
+
+    def __len__(self):
+        try:
+            return os.path.getsize(self.path) // TICK_DTYPE.itemsize
+        except FileNotFoundError:
+            return 0
+
+    def records(self):
+        """
+        All complete records as a read-only memory map
+
+        The map covers the file as it was when called; later appends need
+        a new call.
+        """
+        count = len(self)
+        if not count:
+            return np.empty(0, dtype=TICK_DTYPE)
+        return np.memmap(self.path, dtype=TICK_DTYPE, mode='r', shape=(count,))
+
+    def first(self):
+        records = self.records()
+        return records[0] if len(records) else None
+
+    def last(self):
+        records = self.records()
+        return records[-1] if len(records) else None
+
+    def append(self, ts, bid, ask):
+        """
+        Append ticks to the end of the file
+
+        Args:
+            ts: Timestamps (datetime64 array or anything to_timestamp() takes)
+            bid, ask: Prices as floats, or int64 arrays already in
+                PRICE_SCALE units
+
+        Returns:
+            Number of ticks appended
+
+        Raises:
+            ValueError: The ticks are not in time order or start before the
+                last stored tick
+        """
+        ts = np.asarray(ts)
+        if ts.dtype.kind != 'M':
+            ts = np.array([to_timestamp(value) for value in ts.ravel()], dtype='M8[us]')
+        ts = ts.astype('M8[us]', copy=False)
+
+        batch = np.empty(len(ts), dtype=TICK_DTYPE)
+        batch['ts'] = ts
+        for name, values in (('bid', bid), ('ask', ask)):
+            values = np.asarray(values)
+            if values.dtype.kind != 'i':
+                values = np.rint(values.astype(np.float64) * PRICE_SCALE)
+            batch[name] = values
+        if not len(batch):
+            return 0
+        if np.any(batch['ts'][1:] < batch['ts'][:-1]):
+            raise ValueError(f'{self.pair}: ticks are not in time order')
+
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with open(self.path, 'ab') as handle:
+            if fcntl is not None:
+                fcntl.flock(handle, fcntl.LOCK_EX)
+            try:
+                size = handle.seek(0, os.SEEK_END)
+                complete = size - size % TICK_DTYPE.itemsize
+                if complete != size:
+                    # Drop what an interrupted append left behind
+                    handle.truncate(complete)
+                last = self.last() if complete else None
+                if last is not None and batch['ts'][0] < last['ts']:
+                    raise ValueError(
+                        f'{self.pair}: tick at {batch["ts"][0]} is older than the last stored tick {last["ts"]}'
+                    )
+                handle.write(batch.tobytes())
+                handle.flush()
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(handle, fcntl.LOCK_UN)
+        return len(batch)
+
+    def bounds(self, start=None, end=None):
+        """Record positions [first, stop) of ticks with start <= ts < end"""
+        ts = self.records()['ts']
+        first = 0 if start is None else int(np.searchsorted(ts, to_timestamp(start), side='left'))
+        stop = len(ts) if end is None else int(np.searchsorted(ts, to_timestamp(end), side='left'))
+        return first, max(first, stop)
+
+    def range(self, start=None, end=None):
+        """
+        Ticks with start <= ts < end
+
+        Returns:
+            Read-only memory-mapped view of TICK_DTYPE records; nothing is
+            read from disk until it is used
+        """
+        first, stop = self.bounds(start, end)
+        return self.records()[first:stop]
+
+    def price_at(self, when, field='mid'):
+        """Price of the last tick at or before ``when``, or None"""
+        records = self.records()
+        position = int(np.searchsorted(records['ts'], to_timestamp(when), side='right'))
+        if not position:
+            return None
+        return float(prices(records[position - 1:position], field)[0])
+
+    def ohlc(self, interval, start=None, end=None, field='mid', chunk_size=1_000_000):
+        """
+        Resample ticks into OHLC bars
+
+        Bars are aligned to the Unix epoch (a 1-hour bar starts on the hour)
+        and only bars with ticks are returned. The range is processed
+        ``chunk_size`` ticks at a time, so memory use does not grow with it.
+
+        Args:
+            interval: Bar width in seconds, timedelta or timedelta64
+            start, end: Optional time range, start inclusive, end exclusive
+            field: 'bid', 'ask' or 'mid'
+            chunk_size: Ticks per processing chunk
+
+        Returns:
+            Dictionary of equal-length arrays: time (bar start,
+            datetime64[us]), open, high, low, close (float64) and ticks
+            (int64)
+        """
+        interval = to_interval(interval).astype(np.int64)
+        records = self.range(start, end)
+        parts = []
+        for offset in range(0, len(records), chunk_size):
+            chunk = records[offset:offset + chunk_size]
+            bar = chunk['ts'].astype(np.int64) // interval
+            values = prices(chunk, field)
+
+            starts = np.concatenate(([0], np.flatnonzero(bar[1:] != bar[:-1]) + 1))
+            part = {
+                'bar': bar[starts],
+                'open': values[starts],
+                'high': np.maximum.reduceat(values, starts),
+                'low': np.minimum.reduceat(values, starts),
+                'close': values[np.append(starts[1:], len(values)) - 1],
+                'ticks': np.diff(np.append(starts, len(values))),
+            }
+
+            # A bar split across chunks is merged into the previous part
+            if parts and parts[-1]['bar'][-1] == part['bar'][0]:
+                previous = parts[-1]
+                previous['high'][-1] = max(previous['high'][-1], part['high'][0])
+                previous['low'][-1] = min(previous['low'][-1], part['low'][0])
+                previous['close'][-1] = part['close'][0]
+                previous['ticks'][-1] += part['ticks'][0]
+                part = {name: column[1:] for name, column in part.items()}
+            if len(part['bar']):
+                parts.append(part)
+
+        names = ('bar', 'open', 'high', 'low', 'close', 'ticks')
+        if not parts:
+            columns = {name: np.empty(0, dtype=np.int64 if name in ('bar', 'ticks') else np.float64) for name in names}
+        else:
+            columns = {name: np.concatenate([part[name] for part in parts]) for name in names}
+        bar = columns.pop('bar')
+        return {'time': (bar * interval).astype('M8[us]'), **columns}
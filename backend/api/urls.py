@@ -1,11 +1,12 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import TraderViewSet, TradeViewSet, FollowerViewSet
+from .views import TraderViewSet, TradeViewSet, FollowerViewSet, MarketViewSet
 
 router = DefaultRouter()
 router.register(r'traders', TraderViewSet, basename='trader')
 router.register(r'trades', TradeViewSet, basename='trade')
 router.register(r'followers', FollowerViewSet, basename='follower')
+router.register(r'markets', MarketViewSet, basename='market')
 
 urlpatterns = [
     path('', include(router.urls)),
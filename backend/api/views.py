@@ -1,81 +1,246 @@
 from rest_framework import viewsets, status, filters
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from django_filters.rest_framework import DjangoFilterBackend
 from django.shortcuts import get_object_or_404
+import copy
+from datetime import datetime, time
+from django.db import transaction
 from django.db.models import Q, Avg, Sum
 from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from django.utils.decorators import method_decorator
+from django.views.decorators.gzip import gzip_page
+from django.views.decorators.http import condition
 
-from .models import Trader, Trade, Follower, CopiedTrade
+from .models import Trader, Trade, ArchivedTrade, Follower, CopiedTrade, FollowerTeardown
 from .serializers import (
-    TraderSerializer, TradeSerializer, FollowerSerializer, CopiedTradeSerializer
+    TraderSerializer, TradeSerializer, FollowerSerializer, CopiedTradeSerializer,
+    FollowerTeardownSerializer
+)
+from .serializers_fast import FastTraderSerializer, FastTradeSerializer, FastFollowerSerializer
+from .services import TradeCopyingService, TraderDashboardService, PortfolioService
+from .events import EventJournal
+from .markets import MarketStats
+from .exposure import ExposureIndex
+from .teardown import FollowerTeardownService
+from .archive import TradeArchiveService, history_totals
+from .mixins import FastReadMixin, SparseFieldsetMixin
+from .cache import cache_trader_response
+from .search import TraderSearchFilter, get_autocomplete_backend
+from .conditional import (
+    trader_etag, trader_last_modified, trader_stats_etag, trader_trades_etag
 )
 
 
-class TraderViewSet(viewsets.ModelViewSet):
-    queryset = Trader.objects.all()
+class TraderViewSet(SparseFieldsetMixin, FastReadMixin, viewsets.ModelViewSet):
+    queryset = Trader.objects.select_related('user')
     serializer_class = TraderSerializer
+    fast_serializer_class = FastTraderSerializer
     permission_classes = [AllowAny]
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [DjangoFilterBackend, filters.OrderingFilter, TraderSearchFilter]
     filterset_fields = ['experience_level', 'is_verified']
-    search_fields = ['user__username', 'user__first_name', 'user__last_name']
     ordering_fields = ['rating', 'total_followers', 'total_profit']
     ordering = ['-rating']
+    sparse_fields = TraderSerializer.Meta.fields
+
+    @method_decorator(condition(etag_func=trader_etag, last_modified_func=trader_last_modified))
+    @cache_trader_response('retrieve')
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
 
     @action(detail=True, methods=['get'])
+    @method_decorator(condition(etag_func=trader_stats_etag, last_modified_func=trader_last_modified))
+    @cache_trader_response('stats')
     def stats(self, request, pk=None):
         trader = self.get_object()
-        stats = {
-            'total_followers': trader.total_followers,
-            'total_trades': trader.total_trades,
-            'win_rate': trader.win_rate,
-            'total_profit': trader.total_profit,
-            'avg_roi': trader.avg_roi,
-            'monthly_return': trader.monthly_return,
-            'rating': trader.rating,
-        }
-        return Response(stats)
+        return Response(TraderDashboardService.stats(trader))
+
+    @action(detail=True, methods=['get'])
+    @cache_trader_response('dashboard')
+    def dashboard(self, request, pk=None):
+        # Everything the trader profile page shows in four queries: trader
+        # with follower totals, recent trades and exposure (two)
+        try:
+            limit = min(int(request.query_params.get('trades_limit', 20)), 100)
+        except ValueError:
+            return Response(
+                {'error': 'trades_limit must be an integer'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        traders = TraderDashboardService.with_follower_summary(Trader.objects.all())
+        recent_trades = Trade.objects.filter(trader_id=pk).order_by('-opened_at')[:max(limit, 0)]
+        context = self.get_serializer_context()
+        
+        if self.use_fast_serializer():
+            row = get_object_or_404(
+                traders.values(*FastTraderSerializer.values_lookups(), *TraderDashboardService.SUMMARY_FIELDS),
+                pk=pk
+            )
+            profile = FastTraderSerializer(row, context=context).data
+            stats = {name: profile[name] for name in TraderDashboardService.STATS_FIELDS}
+            totals = row
+            trades = FastTradeSerializer(FastTradeSerializer.rows(recent_trades), many=True).data
+        else:
+            trader = get_object_or_404(traders.select_related('user'), pk=pk)
+            profile = TraderSerializer(trader, context=context).data
+            stats = TraderDashboardService.stats(trader)
+            totals = {name: getattr(trader, name) for name in TraderDashboardService.SUMMARY_FIELDS}
+            trades = TradeSerializer(recent_trades.select_related('trader__user'), many=True).data
+        
+        return Response({
+            'trader': profile,
+            'stats': stats,
+            'recent_trades': trades,
+            'followers': TraderDashboardService.follower_summary(totals),
+            'exposure': TraderDashboardService.exposure(pk),
+        })
 
     @action(detail=True, methods=['get'])
+    @method_decorator(gzip_page)
+    @method_decorator(condition(etag_func=trader_trades_etag))
     def trades(self, request, pk=None):
         trader = self.get_object()
-        trades = trader.trades.all()
-        serializer = TradeSerializer(trades, many=True)
-        return Response(serializer.data)
+        trades = trader.trades.order_by('-opened_at', '-id')
+        
+        since = request.query_params.get('since')
+        if since is not None:
+            since = parse_datetime(since) or parse_date(since)
+            if since is None:
+                return Response(
+                    {'error': 'since must be an ISO 8601 date or datetime'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            if not isinstance(since, datetime):
+                since = datetime.combine(since, time.min)
+            if timezone.is_naive(since):
+                since = timezone.make_aware(since)
+            trades = trades.filter(opened_at__gte=since)
+        
+        # Archived history is added when the requested range (all history
+        # without ?since=) reaches back to the newest archived trade
+        if not TradeArchiveService.range_needs_archive(since):
+            if self.use_fast_serializer():
+                return self.list_response(FastTradeSerializer.rows(trades), FastTradeSerializer)
+            return self.list_response(trades.select_related('trader__user'), TradeSerializer)
+        
+        archived = trader.archived_trades.all()
+        if since is not None:
+            archived = archived.filter(opened_at__gte=since)
+        rows = FastTradeSerializer.rows(trades.order_by()).union(
+            FastTradeSerializer.rows(archived.order_by()), all=True
+        ).order_by('-opened_at', '-id')
+        return self.list_response(rows, FastTradeSerializer)
+
+    @action(detail=False, methods=['get'])
+    def autocomplete(self, request):
+        query = request.query_params.get('q', '')
+        try:
+            limit = int(request.query_params.get('limit', 10))
+        except ValueError:
+            return Response({'error': 'limit must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
+        limit = max(1, min(limit, 50))
+        ranked = get_autocomplete_backend().search(query, limit=limit)
+        
+        rows = {
+            row['id']: row for row in Trader.objects.filter(id__in=[trader_id for trader_id, _ in ranked]).values(
+                'id', 'rating', 'user__username', 'user__first_name', 'user__last_name'
+            )
+        }
+        results = [
+            {
+                'id': trader_id,
+                'username': rows[trader_id]['user__username'],
+                'full_name': ('%s %s' % (rows[trader_id]['user__first_name'], rows[trader_id]['user__last_name'])).strip(),
+                'rating': rows[trader_id]['rating'],
+            }
+            for trader_id, _ in ranked if trader_id in rows
+        ]
+        return Response(results)
 
     @action(detail=True, methods=['get'])
+    @method_decorator(gzip_page)
+    @cache_trader_response('followers_list')
     def followers_list(self, request, pk=None):
         trader = self.get_object()
-        followers = trader.followers.all()
-        serializer = FollowerSerializer(followers, many=True)
-        return Response(serializer.data)
+        followers = trader.followers.filter(is_active=True).with_ledger().order_by('-followed_at', '-id')
+        if self.use_fast_serializer():
+            return self.list_response(FastFollowerSerializer.rows(followers), FastFollowerSerializer)
+        return self.list_response(
+            followers.select_related('trader__user', 'follower_user'), FollowerSerializer
+        )
 
 
-class TradeViewSet(viewsets.ModelViewSet):
-    queryset = Trade.objects.all()
+class TradeViewSet(SparseFieldsetMixin, FastReadMixin, viewsets.ModelViewSet):
+    """
+    Live trades
+
+    list, retrieve and by_status read the hot Trade table only, so trades
+    archived after ARCHIVE_AFTER_DAYS (api.archive) drop out of them; a
+    trader's full history, archive included, is /traders/<id>/trades/.
+    top_performers ranks archived trades as well.
+    """
+    queryset = Trade.objects.select_related('trader__user')
     serializer_class = TradeSerializer
+    fast_serializer_class = FastTradeSerializer
     permission_classes = [AllowAny]
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
     filterset_fields = ['trader', 'currency_pair', 'direction', 'status']
     search_fields = ['currency_pair', 'description']
     ordering_fields = ['opened_at', 'profit_loss', 'roi_percentage']
     ordering = ['-opened_at']
+    sparse_fields = TradeSerializer.Meta.fields
+    sparse_field_lookups = {'trader_name': ['trader__user__first_name', 'trader__user__last_name']}
+    sparse_actions = ('list', 'retrieve', 'by_status', 'top_performers')
 
     def perform_create(self, serializer):
-        serializer.save()
+        with transaction.atomic():
+            trade = serializer.save()
+            EventJournal.trade_opened(trade)
+            MarketStats.record([(None, trade)])
+            ExposureIndex.record_trades([(None, trade)])
+
+    def perform_update(self, serializer):
+        previous = copy.copy(serializer.instance)
+        new_status = serializer.validated_data.get('status', previous.status)
+        # Closing journals the close, cascades to copies and computes P&L;
+        # an edit doing it would leave the journal without the transition
+        if new_status != previous.status and 'closed' in (new_status, previous.status):
+            raise ValidationError({'status': 'Use close_trade to close a trade; closed trades cannot be reopened'})
+        with transaction.atomic():
+            trade = serializer.save()
+            MarketStats.record([(previous, trade)])
+            ExposureIndex.record_trades([(previous, trade)])
+
+    def perform_destroy(self, instance):
+        with transaction.atomic():
+            EventJournal.trade_deleted(instance)
+            MarketStats.record([(instance, None)])
+            ExposureIndex.record_trades([(instance, None)])
+            instance.delete()
 
     @action(detail=False, methods=['get'])
+    @method_decorator(gzip_page)
     def by_status(self, request):
         status_filter = request.query_params.get('status', 'open')
-        trades = Trade.objects.filter(status=status_filter)
-        serializer = self.get_serializer(trades, many=True)
-        return Response(serializer.data)
+        trades = self.get_queryset().filter(status=status_filter)
+        if self.use_fast_serializer():
+            return self.list_response(self.get_fast_rows(trades), self.get_fast_serializer)
+        return self.list_response(trades)
 
     @action(detail=False, methods=['get'])
     def top_performers(self, request):
         limit = int(request.query_params.get('limit', 10))
-        trades = Trade.objects.filter(status='closed').order_by('-roi_percentage')[:limit]
+        trades = list(self.get_queryset().filter(status='closed').order_by('-roi_percentage')[:limit])
+        # Archived trades are closed ones too; the best of both tables is
+        # at most the best ``limit`` of each
+        if TradeArchiveService.range_needs_archive(None):
+            archived = ArchivedTrade.objects.filter(status='closed').select_related('trader__user')
+            trades += archived.order_by('-roi_percentage')[:limit]
+            trades = sorted(trades, key=lambda trade: trade.roi_percentage, reverse=True)[:limit]
         serializer = self.get_serializer(trades, many=True)
         return Response(serializer.data)
 
@@ -90,31 +255,58 @@ class TradeViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        trade.exit_price = exit_price
-        trade.status = 'closed'
-        trade.closed_at = timezone.now()
-        
-        # Calculate profit/loss
-        if trade.direction == 'buy':
-            trade.profit_loss = (exit_price - trade.entry_price) * trade.lot_size
-        else:
-            trade.profit_loss = (trade.entry_price - exit_price) * trade.lot_size
-        
-        trade.roi_percentage = (trade.profit_loss / (trade.entry_price * trade.lot_size)) * 100
-        trade.save()
+        with transaction.atomic():
+            # Locked so a concurrent close cannot pass the check as well
+            trade = Trade.objects.select_for_update(of=('self',)).select_related('trader__user').get(pk=trade.pk)
+            if trade.status == 'closed':
+                return Response(
+                    {'error': 'Trade is already closed'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            
+            previous = copy.copy(trade)
+            trade.exit_price = exit_price
+            trade.status = 'closed'
+            trade.closed_at = timezone.now()
+            
+            # Calculate profit/loss
+            trade.profit_loss, trade.roi_percentage = TradeCopyingService.calculate_profit_loss(
+                entry_price=trade.entry_price,
+                exit_price=exit_price,
+                lot_size=trade.lot_size,
+                direction=trade.direction
+            )
+            trade.save()
+            EventJournal.trade_closed(trade)
+            MarketStats.record([(previous, trade)])
+            ExposureIndex.record_trades([(previous, trade)])
+            
+            # Close every follower's copy at the same exit price, in the
+            # same transaction so a failure leaves the trade open too
+            TradeCopyingService.close_trade_copies(trade, exit_price)
         
         serializer = self.get_serializer(trade)
         return Response(serializer.data)
 
 
-class FollowerViewSet(viewsets.ModelViewSet):
-    queryset = Follower.objects.all()
+class FollowerViewSet(SparseFieldsetMixin, FastReadMixin, viewsets.ModelViewSet):
+    queryset = Follower.objects.filter(is_active=True).with_ledger().select_related('trader__user', 'follower_user')
     serializer_class = FollowerSerializer
+    fast_serializer_class = FastFollowerSerializer
     permission_classes = [IsAuthenticated]
     filter_backends = [DjangoFilterBackend, filters.OrderingFilter]
     filterset_fields = ['trader', 'follower_user', 'auto_copy_trades']
     ordering_fields = ['followed_at', 'total_profit']
     ordering = ['-followed_at']
+    sparse_fields = FollowerSerializer.Meta.fields
+    sparse_field_lookups = {
+        'trader_name': ['trader__user__first_name', 'trader__user__last_name'],
+        'follower_name': ['follower_user__first_name', 'follower_user__last_name'],
+    }
+
+    def perform_update(self, serializer):
+        # FollowerSerializer.update() saves only the validated fields
+        serializer.save()
 
     @action(detail=False, methods=['post'])
     def follow_trader(self, request):
@@ -131,16 +323,29 @@ class FollowerViewSet(viewsets.ModelViewSet):
         
         trader = get_object_or_404(Trader, id=trader_id)
         
-        follower, created = Follower.objects.get_or_create(
-            trader=trader,
-            follower_user=request.user,
-            defaults={
-                'auto_copy_trades': auto_copy,
-                'copy_percentage': copy_percentage,
-                'initial_investment': initial_investment,
-                'current_balance': initial_investment,
-            }
-        )
+        with transaction.atomic():
+            follower, created = Follower.objects.get_or_create(
+                trader=trader,
+                follower_user=request.user,
+                defaults={
+                    'auto_copy_trades': auto_copy,
+                    'copy_percentage': copy_percentage,
+                    'initial_investment': initial_investment,
+                    'current_balance': initial_investment,
+                }
+            )
+            if created:
+                EventJournal.followed(follower)
+        
+        if not created and not follower.is_active:
+            teardown = FollowerTeardown.objects.filter(follower_id=follower.pk).first()
+            return Response(
+                {
+                    'error': 'Your previous follow of this trader is still being removed',
+                    'teardown_id': teardown.pk if teardown else None,
+                },
+                status=status.HTTP_400_BAD_REQUEST
+            )
         
         if not created:
             return Response(
@@ -164,31 +369,86 @@ class FollowerViewSet(viewsets.ModelViewSet):
         follower = get_object_or_404(
             Follower,
             trader_id=trader_id,
-            follower_user=request.user
+            follower_user=request.user,
+            is_active=True
         )
-        follower.delete()
+        # Copy history is removed in the background; see api.teardown
+        with transaction.atomic():
+            EventJournal.unfollowed(follower)
+            teardown = FollowerTeardownService.unfollow(follower)
         
-        return Response({'status': 'unfollowed'}, status=status.HTTP_200_OK)
+        return Response(
+            {'status': 'unfollowed', 'teardown': FollowerTeardownSerializer(teardown).data},
+            status=status.HTTP_200_OK
+        )
 
     @action(detail=True, methods=['get'])
-    def performance(self, request, pk=None):
+    def exposure(self, request, pk=None):
+        # Reads the follower's exposure index rows, one per pair
         follower = self.get_object()
-        copied_trades = follower.copied_trades.all()
+        pairs = [ExposureIndex.as_dict(row) for row in follower.exposures.filter(open_positions__gt=0)]
+        notional = sum(pair['notional'] for pair in pairs)
+        balance = follower.live_balances()['current_balance']
+        return Response({
+            'follower_id': follower.pk,
+            'current_balance': balance,
+            'notional': round(notional, 6),
+            'exposure': pairs,
+            **ExposureIndex.margin(balance, notional),
+        })
+
+    @action(detail=False, methods=['get'], url_path=r'teardowns/(?P<teardown_id>\d+)')
+    def teardown(self, request, teardown_id=None):
+        teardown = get_object_or_404(FollowerTeardown, pk=teardown_id, user=request.user)
+        return Response(FollowerTeardownSerializer(teardown).data)
+
+    @action(detail=False, methods=['get'])
+    def portfolio(self, request):
+        # Totals, per-pair exposure and one entry per followed trader in a
+        # fixed number of grouped queries; pass the returned cursor back as
+        # ?since= to get only the traders that changed
+        since = request.query_params.get('since')
+        if since is not None:
+            try:
+                since = int(since)
+            except ValueError:
+                return Response(
+                    {'error': 'since must be a cursor returned by this endpoint'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
         
-        total_trades = copied_trades.count()
-        closed_trades = copied_trades.filter(status='closed')
-        winning_trades = closed_trades.filter(profit_loss__gt=0).count()
+        return Response(PortfolioService.portfolio(request.user, since=since))
+
+    @action(detail=True, methods=['get'])
+    def performance(self, request, pk=None):
+        follower = self.get_object()
+        totals = history_totals(follower.copied_trades.all(), follower.archived_copied_trades.all())
+        balances = follower.live_balances()
         
         performance = {
-            'total_copied_trades': total_trades,
-            'closed_trades': closed_trades.count(),
-            'winning_trades': winning_trades,
-            'total_profit': follower.total_profit,
-            'commission_paid': follower.commission_paid,
-            'current_balance': follower.current_balance,
+            'total_copied_trades': totals['count'],
+            'closed_trades': totals['closed'],
+            'winning_trades': totals['winning'],
+            'total_profit': balances['total_profit'],
+            'commission_paid': balances['commission_paid'],
+            'current_balance': balances['current_balance'],
         }
         
-        if closed_trades.count() > 0:
-            performance['win_rate'] = (winning_trades / closed_trades.count()) * 100
+        if totals['closed'] > 0:
+            performance['win_rate'] = (totals['winning'] / totals['closed']) * 100
         
         return Response(performance)
+
+
+class MarketViewSet(viewsets.ViewSet):
+    """Per-pair market overview served from the maintained counters"""
+    permission_classes = [AllowAny]
+
+    def list(self, request):
+        return Response(MarketStats.overview())
+
+    def retrieve(self, request, pk=None):
+        markets = MarketStats.overview(currency_pair=pk.upper())
+        if not markets:
+            return Response({'error': 'Unknown currency pair'}, status=status.HTTP_404_NOT_FOUND)
+        return Response(markets[0])
@@ -2,9 +2,9 @@ from rest_framework import status, viewsets
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated, AllowAny
-from django.contrib.auth.models import User
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
 from rest_framework_simplejwt.tokens import RefreshToken
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
 
 from .serializers_auth import (
     UserRegisterSerializer,
@@ -120,19 +120,25 @@ class CustomTokenObtainPairView(TokenObtainPairView):
 
     def post(self, request, *args, **kwargs):
         """Login and return tokens with user data"""
-        response = super().post(request, *args, **kwargs)
+        serializer = self.get_serializer(data=request.data)
         
-        if response.status_code == status.HTTP_200_OK:
-            user = User.objects.get(username=request.data.get('username'))
-            response.data['user'] = {
-                'id': user.id,
-                'username': user.username,
-                'email': user.email,
-                'first_name': user.first_name,
-                'last_name': user.last_name,
-            }
+        try:
+            serializer.is_valid(raise_exception=True)
+        except TokenError as e:
+            raise InvalidToken(e.args[0])
+        
+        # Reuse the user the login serializer has just authenticated
+        user = serializer.user
+        data = dict(serializer.validated_data)
+        data['user'] = {
+            'id': user.id,
+            'username': user.username,
+            'email': user.email,
+            'first_name': user.first_name,
+            'last_name': user.last_name,
+        }
         
-        return response
+        return Response(data, status=status.HTTP_200_OK)
 
 
 class VerifyTokenView(viewsets.ViewSet):
@@ -0,0 +1,112 @@
+"""
+Worker warm-up
+
+A fresh process otherwise pays for building the URL resolvers, DRF
+serializer field maps, the JWT backend and database connections on its
+first requests, which shows up as p99 spikes after every deploy or worker
+recycle. warm_up() does that work ahead of time. gunicorn.conf.py runs it
+in the master before forking when preload_app is on (everything except
+connections, which must not be shared across fork) and in every worker
+once it has loaded the application.
+"""
+import logging
+import time
+
+from django.db import connections
+from django.urls import URLPattern, URLResolver, get_resolver
+
+logger = logging.getLogger(__name__)
+
+
+def _view_classes(patterns):
+    for pattern in patterns:
+        if isinstance(pattern, URLResolver):
+            yield from _view_classes(pattern.url_patterns)
+        elif isinstance(pattern, URLPattern):
+            view_class = getattr(pattern.callback, 'cls', None)
+            if view_class is not None:
+                yield view_class
+
+
+def warm_urls():
+    """Build the URL resolver, its reverse lookups and every included urlconf"""
+    resolver = get_resolver()
+    resolver.reverse_dict
+    return len(resolver.url_patterns)
+
+
+def warm_serializers():
+    """Instantiate the serializers of every routed view and build their fields"""
+    serializer_classes = set()
+    for view_class in _view_classes(get_resolver().url_patterns):
+        for attr in ('serializer_class', 'fast_serializer_class'):
+            serializer_class = getattr(view_class, attr, None)
+            if serializer_class is not None:
+                serializer_classes.add(serializer_class)
+
+    for serializer_class in serializer_classes:
+        try:
+            fields = serializer_class().fields
+            # Nested serializers build their own fields lazily
+            for field in fields.values():
+                getattr(field, 'fields', None)
+        except Exception:
+            logger.debug('Could not warm %s', serializer_class.__name__, exc_info=True)
+    return len(serializer_classes)
+
+
+def warm_jwt():
+    """Set up the JWT backend by signing and verifying a throwaway token"""
+    from rest_framework_simplejwt.tokens import AccessToken
+    from .authentication import CachedJWTAuthentication
+
+    CachedJWTAuthentication()
+    AccessToken(str(AccessToken()))
+    return 1
+
+
+def warm_imports():
+    """Import modules that request paths load lazily (NumPy for batch closes)"""
+    import numpy  # noqa: F401
+    return 1
+
+
+def warm_connections():
+    """Open every configured database connection; unreachable ones are skipped"""
+    opened = 0
+    for alias in connections:
+        try:
+            connections[alias].ensure_connection()
+            opened += 1
+        except Exception:
+            logger.warning('Warm-up could not connect to database %s', alias, exc_info=True)
+    return opened
+
+
+def warm_up(connect_databases=True):
+    """
+    Run every warm-up step
+
+    Args:
+        connect_databases: Also open database connections; pass False in a
+            process that is about to fork
+
+    Returns:
+        Dictionary of step name to (items warmed, seconds taken)
+    """
+    steps = [
+        ('urls', warm_urls), ('serializers', warm_serializers), ('jwt', warm_jwt), ('imports', warm_imports),
+    ]
+    if connect_databases:
+        steps.append(('connections', warm_connections))
+
+    timings = {}
+    for name, step in steps:
+        start = time.perf_counter()
+        count = step()
+        timings[name] = (count, time.perf_counter() - start)
+
+    logger.info('Warm-up done: %s', ', '.join(
+        f'{name} {count} in {seconds * 1000:.1f}ms' for name, (count, seconds) in timings.items()
+    ))
+    return timings
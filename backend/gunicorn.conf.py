@@ -0,0 +1,50 @@
+"""
+Gunicorn configuration for Win Trade
+
+Run with: gunicorn -c gunicorn.conf.py win_trade.wsgi
+"""
+import os
+import shutil
+
+bind = os.getenv('GUNICORN_BIND', '0.0.0.0:8000')
+workers = int(os.getenv('GUNICORN_WORKERS', '4'))
+# Lets settings refuse per-process caches in a multi-worker server
+os.environ['WEB_CONCURRENCY'] = str(workers)
+
+# Prometheus multiprocess mode: every worker writes its samples to files in
+# this directory and /metrics aggregates them across workers.
+prometheus_dir = os.environ.setdefault('PROMETHEUS_MULTIPROC_DIR', '/tmp/win_trade_metrics')
+
+# Load the application once in the master so workers fork already warm
+preload_app = os.getenv('GUNICORN_PRELOAD', 'True') == 'True'
+warmup = os.getenv('GUNICORN_WARMUP', 'True') == 'True'
+
+
+def on_starting(server):
+    """Clear samples left behind by a previous master"""
+    shutil.rmtree(prometheus_dir, ignore_errors=True)
+    os.makedirs(prometheus_dir, exist_ok=True)
+
+
+def when_ready(server):
+    """Warm resolvers and serializers in the preloaded master"""
+    if warmup and server.cfg.preload_app:
+        from django.db import connections
+        from api.warmup import warm_up
+
+        warm_up(connect_databases=False)
+        # Never hand a master connection to forked workers
+        connections.close_all()
+
+
+def post_worker_init(worker):
+    """Finish warming up before the worker accepts its first request"""
+    if warmup:
+        from api.warmup import warm_up
+        warm_up()
+
+
+def child_exit(server, worker):
+    """Drop live gauges of a worker that has exited"""
+    from prometheus_client import multiprocess
+    multiprocess.mark_process_dead(worker.pid)
@@ -0,0 +1,22 @@
+"""
+Celery application for Win Trade
+
+Run a worker with: celery -A win_trade.celery worker
+"""
+import os
+
+from celery import Celery
+from celery.signals import worker_init
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'win_trade.settings')
+
+app = Celery('win_trade')
+app.config_from_object('django.conf:settings', namespace='CELERY')
+app.autodiscover_tasks()
+
+
+@worker_init.connect
+def check_response_cache(**kwargs):
+    """Refuse a per-process response cache, whose version bumps no web worker would see"""
+    from api.cache import check_backend
+    check_backend(background_worker=True)
@@ -22,18 +22,18 @@ INSTALLED_APPS = [
     'rest_framework',
     'corsheaders',
     'api',
-    'traders',
-    'trades',
-    'followers',
 ]
 
 MIDDLEWARE = [
+    'api.metrics.RequestLatencyMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'api.slowqueries.SlowQueryMiddleware',
+    'api.db_router.ReplicaRoutingMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -66,6 +66,36 @@ DATABASES = {
         'PASSWORD': os.getenv('DB_PASSWORD', 'postgres'),
         'HOST': os.getenv('DB_HOST', 'localhost'),
         'PORT': os.getenv('DB_PORT', '5432'),
+        # Keep connections open across requests and verify them before reuse
+        'CONN_MAX_AGE': int(os.getenv('DB_CONN_MAX_AGE', '60')),
+        'CONN_HEALTH_CHECKS': True,
+    }
+}
+
+# Read replicas: a comma-separated list of hosts sharing the primary's credentials
+DATABASE_REPLICAS = []
+for index, host in enumerate(filter(None, os.getenv('DB_REPLICA_HOSTS', '').split(','))):
+    alias = f'replica_{index}'
+    DATABASES[alias] = {
+        **DATABASES['default'],
+        'HOST': host.strip(),
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_REPLICAS.append(alias)
+
+DATABASE_ROUTERS = ['api.db_router.PrimaryReplicaRouter']
+
+# Seconds a user's reads stay on the primary after one of their writes
+REPLICA_STICKY_SECONDS = int(os.getenv('REPLICA_STICKY_SECONDS', '5'))
+REPLICA_HEALTH_CHECK_INTERVAL = int(os.getenv('REPLICA_HEALTH_CHECK_INTERVAL', '30'))
+
+# Shared cache (used for replica stickiness); falls back to per-process memory
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': os.getenv('REDIS_CACHE_URL'),
+    } if os.getenv('REDIS_CACHE_URL') else {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
     }
 }
 
@@ -91,7 +121,12 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'api.authentication.CachedJWTAuthentication',
+    ],
+    'DEFAULT_RENDERER_CLASSES': [
+        'api.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+        'api.renderers.MessagePackRenderer',
     ],
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 20,
@@ -101,6 +136,82 @@ REST_FRAMEWORK = {
     ],
 }
 
+# Seconds an authenticated user is reused from the in-process cache
+JWT_USER_CACHE_TTL = int(os.getenv('JWT_USER_CACHE_TTL', '30'))
+
+# Serve list/retrieve reads from values() rows instead of ModelSerializers
+FAST_READ_SERIALIZATION = os.getenv('FAST_READ_SERIALIZATION', 'True') == 'True'
+
+# Web worker processes; gunicorn.conf.py sets it for its workers
+WEB_CONCURRENCY = int(os.getenv('WEB_CONCURRENCY', '1'))
+
+# Milliseconds a cold start (loading the WSGI application) may take; the
+# test suite enforces it (see also profile_imports --budget)
+COLD_START_BUDGET_MS = float(os.getenv('COLD_START_BUDGET_MS', '1500'))
+
+# Versioned per-object response cache for trader profile pages. Versions
+# must be seen by every web and Celery worker, so it lives in Redis; the
+# per-process 'locmem' backend is refused outside a single web process
+RESPONSE_CACHE_ENABLED = os.getenv('RESPONSE_CACHE_ENABLED', 'True') == 'True'
+RESPONSE_CACHE = {
+    'BACKEND': os.getenv('RESPONSE_CACHE_BACKEND', 'redis'),
+    'MAX_ENTRIES': int(os.getenv('RESPONSE_CACHE_MAX_ENTRIES', '10000')),
+    'TIMEOUT': int(os.getenv('RESPONSE_CACHE_TIMEOUT', '300')),
+}
+if RESPONSE_CACHE['BACKEND'] == 'redis':
+    RESPONSE_CACHE['LOCATION'] = os.getenv(
+        'RESPONSE_CACHE_REDIS_URL', os.getenv('REDIS_CACHE_URL', 'redis://localhost:6379/1')
+    )
+
+# Trader search index backends: 'database' or 'memory'
+TRADER_SEARCH_BACKEND = os.getenv('TRADER_SEARCH_BACKEND', 'database')
+TRADER_AUTOCOMPLETE_BACKEND = os.getenv('TRADER_AUTOCOMPLETE_BACKEND', 'memory')
+
+# Closed trades and copies older than this move to the archive tables
+ARCHIVE_AFTER_DAYS = int(os.getenv('ARCHIVE_AFTER_DAYS', '365'))
+
+# Columnar history files written by export_closed_history
+ANALYTICS_EXPORT_DIR = os.getenv('ANALYTICS_EXPORT_DIR', os.path.join(BASE_DIR, 'analytics'))
+
+# How long journal readers wait for an uncommitted lower event offset
+EVENT_GAP_GRACE_SECONDS = int(os.getenv('EVENT_GAP_GRACE_SECONDS', '5'))
+
+# Rows serialized per chunk by ?stream=1 list responses
+STREAM_CHUNK_SIZE = int(os.getenv('STREAM_CHUNK_SIZE', '2000'))
+
+# Unfollow teardown: rows deleted per transaction and chunks per Celery task
+FOLLOWER_TEARDOWN_CHUNK_SIZE = int(os.getenv('FOLLOWER_TEARDOWN_CHUNK_SIZE', '1000'))
+FOLLOWER_TEARDOWN_CHUNKS_PER_TASK = int(os.getenv('FOLLOWER_TEARDOWN_CHUNKS_PER_TASK', '20'))
+
+# Margin warnings: leverage applied to open notional, and the margin level
+# (balance over required margin, in percent) below which to warn
+ACCOUNT_LEVERAGE = int(os.getenv('ACCOUNT_LEVERAGE', '100'))
+MARGIN_WARNING_LEVEL = float(os.getenv('MARGIN_WARNING_LEVEL', '150'))
+
+# Trader rating: age at which a closed trade counts half, and how many
+# average trades every trader's record is shrunk toward
+RATING_HALF_LIFE_DAYS = float(os.getenv('RATING_HALF_LIFE_DAYS', '90'))
+RATING_PRIOR_TRADES = float(os.getenv('RATING_PRIOR_TRADES', '20'))
+
+# Per-pair tick history files written by load_ticks
+TICK_STORE_DIR = os.getenv('TICK_STORE_DIR', os.path.join(BASE_DIR, 'ticks'))
+
+# Slow-query log (api.slowqueries): statements at or over the threshold are
+# logged with their EXPLAIN plan to a rotating JSON-lines file. Strict mode
+# (for test and CI runs) raises on sequential scans of the hot tables.
+SLOW_QUERY_LOG = os.getenv('SLOW_QUERY_LOG', 'False') == 'True'
+SLOW_QUERY_THRESHOLD_MS = float(os.getenv('SLOW_QUERY_THRESHOLD_MS', '200'))
+SLOW_QUERY_LOG_FILE = os.getenv('SLOW_QUERY_LOG_FILE', os.path.join(BASE_DIR, 'logs', 'slow_queries.jsonl'))
+SLOW_QUERY_LOG_MAX_BYTES = int(os.getenv('SLOW_QUERY_LOG_MAX_BYTES', str(10 * 1024 * 1024)))
+SLOW_QUERY_LOG_BACKUPS = int(os.getenv('SLOW_QUERY_LOG_BACKUPS', '5'))
+SLOW_QUERY_HOT_TABLES = os.getenv(
+    'SLOW_QUERY_HOT_TABLES', 'api_trade,api_copiedtrade,api_follower,api_trader,api_tradeevent'
+).split(',')
+SLOW_QUERY_FAIL_ON_SEQ_SCAN = os.getenv('SLOW_QUERY_FAIL_ON_SEQ_SCAN', 'False') == 'True'
+
+# Admin changelists trust planner row estimates above this many rows
+ADMIN_EXACT_COUNT_THRESHOLD = int(os.getenv('ADMIN_EXACT_COUNT_THRESHOLD', '10000'))
+
 CORS_ALLOWED_ORIGINS = os.getenv('CORS_ALLOWED_ORIGINS', 'http://localhost:4200,http://localhost:3000').split(',')
 
 CELERY_BROKER_URL = os.getenv('CELERY_BROKER_URL', 'redis://localhost:6379')
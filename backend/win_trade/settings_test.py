@@ -0,0 +1,35 @@
+"""
+Settings for the test suite: SQLite, per-process caches and no Redis
+
+Run the tests with ``pytest`` from the backend directory.
+"""
+from .settings import *  # noqa: F401,F403
+
+DEBUG = False
+
+DATABASES = {
+    'default': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.path.join(BASE_DIR, 'test.sqlite3'),
+    },
+    # Second alias for the replica routing tests; nothing else reads it
+    # unless a test lists it in DATABASE_REPLICAS
+    'replica_0': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.path.join(BASE_DIR, 'test_replica.sqlite3'),
+    },
+}
+DATABASE_REPLICAS = []
+
+CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+# One test process, no Celery worker
+WEB_CONCURRENCY = 1
+RESPONSE_CACHE = {'BACKEND': 'locmem', 'MAX_ENTRIES': 10000, 'TIMEOUT': 300}
+CELERY_BROKER_URL = 'memory://'
+CELERY_RESULT_BACKEND = 'cache+memory://'
+
+PASSWORD_HASHERS = ['django.contrib.auth.hashers.MD5PasswordHasher']
+
+SLOW_QUERY_LOG = False
+SLOW_QUERY_FAIL_ON_SEQ_SCAN = False
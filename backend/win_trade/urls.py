@@ -5,7 +5,8 @@ from django.conf.urls.static import static
 from rest_framework.routers import DefaultRouter
 from rest_framework_simplejwt.views import TokenRefreshView
 
-from api.views import TraderViewSet, TradeViewSet, FollowerViewSet
+from api.metrics import metrics_view
+from api.views import TraderViewSet, TradeViewSet, FollowerViewSet, MarketViewSet
 from api.views_auth import (
     UserRegisterView, UserProfileViewSet, CustomTokenObtainPairView, VerifyTokenView
 )
@@ -14,6 +15,7 @@ router = DefaultRouter()
 router.register(r'traders', TraderViewSet)
 router.register(r'trades', TradeViewSet)
 router.register(r'followers', FollowerViewSet)
+router.register(r'markets', MarketViewSet, basename='market')
 
 # Authentication routes
 auth_router = DefaultRouter()
@@ -28,6 +30,7 @@ urlpatterns = [
     path('api/auth/login/', CustomTokenObtainPairView.as_view(), name='token_obtain_pair'),
     path('api/auth/token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
     path('api-auth/', include('rest_framework.urls')),
+    path('metrics', metrics_view, name='metrics'),
 ]
 
 if settings.DEBUG:
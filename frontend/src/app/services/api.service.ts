@@ -31,12 +31,12 @@ export class ApiService {
     return this.http.get(`${this.apiUrl}/traders/${id}/stats/`);
   }
 
-  getTraderTrades(id: number): Observable<any> {
-    return this.http.get(`${this.apiUrl}/traders/${id}/trades/`);
+  getTraderTrades(id: number, page: number = 1): Observable<any> {
+    return this.http.get(`${this.apiUrl}/traders/${id}/trades/`, { params: { page } });
   }
 
-  getTraderFollowers(id: number): Observable<any> {
-    return this.http.get(`${this.apiUrl}/traders/${id}/followers_list/`);
+  getTraderFollowers(id: number, page: number = 1): Observable<any> {
+    return this.http.get(`${this.apiUrl}/traders/${id}/followers_list/`, { params: { page } });
   }
 
   // Trades endpoints
@@ -68,8 +68,8 @@ export class ApiService {
     return this.http.post(`${this.apiUrl}/trades/${id}/close_trade/`, { exit_price: exitPrice });
   }
 
-  getTradesByStatus(status: string): Observable<any> {
-    return this.http.get(`${this.apiUrl}/trades/by_status/`, { params: { status } });
+  getTradesByStatus(status: string, page: number = 1): Observable<any> {
+    return this.http.get(`${this.apiUrl}/trades/by_status/`, { params: { status, page } });
   }
 
   getTopPerformers(limit: number = 10): Observable<any> {